@@ -1,18 +1,31 @@
 """Meal Planner — Streamlit dashboard for weekly meal plans and weight tracking."""
 
 import csv
-import json
-import re
-import urllib.request
 from collections import defaultdict
 from datetime import date, datetime, timedelta
+from functools import wraps
 from io import StringIO
 from pathlib import Path
 
-import plotly.graph_objects as go
 import streamlit as st
 
+from meal_planner import factor_invoices, quantities
+from meal_planner.database import DB_NAME, PlanDatabase
+from meal_planner.filecache import FileCache
+from meal_planner.ingredients import REGISTRY_NAME, IngredientRegistry
+from meal_planner.ledger import LEDGER_DIR, PantryLedger
+from meal_planner.metrics import RunRecorder
+from meal_planner.model import Day, Item, Meal, Plan
+from meal_planner.plan_store import PlanStore
+from meal_planner.sheets import SheetFetcher
+from meal_planner.stock_sync import HEADER, StockMirror, StockWriteQueue
+from meal_planner.units import UnitGraph
+from meal_planner.validator import validate_plan
+from meal_planner.views import ViewCache
+
 DATA_DIR = Path(__file__).parent / "data"
+FACTOR_INVOICES = DATA_DIR / "receipts" / "Factor" / factor_invoices.STORE_NAME
+SHEET_SNAPSHOTS = DATA_DIR / ".sheet-snapshots"
 
 # ---------------------------------------------------------------------------
 # Page config
@@ -24,44 +37,92 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
+
+# ---------------------------------------------------------------------------
+# Instrumentation (see the diagnostics panel)
+# ---------------------------------------------------------------------------
+def _cache_counters() -> dict[str, int]:
+    """Process-wide cache counters; each run records how much they moved."""
+    files = _get_file_cache()
+    views = _get_view_cache()
+    counters = {
+        "file_cache.hits": files.hits,
+        "file_cache.misses": files.misses,
+        "view_cache.hits": views.hits,
+        "view_cache.misses": views.misses,
+    }
+    for outcome, count in _get_sheet_fetcher().stats.items():
+        counters[f"sheets.{outcome}"] = count
+    return counters
+
+
+def _recorder() -> RunRecorder:
+    """This session's timing recorder."""
+    if "_metrics" not in st.session_state:
+        st.session_state["_metrics"] = RunRecorder(_cache_counters)
+    return st.session_state["_metrics"]
+
+
+def _timed(fn):
+    """Record each call of `fn` as a span of the current run."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _recorder().span(fn.__name__):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
 # ---------------------------------------------------------------------------
 # Data loading (cached)
 # ---------------------------------------------------------------------------
 
 
-@st.cache_data(ttl=60)
+@st.cache_resource
+def _get_file_cache() -> FileCache:
+    """Process-wide JSON cache invalidated by file mtime/size (see meal_planner.filecache)."""
+    return FileCache()
+
+
 def load_json(path: Path) -> dict | list | None:
-    try:
-        return json.loads(path.read_text())
-    except (FileNotFoundError, json.JSONDecodeError):
-        return None
+    return _get_file_cache().load(path)
 
 
 def load_profile():
     return load_json(DATA_DIR / "profile.json")
 
 
-@st.cache_data(ttl=300)
+@st.cache_resource
+def _get_sheet_fetcher() -> SheetFetcher:
+    """Process-wide fetcher shared by every session (see meal_planner.sheets)."""
+    return SheetFetcher(max_age=300, timeout=10, snapshot_dir=SHEET_SNAPSHOTS)
+
+
+def _parse_weight_csv(content: str) -> list | None:
+    """Weight entries from the weight sheet's CSV export, sorted by date."""
+    reader = csv.reader(StringIO(content))
+    next(reader)  # skip header row
+    entries = []
+    for row in reader:
+        if len(row) >= 2 and row[0].strip() and row[1].strip():
+            entries.append(
+                {
+                    "date": row[0].strip(),
+                    "weight_kg": float(row[1].strip()),
+                }
+            )
+    return sorted(entries, key=lambda e: e["date"]) if entries else None
+
+
 def _fetch_weight_from_gsheet(url: str) -> tuple:
     """Fetch weight entries from a published Google Sheet (CSV export)."""
     try:
-        response = urllib.request.urlopen(url, timeout=10)  # noqa: S310
-        content = response.read().decode("utf-8")
+        content = _get_sheet_fetcher().get(url)
         # DEBUG: return raw preview for diagnosis
         lines = content.strip().split("\n")
         preview = "\n".join(lines[:5])
-        reader = csv.reader(StringIO(content))
-        next(reader)  # skip header row
-        entries = []
-        for row in reader:
-            if len(row) >= 2 and row[0].strip() and row[1].strip():
-                entries.append(
-                    {
-                        "date": row[0].strip(),
-                        "weight_kg": float(row[1].strip()),
-                    }
-                )
-        return (sorted(entries, key=lambda e: e["date"]) if entries else None), None, preview
+        return _parse_weight_csv(content), None, preview
     except Exception as exc:
         return None, str(exc), None
 
@@ -74,51 +135,174 @@ def _secret(key: str) -> str | None:
         return None
 
 
+SHEET_URL_SECRETS = ("WEIGHT_SHEET_URL", "STOCK_SHEET_URL", "SPENDING_SHEET_URL")
+
+
+def prefetch_sheets():
+    """Start fetching every configured sheet in parallel before any tab renders."""
+    urls = [url for url in (_secret(key) for key in SHEET_URL_SECRETS) if url]
+    _get_sheet_fetcher().prefetch(urls)
+
+
+def _local_weight() -> tuple[list | None, str]:
+    """Weight entries from the local data: the SQLite mirror or weight.json."""
+    if _use_sqlite():
+        return load_database().weights() or None, "sqlite"
+    return load_json(DATA_DIR / "weight.json"), "json_file"
+
+
+@_timed
 def load_weight():
     url = _secret("WEIGHT_SHEET_URL")
     if url:
         data, error, preview = _fetch_weight_from_gsheet(url)
         if data:
             return data, "google_sheet", None, None
-        return load_json(DATA_DIR / "weight.json"), "json_file", error or "empty response", preview
-    return load_json(DATA_DIR / "weight.json"), "json_file", "no WEIGHT_SHEET_URL secret", None
+        return *_local_weight(), error or "empty response", preview
+    return *_local_weight(), "no WEIGHT_SHEET_URL secret", None
 
 
 def load_manifest():
     return load_json(DATA_DIR / "plans" / "manifest.json")
 
 
-def load_plan(file: str):
-    return load_json(DATA_DIR / "plans" / file)
+def load_plan(file: str) -> Plan | None:
+    data = load_json(DATA_DIR / "plans" / file)
+    return Plan.from_dict(data) if data else None
+
+
+def _use_sqlite() -> bool:
+    """True when the DATA_BACKEND setting selects the SQLite mirror of data/."""
+    return (_secret("DATA_BACKEND") or "json").lower() == "sqlite"
+
+
+@st.cache_resource
+def _get_plan_store() -> PlanStore:
+    """Process-wide compiled plan store (see meal_planner.plan_store)."""
+    return PlanStore(DATA_DIR / "plans")
+
+
+@st.cache_resource
+def _get_database() -> PlanDatabase:
+    """Process-wide SQLite mirror of data/ (see meal_planner.database)."""
+    return PlanDatabase(DATA_DIR / DB_NAME, DATA_DIR)
+
+
+def load_database() -> PlanDatabase:
+    """Return the database, re-importing only the files that changed."""
+    db = _get_database()
+    db.refresh()
+    return db
+
+
+def _plan_source() -> PlanStore | PlanDatabase:
+    return _get_database() if _use_sqlite() else _get_plan_store()
 
 
-def load_ingredient_categories() -> dict:
-    return load_json(DATA_DIR / "ingredient-categories.json") or {}
+@_timed
+def load_plan_store() -> PlanStore | PlanDatabase:
+    """Return the plan store (or the database), recompiling only the week files that changed."""
+    store = _plan_source()
+    store.refresh()
+    return store
+
+
+@st.cache_resource
+def _get_view_cache() -> ViewCache:
+    """Process-wide cache of per-plan derived views (see meal_planner.views)."""
+    return ViewCache(maxsize=64)
+
+
+def _plan_view(plan: Plan, kind: str, build, *key):
+    """Build a view of `plan` once per plan content hash (plus any extra `key`).
+
+    The hash is the one the store created `plan` from, not the store's current
+    one: a session may still render an older version after a refresh.
+    """
+    if plan.digest is None:
+        return build()
+    return _get_view_cache().get((plan.digest, kind, *key), build)
+
+
+@st.cache_resource(max_entries=2)
+def _get_ingredient_registry(mtime_ns: int) -> IngredientRegistry:
+    """Process-wide ingredient registry (see meal_planner.ingredients) for one file version."""
+    return IngredientRegistry.from_json(load_json(DATA_DIR / REGISTRY_NAME) or [])
+
+
+@st.cache_resource(max_entries=2)
+def _get_unit_graph(mtime_ns: int) -> UnitGraph:
+    """Process-wide unit conversion graph (see meal_planner.units) over that registry."""
+    return UnitGraph(_get_ingredient_registry(mtime_ns))
+
+
+def _ingredients_mtime() -> int:
+    try:
+        return (DATA_DIR / REGISTRY_NAME).stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def load_ingredients() -> IngredientRegistry:
+    """The ingredient registry, rebuilt when data/ingredients.json changes."""
+    return _get_ingredient_registry(_ingredients_mtime())
+
+
+def load_unit_graph() -> UnitGraph:
+    return _get_unit_graph(_ingredients_mtime())
 
 
 def load_products() -> dict:
+    if _use_sqlite():
+        return load_database().products()
     return load_json(DATA_DIR / "products.json") or {}
 
 
-@st.cache_data(ttl=300)
+@st.cache_resource
+def _get_ledger(sqlite: bool) -> PantryLedger:
+    """Process-wide pantry ledger (see meal_planner.ledger), JSON lines or SQLite."""
+    return PantryLedger.open(DATA_DIR / LEDGER_DIR, sqlite=sqlite)
+
+
+@_timed
+def load_ledger() -> PantryLedger:
+    """The pantry ledger, with every plan week that has ended recorded as eaten."""
+    ledger = _get_ledger(_use_sqlite())
+    registry = load_ingredients()
+    store = load_plan_store()
+    today = date.today().isoformat()
+    for entry in store.entries():
+        week_key = f"{entry['year']}-W{entry['week']:02d}"
+        if not entry["end_date"] or entry["end_date"] >= today or ledger.closed(week_key):
+            continue
+        plan = store.model(entry["year"], entry["week"])
+        if plan is not None:
+            ledger.close_week(week_key, _plan_needs(plan, registry))
+    return ledger
+
+
+def _parse_stock_csv(content: str) -> set:
+    """Ingredient names checked as stocked in the stock sheet's CSV export."""
+    reader = csv.reader(StringIO(content))
+    next(reader)  # skip header
+    stocked = set()
+    for row in reader:
+        if len(row) >= 2 and row[0].strip():
+            checked = row[1].strip().upper()
+            if checked in ("TRUE", "SI", "SÍ", "1", "X", "YES"):
+                stocked.add(row[0].strip())
+    return stocked
+
+
 def _fetch_stock_from_gsheet(url: str) -> set | None:
     """Fetch stocked ingredient names from a published Google Sheet (CSV)."""
     try:
-        response = urllib.request.urlopen(url, timeout=10)  # noqa: S310
-        content = response.read().decode("utf-8")
-        reader = csv.reader(StringIO(content))
-        next(reader)  # skip header
-        stocked = set()
-        for row in reader:
-            if len(row) >= 2 and row[0].strip():
-                checked = row[1].strip().upper()
-                if checked in ("TRUE", "SI", "SÍ", "1", "X", "YES"):
-                    stocked.add(row[0].strip())
-        return stocked
+        return _parse_stock_csv(_get_sheet_fetcher().get(url))
     except Exception:
         return None
 
 
+@_timed
 def load_stock() -> set:
     url = _secret("STOCK_SHEET_URL")
     if url:
@@ -145,6 +329,7 @@ def _get_gsheets_client():
         return None
 
 
+@_timed
 @st.cache_resource
 def _get_stock_worksheet():
     """Open (or create) the 'Stock' tab for read/write access."""
@@ -159,95 +344,133 @@ def _get_stock_worksheet():
 
         spreadsheet = client.open_by_url(url)
         try:
-            return spreadsheet.worksheet("Stock")
+            worksheet = spreadsheet.worksheet("Stock")
         except gspread.exceptions.WorksheetNotFound:
-            return spreadsheet.add_worksheet(title="Stock", rows=100, cols=3)
+            return spreadsheet.add_worksheet(title="Stock", rows=100, cols=len(HEADER))
+        if worksheet.col_count < len(HEADER):
+            worksheet.resize(cols=len(HEADER))  # sheets from before the version column
+        return worksheet
     except Exception:
         return None
 
 
-def _load_stock_state(worksheet, year: int, week: int, ingredients: list[str]) -> dict[str, bool]:
-    """Load stock state from the sheet, resetting if week changed."""
+@st.cache_resource
+def _get_stock_queue() -> StockWriteQueue | None:
+    """Process-wide write-behind queue for the Stock worksheet, with its local mirror."""
+    worksheet = _get_stock_worksheet()
+    if worksheet is None:
+        return None
+    return StockWriteQueue(worksheet, StockMirror(worksheet))
+
+
+def _load_stock_state(
+    queue: StockWriteQueue | None,
+    year: int,
+    week: int,
+    ingredients: list[str],
+    covered: set[str],
+    tracked: set[str],
+) -> dict[str, bool]:
+    """Checkbox state for the week, with the Stock sheet brought in line with it.
+
+    Ingredients the pantry ledger tracks (`tracked`) are in stock when the
+    ledger covers them; the sheet only mirrors that, except that a tick the
+    ledger doesn't cover is kept (bought elsewhere, or the ledger was reset)
+    for the caller to record. The rest keep whatever the sheet says for this
+    week. A sheet for another week is reset. Sheet values come from the
+    queue's local mirror, so this rarely calls the API.
+    """
+    state = {name: name in covered for name in ingredients}
+    if queue is None:
+        return state
     try:
-        rows = worksheet.get_all_values()
+        queue.flush(timeout=10)  # don't read back values still queued for writing
+        rows = queue.mirror.values()
         semana_expected = f"{year}-W{week:02d}"
 
         if len(rows) >= 2:
             semana_actual = rows[1][2] if len(rows[1]) > 2 else ""
             if semana_actual == semana_expected:
-                state = {}
+                sheet = {}
                 for row in rows[1:]:
                     if row and row[0]:
-                        checked = len(row) > 1 and row[1].upper() == "TRUE"
-                        state[row[0]] = checked
-                # Include all plan ingredients (default unchecked if missing)
-                return {name: state.get(name, False) for name in ingredients}
+                        sheet[row[0]] = len(row) > 1 and row[1].upper() == "TRUE"
+                for name in ingredients:
+                    if name not in tracked:
+                        state[name] = sheet.get(name, False)
+                    elif sheet.get(name) and not state[name]:
+                        state[name] = True  # ticked in the sheet, not in the ledger
+                    elif sheet.get(name) is not None and sheet[name] != state[name]:
+                        queue.enqueue(name, state[name])
+                return state
 
         # Week mismatch or empty — reset
-        _reset_stock_sheet(worksheet, year, week, ingredients)
-        return {name: False for name in ingredients}
-    except Exception:
-        return {name: False for name in ingredients}
-
-
-def _reset_stock_sheet(worksheet, year: int, week: int, ingredients: list[str]):
-    """Clear and populate sheet with new week's ingredients."""
-    try:
-        worksheet.clear()
-        semana = f"{year}-W{week:02d}"
-        rows = [["ingrediente", "en_casa", "semana"]]
-        for i, name in enumerate(sorted(ingredients)):
-            rows.append([name, "FALSE", semana if i == 0 else ""])
-        worksheet.update(range_name="A1", values=rows)
+        queue.mirror.reset(semana_expected, state)
     except Exception:
         pass
+    return state
 
 
-def _update_stock_cell(worksheet, name: str, checked: bool):
-    """Update the en_casa cell for a specific ingredient."""
-    try:
-        cell = worksheet.find(name, in_column=1)
-        if cell:
-            worksheet.update_cell(cell.row, 2, "TRUE" if checked else "FALSE")
-    except Exception:
-        pass
-
+def _on_stock_toggle(name: str, food: int | None, missing: float, need: float):
+    """Callback when a stock checkbox is toggled.
 
-def _on_stock_toggle(worksheet, name: str):
-    """Callback when a stock checkbox is toggled."""
+    Checking a food the ledger tracks records buying what was missing of it;
+    unchecking takes that purchase back (or, for stock from before, the
+    week's amount). The sheet write happens in the background.
+    """
     new_val = st.session_state.get(f"cb_{name}", False)
     st.session_state["stock_data"][name] = new_val
-    _update_stock_cell(worksheet, name, new_val)
+    if food is not None:
+        ledger = _get_ledger(_use_sqlite())
+        bought = st.session_state.setdefault("stock_bought", {})
+        if new_val:
+            ledger.purchase(food, missing, source="grocery")
+            bought[name] = missing
+        else:
+            ledger.adjust(food, -bought.pop(name, need), source="grocery")
+    queue = _get_stock_queue()
+    if queue:
+        queue.enqueue(name, new_val)
+
+
+def load_factor_invoices() -> dict:
+    """Invoice store compiled by ``python -m meal_planner.factor_invoices``."""
+    return load_json(FACTOR_INVOICES) or {"invoices": {}}
 
 
+@_timed
 def load_spending() -> list:
+    """Spending entries, with factor_eur taken from the Factor invoices when invoiced."""
     url = _secret("SPENDING_SHEET_URL")
-    if url:
-        data = _fetch_spending_from_gsheet(url)
-        if data:
-            return data
-    return load_json(DATA_DIR / "spending.json") or []
+    data = _fetch_spending_from_gsheet(url) if url else None
+    if not data and _use_sqlite():
+        data = load_database().spending()
+    if not data:
+        data = load_json(DATA_DIR / "spending.json") or []
+    return factor_invoices.apply_to_spending(data, load_factor_invoices())
+
+
+def _parse_spending_csv(content: str) -> list | None:
+    """Spending entries from the spending sheet's CSV export."""
+    reader = csv.reader(StringIO(content))
+    next(reader)  # skip header
+    entries = []
+    for row in reader:
+        if len(row) >= 4 and row[0].strip() and row[1].strip():
+            entry = {
+                "year": int(row[0].strip()),
+                "week": int(row[1].strip()),
+                "factor_eur": float(row[2].strip()) if row[2].strip() else None,
+                "grocery_eur": float(row[3].strip()) if row[3].strip() else None,
+            }
+            entries.append(entry)
+    return entries if entries else None
 
 
-@st.cache_data(ttl=300)
 def _fetch_spending_from_gsheet(url: str) -> list | None:
     """Fetch spending data from a published Google Sheet (CSV)."""
     try:
-        response = urllib.request.urlopen(url, timeout=10)  # noqa: S310
-        content = response.read().decode("utf-8")
-        reader = csv.reader(StringIO(content))
-        next(reader)  # skip header
-        entries = []
-        for row in reader:
-            if len(row) >= 4 and row[0].strip() and row[1].strip():
-                entry = {
-                    "year": int(row[0].strip()),
-                    "week": int(row[1].strip()),
-                    "factor_eur": float(row[2].strip()) if row[2].strip() else None,
-                    "grocery_eur": float(row[3].strip()) if row[3].strip() else None,
-                }
-                entries.append(entry)
-        return entries if entries else None
+        return _parse_spending_csv(_get_sheet_fetcher().get(url))
     except Exception:
         return None
 
@@ -333,27 +556,22 @@ def calorie_indicator(actual: int, target: int) -> str:
     return "\U0001f534"
 
 
-def _dinner_display_name(day: dict) -> str:
-    """Extract the dinner display name from a day object."""
-    dinner = day.get("meals", {}).get("dinner", {})
-    name = dinner.get("name", "")
-    if not name:
-        items = dinner.get("items", [])
-        name = items[0].get("name", "\u2014") if items else "\u2014"
+def _dinner_display_name(day: Day) -> str:
+    """Extract the dinner display name from a day."""
+    dinner = day.meal("dinner")
+    name = (dinner.display_name if dinner else "") or "\u2014"
     return name[:35] + "..." if len(name) > 35 else name
 
 
-def _meal_display_name(meal: dict) -> str:
-    """Get the display name: explicit name field, or first item name as fallback."""
-    name = meal.get("name", "")
-    if not name:
-        items = meal.get("items", [])
-        name = items[0].get("name", "") if items else ""
-    return name
+def _is_office_day(day: Day) -> bool:
+    if day.office_day is not None:
+        return day.office_day
+    return day.weekday in OFFICE_DAYS
 
 
-def _is_office_day(day: dict) -> bool:
-    return day.get("office_day", day.get("weekday") in OFFICE_DAYS)
+def _item_line(item: Item) -> str:
+    kcal = "?" if item.kcal is None else item.kcal
+    return f"\u2022 {item.name or '?'}  \u00b7  {item.quantity or ''}  \u00b7  {kcal} kcal"
 
 
 def _weekday_es(weekday: str) -> str:
@@ -363,121 +581,121 @@ def _weekday_es(weekday: str) -> str:
 # ---------------------------------------------------------------------------
 # Ingredient aggregation engine
 # ---------------------------------------------------------------------------
-_FRACTION_MAP = {
-    "\u00bd": 0.5,
-    "\u00bc": 0.25,
-    "\u00be": 0.75,
-    "\u2153": 0.333,
-    "\u2154": 0.667,
-}
-
-_QTY_RE = re.compile(r"^([\d\u00bc\u00bd\u00be\u2153\u2154]+(?:[.,]\d+)?)\s*(.*)$")
-
-
 def _parse_quantity(qty_str: str) -> tuple[float | None, str]:
-    """Parse a quantity string into (amount, unit).
+    """Parse a quantity string into (amount, display unit).
+
+    Thin wrapper over the shared engine in meal_planner.quantities.
 
     Examples:
         "250g"         → (250.0, "g")
         "2 rebanadas"  → (2.0, "rebanadas")
-        "1 mediano"    → (1.0, "mediano")
         "½ cdta"       → (0.5, "cdta")
         "2"            → (2.0, "unidad")
         "1 lata (120g)"→ (1.0, "lata (120g)")
     """
-    s = qty_str.strip()
-    if not s:
-        return None, qty_str
-
-    # Handle leading fraction character (½, ¼, etc.)
-    if s[0] in _FRACTION_MAP:
-        amount = _FRACTION_MAP[s[0]]
-        rest = s[1:].strip()
-        if rest:
-            return amount, rest
-        return amount, "unidad"
-
-    m = _QTY_RE.match(s)
-    if not m:
-        return None, qty_str
-
-    num_str = m.group(1).replace(",", ".")
-    # Handle fractions embedded in the number part
-    for frac_char, frac_val in _FRACTION_MAP.items():
-        if frac_char in num_str:
-            parts = num_str.split(frac_char)
-            whole = float(parts[0]) if parts[0] else 0
-            amount = whole + frac_val
-            unit = m.group(2).strip() or "unidad"
-            return amount, unit
+    q = quantities.parse(qty_str)
+    return q.amount, q.label
 
-    try:
-        amount = float(num_str)
-    except ValueError:
-        return None, qty_str
 
-    unit = m.group(2).strip() or "unidad"
-    return amount, unit
+def _format_amount(total: float, unit: str) -> str:
+    if unit == "count":
+        unit = "unidad" if total == 1 else "unidades"
+    # Clean up display: show integer if whole number
+    if total == int(total):
+        return f"{int(total)} {unit}"
+    return f"{total:.1f} {unit}"
 
 
-def _aggregate_ingredients(plan: dict) -> dict[str, str]:
-    """Aggregate ingredients across a weekly plan, skipping Factor/free dinners.
+def _food_totals(plan: Plan) -> tuple[dict[int, float], dict[int, list]]:
+    """Sum a weekly plan's items per food ID, skipping Factor/free dinners.
 
-    Returns dict mapping ingredient name → aggregated quantity string.
+    Each amount is converted to the food's canonical unit through the unit
+    graph (spoons, ml, counts). Returns those totals, plus the (amount, unit
+    as written) pairs per food that have no conversion path.
     """
-    totals: dict[str, list[tuple[float | None, str]]] = defaultdict(list)
+    registry = load_ingredients()
+    graph = load_unit_graph()
+    totals: dict[int, float] = {}
+    others: dict[int, list[tuple[float | None, str]]] = defaultdict(list)
 
-    for day in plan.get("days", []):
-        for slot_id, meal in day.get("meals", {}).items():
+    for day in plan.days:
+        for meal in day.meals:
             # Skip Factor and free dinners — those aren't grocery items
-            if slot_id == "dinner" and meal.get("source") in ("factor", "free"):
+            if meal.slot == "dinner" and meal.source in ("factor", "free"):
                 continue
-            for item in meal.get("items", []):
-                name = item["name"]
-                qty_str = item.get("quantity", "")
-                amount, unit = _parse_quantity(qty_str)
-                totals[name].append((amount, unit))
+            for item in meal.items:
+                food_id = registry.id_for(item.name)
+                quantity = quantities.parse(item.quantity or "")
+                amount = graph.convert(food_id, quantity)
+                if amount is not None:
+                    totals[food_id] = totals.get(food_id, 0.0) + amount
+                else:
+                    others[food_id].append((quantity.amount, quantity.label))
+    return totals, others
+
+
+def _aggregate_ingredients(plan: Plan) -> dict[str, str]:
+    """Aggregate ingredients across a weekly plan, skipping Factor/free dinners.
+
+    Items are summed per food ID from the ingredient registry (see
+    ``_food_totals``), so spelling variants and English names of one food land
+    on a single line. Amounts with no conversion path follow the total,
+    summed per unit as written.
+
+    Returns dict mapping canonical ingredient name → aggregated quantity string.
+    """
+    registry = load_ingredients()
+    graph = load_unit_graph()
+    totals, others = _food_totals(plan)
 
-    # Sum compatible quantities
     result: dict[str, str] = {}
-    for name, entries in sorted(totals.items()):
+    for name, food_id in sorted((registry[f].name, f) for f in totals.keys() | others.keys()):
+        parts: list[str] = []
+        if food_id in totals:
+            parts.append(_format_amount(totals[food_id], graph.canonical_unit(food_id)))
+
         by_unit: dict[str, float] = defaultdict(float)
         raw_parts: list[str] = []
-
-        for amount, unit in entries:
+        for amount, unit in others.get(food_id, ()):
             if amount is not None:
                 by_unit[unit] += amount
             else:
                 raw_parts.append(unit)
-
-        parts: list[str] = []
-        for unit, total in sorted(by_unit.items()):
-            # Clean up display: show integer if whole number
-            if total == int(total):
-                parts.append(f"{int(total)} {unit}")
-            else:
-                parts.append(f"{total:.1f} {unit}")
-
+        parts.extend(_format_amount(total, unit) for unit, total in sorted(by_unit.items()))
         parts.extend(raw_parts)
         result[name] = ", ".join(parts) if parts else ""
 
     return result
 
 
+def _plan_needs(plan: Plan, registry: IngredientRegistry) -> dict[int, float]:
+    """Memoized food ID → amount a plan uses, for the pantry ledger (registered foods only)."""
+
+    def build():
+        totals, _others = _food_totals(plan)
+        return {food: amount for food, amount in totals.items() if registry.registered(food)}
+
+    return _plan_view(plan, "needs", build, registry.fingerprint)
+
+
 # ---------------------------------------------------------------------------
 # Week selector (shared across tabs)
 # ---------------------------------------------------------------------------
 def _render_week_selector():
     """Render the week navigation above tabs. Stores plan in session_state."""
-    manifest = load_manifest()
+    store = load_plan_store()
+    plans = store.entries()  # sorted by (year, week), drafts excluded
+
+    skipped = store.skipped()
+    if skipped:
+        with st.expander(f"\u26a0\ufe0f {len(skipped)} planes sin cargar", expanded=False):
+            for file, reason in skipped.items():
+                st.caption(f"`{file}` \u2014 {reason}")
 
-    if not manifest or not manifest.get("plans"):
+    if not plans:
         st.info("No hay planes disponibles.")
         return None
 
-    plans = sorted(manifest["plans"], key=lambda p: (p["year"], p["week"]))
-    # Filter out drafts
-    plans = [p for p in plans if not p.get("draft")]
     plan_labels = [f"{p['year']} W{p['week']:02d}" for p in plans]
 
     if "week_idx" not in st.session_state:
@@ -518,7 +736,7 @@ def _render_week_selector():
             st.rerun()
 
     entry = plans[st.session_state.week_idx]
-    plan = load_plan(entry["file"])
+    plan = store.model(entry["year"], entry["week"])
     if not plan:
         st.error(f"No se pudo cargar el plan: {entry['file']}")
         return None
@@ -533,35 +751,50 @@ def _render_week_selector():
 # ---------------------------------------------------------------------------
 # Tab: Weekly Menu
 # ---------------------------------------------------------------------------
+@st.fragment
+@_timed
 def render_menu_tab():
-    plan = st.session_state.get("current_plan")
+    entry = st.session_state.get("current_entry")
+    if not entry:
+        return
+    plan = load_plan_store().model(entry["year"], entry["week"])
     if not plan:
         return
 
     profile = load_profile()
     target = profile["daily_target_kcal"] if profile else 1800
 
+    # The plan file itself: the model (and the SQLite mirror) fill in missing keys
+    issues = _plan_view(
+        plan, "issues", lambda: validate_plan(load_json(DATA_DIR / "plans" / entry["file"]))
+    )
+    if issues:
+        with st.expander(f"\u26a0\ufe0f {len(issues)} inconsistencias en el plan", expanded=False):
+            for issue in issues[:50]:
+                st.caption(f"`{issue.path}` \u2014 {issue.message}")
+
     _render_week_summary(plan, target)
     st.divider()
-    for day in plan["days"]:
+    for day in plan.days:
         _render_day_card(day, target)
 
 
-def _render_week_summary(plan: dict, target: int):
-    """Compact overview: one row per day showing dinner + kcal."""
+def _week_summary_rows(plan: Plan, target: int, today: str) -> list[str]:
+    """Markdown table rows for the week overview, one per day."""
     rows = []
-    for day in plan["days"]:
-        dinner = day["meals"].get("dinner", {})
-        indicator = calorie_indicator(day["total_kcal"], target)
-        is_today = day["date"] == date.today().isoformat()
-        weekday = _weekday_es(day["weekday"])[:3]
+    for day in plan.days:
+        dinner = day.meal("dinner")
+        kcal = day.kcal
+        indicator = calorie_indicator(kcal, target)
+        is_today = day.date == today
+        weekday = _weekday_es(day.weekday or "")[:3]
         if is_today:
             weekday = f"**{weekday}**"
 
         flags = []
         if _is_office_day(day):
             flags.append("\U0001f3e2")
-        source = dinner.get("source")
+        source = dinner.source if dinner else None
         if source == "factor":
             flags.append("\U0001f4e6")
         elif source == "free":
@@ -570,10 +803,17 @@ def _render_week_summary(plan: dict, target: int):
             flags.append("\U0001f373")
 
         rows.append(
-            f"| {weekday} | {_dinner_display_name(day)} "
-            f"| {''.join(flags)} "
-            f"| {indicator} {day['total_kcal']} |"
+            f"| {weekday} | {_dinner_display_name(day)} | {''.join(flags)} | {indicator} {kcal} |"
         )
+    return rows
+
+
+def _render_week_summary(plan: Plan, target: int):
+    """Compact overview: one row per day showing dinner + kcal."""
+    today = date.today().isoformat()
+    rows = _plan_view(
+        plan, "week_summary", lambda: _week_summary_rows(plan, target, today), target, today
+    )
 
     header = "| D\u00eda | Cena | | Kcal |\n|-----|--------|---|------|\n"
     table = header + "\n".join(rows)
@@ -586,44 +826,43 @@ def _render_week_summary(plan: dict, target: int):
     )
 
 
-def _render_day_card(day: dict, target: int):
-    indicator = calorie_indicator(day["total_kcal"], target)
-    is_today = day["date"] == date.today().isoformat()
+def _render_day_card(day: Day, target: int):
+    kcal = day.kcal
+    indicator = calorie_indicator(kcal, target)
+    is_today = day.date == date.today().isoformat()
     today_tag = " \u2014 **Hoy**" if is_today else ""
-    weekday_es = _weekday_es(day["weekday"])
+    weekday_es = _weekday_es(day.weekday or "")
 
     flags = []
     if _is_office_day(day):
         flags.append("\U0001f3e2 Oficina")
-    if day.get("notes"):
-        flags.append(f"\U0001f4dd {day['notes']}")
+    if day.notes:
+        flags.append(f"\U0001f4dd {day.notes}")
     sep = "  \u00b7  "
     flag_str = f"  \u00b7  {sep.join(flags)}" if flags else ""
 
     header = (
-        f"{weekday_es}  \u00b7  {day['date']}{today_tag}"
-        f"  \u00b7  {indicator} {day['total_kcal']} kcal{flag_str}"
+        f"{weekday_es}  \u00b7  {day.date or '?'}{today_tag}"
+        f"  \u00b7  {indicator} {kcal} kcal{flag_str}"
     )
 
     with st.expander(header, expanded=is_today):
-        dinner = day["meals"].get("dinner")
+        dinner = day.meal("dinner")
         if dinner:
             _render_dinner_hero(dinner)
 
         st.divider()
 
         for slot_id in ["breakfast", "lunch", "snack1", "snack2"]:
-            meal = day["meals"].get(slot_id)
+            meal = day.meal(slot_id)
             if meal:
                 _render_meal_compact(slot_id, meal)
 
 
-def _render_dinner_hero(meal: dict):
+def _render_dinner_hero(meal: Meal):
     """Render dinner prominently — it drives the rest of the day's calories."""
-    name = _meal_display_name(meal)
-    if not name:
-        name = "Cena"
-    source = meal.get("source", "")
+    name = meal.display_name or "Cena"
+    source = meal.source or ""
     badge = SOURCE_LABELS.get(source, "")
 
     st.markdown(f"### \U0001f37d\ufe0f {name}")
@@ -631,29 +870,26 @@ def _render_dinner_hero(meal: dict):
     col_info, col_kcal = st.columns([3, 1])
     with col_info:
         parts = [f"**{badge}**"] if badge else []
-        parts.append(meal["time"])
+        if meal.time:
+            parts.append(meal.time)
         st.markdown("  \u00b7  ".join(parts))
     with col_kcal:
-        st.markdown(f"### {meal['total_kcal']}")
+        st.markdown(f"### {meal.kcal}")
         st.caption("kcal")
 
-    items = meal.get("items", [])
+    items = meal.items
     if source != "factor" and len(items) > 1:
         with st.expander("Ingredientes", expanded=False):
             for item in items:
-                st.caption(
-                    f"\u2022 {item['name']}  \u00b7  "
-                    f"{item['quantity']}  \u00b7  "
-                    f"{item['kcal']} kcal"
-                )
+                st.caption(_item_line(item))
 
 
-def _render_meal_compact(slot_id: str, meal: dict):
+def _render_meal_compact(slot_id: str, meal: Meal):
     """Render breakfast/lunch/snacks: meal name visible, ingredients expandable."""
     icon = MEAL_ICONS.get(slot_id, "")
     label = MEAL_LABELS.get(slot_id, slot_id)
-    portable = "  \U0001f4bc" if meal.get("portable") else ""
-    meal_name = _meal_display_name(meal)
+    portable = "  \U0001f4bc" if meal.portable else ""
+    meal_name = meal.display_name
 
     col_meal, col_kcal = st.columns([5, 1])
     with col_meal:
@@ -662,33 +898,69 @@ def _render_meal_compact(slot_id: str, meal: dict):
         else:
             st.markdown(f"{icon} **{label}**{portable}")
     with col_kcal:
-        st.markdown(f"**{meal['total_kcal']}** kcal")
+        st.markdown(f"**{meal.kcal}** kcal")
 
-    items = meal.get("items", [])
+    items = meal.items
     if len(items) > 1:
         with st.expander("Ingredientes", expanded=False):
             for item in items:
-                st.caption(
-                    f"\u2022 {item['name']}  \u00b7  "
-                    f"{item['quantity']}  \u00b7  "
-                    f"{item['kcal']} kcal"
-                )
+                st.caption(_item_line(item))
     elif len(items) == 1:
-        st.caption(f"  {items[0]['quantity']}  \u00b7  {items[0]['kcal']} kcal")
+        kcal = "?" if items[0].kcal is None else items[0].kcal
+        st.caption(f"  {items[0].quantity or ''}  \u00b7  {kcal} kcal")
 
 
 # ---------------------------------------------------------------------------
 # Tab: Grocery List
 # ---------------------------------------------------------------------------
-def _render_grocery_readonly(ingredients, categories_map, products):
-    """Read-only grocery list fallback (no Google Sheets write access)."""
-    stock = load_stock()
-    has_stock = bool(stock)
-
+def _group_by_category(ingredients: dict[str, str], registry: IngredientRegistry) -> dict:
+    """Group aggregated ingredients by shopping category, sorted by name."""
     grouped: dict[str, list[tuple[str, str]]] = defaultdict(list)
     for name, qty in ingredients.items():
-        cat = categories_map.get(name, "otros")
+        cat = registry.lookup(name).category or "otros"
         grouped[cat].append((name, qty))
+    return {cat: sorted(items) for cat, items in grouped.items()}
+
+
+def _plan_grocery_views(plan: Plan, registry: IngredientRegistry) -> tuple[dict, dict]:
+    """Memoized (aggregated ingredients, category grouping) for a plan."""
+    ingredients = _plan_view(
+        plan, "ingredients", lambda: _aggregate_ingredients(plan), registry.fingerprint
+    )
+    grouped = _plan_view(
+        plan,
+        "grouping",
+        lambda: _group_by_category(ingredients, registry),
+        registry.fingerprint,
+    )
+    return ingredients, grouped
+
+
+def _pantry_status(
+    ingredients: dict[str, str], needs: dict[int, float], ledger: PantryLedger
+) -> tuple[set[str], dict[str, str]]:
+    """Names the pantry ledger already covers, and "faltan X de Y" for partly covered ones."""
+    registry = load_ingredients()
+    graph = load_unit_graph()
+    short = ledger.missing(needs)
+    covered: set[str] = set()
+    partial: dict[str, str] = {}
+    for name, qty in ingredients.items():
+        food = registry.id_for(name)
+        if food not in needs:
+            continue
+        left = short.get(food)
+        if left is None:
+            covered.add(name)
+        elif left < needs[food]:
+            partial[name] = f"faltan {_format_amount(left, graph.canonical_unit(food))} de {qty}"
+    return covered, partial
+
+
+def _render_grocery_readonly(ingredients, grouped, products, registry, covered, partial):
+    """Read-only grocery list (not signed in): pantry ledger plus the published stock sheet."""
+    stock = load_stock() | covered
+    has_stock = bool(stock)
 
     if has_stock:
         total_items = len(ingredients)
@@ -717,9 +989,10 @@ def _render_grocery_readonly(ingredients, categories_map, products):
         cat_label = CATEGORY_LABELS.get(cat, cat)
         st.markdown(f"#### {cat_label}")
 
-        for name, qty in sorted(items):
+        for name, qty in items:
             in_stock = has_stock and name in stock
-            product = products.get(name)
+            product = products.get(registry.lookup(name).product)
+            qty = partial.get(name, qty)
 
             line = f"\u2705 ~~{name}~~" if in_stock else f"\u2b1c {name}"
 
@@ -744,37 +1017,56 @@ def _render_grocery_readonly(ingredients, categories_map, products):
             st.markdown(line)
 
 
+@st.fragment
+@_timed
 def render_grocery_tab():
     plan = st.session_state.get("current_plan")
     if not plan:
         return
 
-    ingredients = _aggregate_ingredients(plan)
+    registry = load_ingredients()
+    ingredients, grouped = _plan_grocery_views(plan, registry)
     if not ingredients:
         st.info("No hay ingredientes para esta semana.")
         return
 
-    categories_map = load_ingredient_categories()
     products = load_products()
+    ledger = load_ledger()
+    needs = _plan_needs(plan, registry)
+    covered, partial = _pantry_status(ingredients, needs, ledger)
 
-    # Try interactive mode with Google Sheets
-    worksheet = _get_stock_worksheet()
-    if worksheet is None or not _check_password():
-        _render_grocery_readonly(ingredients, categories_map, products)
+    if not _check_password():
+        _render_grocery_readonly(ingredients, grouped, products, registry, covered, partial)
         return
 
-    # Interactive mode
-    year = plan.get("year", 2026)
-    week = plan.get("week", 1)
+    # Interactive mode: the ledger records purchases, the Stock sheet (if any) mirrors them
+    year = plan.year
+    week = plan.week
     week_key = f"{year}-W{week:02d}"
 
     # Load stock state on first load or week change
     if st.session_state.get("stock_week") != week_key:
-        stock_state = _load_stock_state(worksheet, year, week, list(ingredients.keys()))
+        tracked = {name for name in ingredients if registry.id_for(name) in needs}
+        stock_state = _load_stock_state(
+            _get_stock_queue(), year, week, list(ingredients.keys()), covered, tracked
+        )
+        # Sheet ticks the ledger doesn't cover become purchases, so unticking undoes them
+        short = ledger.missing(needs)
+        bought = {}
+        for name in tracked:
+            if stock_state[name] and name not in covered:
+                amount = short.pop(registry.id_for(name), 0.0)
+                if amount:
+                    ledger.purchase(registry.id_for(name), amount, source="sheet")
+                    bought[name] = amount
+        if bought:
+            covered, partial = _pantry_status(ingredients, needs, ledger)
         st.session_state["stock_data"] = stock_state
         st.session_state["stock_week"] = week_key
+        st.session_state["stock_bought"] = bought
 
     stock_data = st.session_state.get("stock_data", {})
+    short = ledger.missing(needs)
 
     # Summary
     total_items = len(ingredients)
@@ -782,22 +1074,21 @@ def render_grocery_tab():
     missing = total_items - in_stock
     st.markdown(f"**{in_stock}** de **{total_items}** en casa \u2014 faltan **{missing}**")
 
+    # Writes the queue gave up on (the ledger has them; the sheet doesn't)
+    queue = _get_stock_queue()
+    if queue and queue.last_error:
+        st.warning(f"Algunos cambios no se guardaron en la hoja Stock: {queue.last_error}")
+
     # Shopping mode toggle
     shopping_mode = st.toggle("Solo lo que falta", value=in_stock > 0, key="grocery_shopping_mode")
 
-    # Group by category
-    grouped: dict[str, list[tuple[str, str]]] = defaultdict(list)
-    for name, qty in ingredients.items():
-        cat = categories_map.get(name, "otros")
-        grouped[cat].append((name, qty))
-
     # Render by category with interactive checkboxes
     for cat in CATEGORY_ORDER:
         items = grouped.get(cat)
         if not items:
             continue
 
-        display_items = sorted(items)
+        display_items = items
         if shopping_mode:
             display_items = [(n, q) for n, q in display_items if not stock_data.get(n, False)]
             if not display_items:
@@ -807,10 +1098,12 @@ def render_grocery_tab():
         st.markdown(f"#### {cat_label}")
 
         for name, qty in display_items:
+            food = registry.id_for(name)
             label_parts = [name]
+            qty = partial.get(name, qty)
             if qty:
                 label_parts.append(qty)
-            product = products.get(name)
+            product = products.get(registry.lookup(name).product)
             if product:
                 ah_name = product.get("ah_product", "")
                 price = product.get("price_eur")
@@ -825,13 +1118,17 @@ def render_grocery_tab():
                 value=stock_data.get(name, False),
                 key=f"cb_{name}",
                 on_change=_on_stock_toggle,
-                args=(worksheet, name),
+                args=(name, food, short.get(food, 0.0), needs.get(food, 0.0))
+                if food in needs
+                else (name, None, 0.0, 0.0),
             )
 
 
 # ---------------------------------------------------------------------------
 # Tab: Weight Progress
 # ---------------------------------------------------------------------------
+@st.fragment
+@_timed
 def render_weight_tab():
     profile = load_profile()
     weight_data, weight_source, weight_error, csv_preview = load_weight()
@@ -844,28 +1141,56 @@ def render_weight_tab():
         st.warning("Perfil no encontrado.")
         return
 
-    if weight_source == "json_file":
-        st.caption(f"⚠️ Datos desde weight.json — {weight_error}")
+    if weight_source in ("json_file", "sqlite"):
+        local = "weight.json" if weight_source == "json_file" else "SQLite"
+        st.caption(f"⚠️ Datos desde {local} — {weight_error}")
         if csv_preview:
             st.code(csv_preview, language="csv")
     else:
-        st.caption(f"✓ Datos desde Google Sheet · {len(weight_data)} registros")
+        age = _get_sheet_fetcher().age(_secret("WEIGHT_SHEET_URL"))
+        age_str = f" · actualizado {_age_text(age)}" if age is not None else ""
+        st.caption(f"✓ Datos desde Google Sheet · {len(weight_data)} registros{age_str}")
 
-    _render_weight_stats(weight_data, profile)
+    _render_weight_stats(_weight_summary(weight_data, weight_source), profile)
     _render_weight_chart(weight_data, profile)
 
 
-def _render_weight_stats(weight_data: list, profile: dict):
-    start_w = weight_data[0]["weight_kg"]
-    current_w = weight_data[-1]["weight_kg"]
+def _age_text(seconds: float) -> str:
+    """Spanish relative age for captions: "hace 5 min", "hace 3 h", "hace 2 d"."""
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "ahora"
+    if minutes < 60:
+        return f"hace {minutes} min"
+    if minutes < 24 * 60:
+        return f"hace {minutes // 60} h"
+    return f"hace {minutes // (24 * 60)} d"
+
+
+def _weight_summary(weight_data: list, source: str) -> dict:
+    """First and latest weigh-in; queried in SQL when the entries came from the database."""
+    if source == "sqlite":
+        return load_database().weight_summary()
+    return {
+        "count": len(weight_data),
+        "start_date": weight_data[0]["date"],
+        "start_kg": weight_data[0]["weight_kg"],
+        "current_date": weight_data[-1]["date"],
+        "current_kg": weight_data[-1]["weight_kg"],
+    }
+
+
+def _render_weight_stats(summary: dict, profile: dict):
+    start_w = summary["start_kg"]
+    current_w = summary["current_kg"]
     goal = profile["goal_weight_kg"]
     lost = start_w - current_w
     remaining = current_w - goal
     total_to_lose = start_w - goal
     pct = (lost / total_to_lose * 100) if total_to_lose > 0 else 0
 
-    start_date = datetime.fromisoformat(weight_data[0]["date"])
-    current_date = datetime.fromisoformat(weight_data[-1]["date"])
+    start_date = datetime.fromisoformat(summary["start_date"])
+    current_date = datetime.fromisoformat(summary["current_date"])
     weeks_elapsed = max(1, (current_date - start_date).days / 7)
     weekly_rate = lost / weeks_elapsed
 
@@ -887,6 +1212,8 @@ def _render_weight_stats(weight_data: list, profile: dict):
 
 
 def _render_weight_chart(weight_data: list, profile: dict):
+    import plotly.graph_objects as go  # imported lazily, only charts need it
+
     dates = [e["date"] for e in weight_data]
     weights = [e["weight_kg"] for e in weight_data]
     goal = profile["goal_weight_kg"]
@@ -940,10 +1267,27 @@ def _render_weight_chart(weight_data: list, profile: dict):
 # ---------------------------------------------------------------------------
 # Tab: Budget
 # ---------------------------------------------------------------------------
+def _spending_summary(spending: list) -> dict:
+    """Budget totals; summed in SQL when the entries came from the database."""
+    if _use_sqlite() and not _secret("SPENDING_SHEET_URL"):
+        return load_database().spending_summary()
+    last = spending[-1] if spending else None
+    return {
+        "weeks": len(spending),
+        "factor_eur": sum(e.get("factor_eur") or 0 for e in spending),
+        "grocery_eur": sum(e.get("grocery_eur") or 0 for e in spending),
+        "last_week_eur": (
+            (last.get("factor_eur") or 0) + (last.get("grocery_eur") or 0) if last else None
+        ),
+    }
+
+
+@st.fragment
+@_timed
 def render_budget_tab():
     profile = load_profile()
     spending = load_spending()
-    weight_data, *_ = load_weight()
+    weight_data, weight_source, *_ = load_weight()
 
     if not spending:
         st.info(
@@ -952,20 +1296,26 @@ def render_budget_tab():
         )
         return
 
-    factor_weekly = profile.get("factor_weekly_eur", 62.93) if profile else 62.93
+    latest_invoice = factor_invoices.latest_invoice(load_factor_invoices())
+    if latest_invoice:
+        factor_weekly = latest_invoice["total_eur"]
+        factor_meals_week = latest_invoice["meals"] or 6
+    else:
+        factor_weekly = profile.get("factor_weekly_eur", 62.93) if profile else 62.93
+        factor_meals_week = 6
     budget_weekly = profile.get("budget_weekly_eur", 120) if profile else 120
 
     # Compute totals
-    total_factor = sum(e.get("factor_eur") or 0 for e in spending)
-    total_grocery = sum(e.get("grocery_eur") or 0 for e in spending)
-    total_spent = total_factor + total_grocery
-    weeks_with_data = len(spending)
+    totals = _spending_summary(spending)
+    total_spent = totals["factor_eur"] + totals["grocery_eur"]
+    weeks_with_data = totals["weeks"]
     avg_weekly = total_spent / weeks_with_data if weeks_with_data else 0
 
     # Cost per kg lost
     cost_per_kg = None
     if weight_data and len(weight_data) >= 2:
-        lost = weight_data[0]["weight_kg"] - weight_data[-1]["weight_kg"]
+        weights = _weight_summary(weight_data, weight_source)
+        lost = weights["start_kg"] - weights["current_kg"]
         if lost > 0:
             cost_per_kg = total_spent / lost
 
@@ -975,12 +1325,8 @@ def render_budget_tab():
     col2.metric("Promedio semanal", f"\u20ac{avg_weekly:.0f}")
 
     # Current week spending
-    current_entry = spending[-1] if spending else None
-    if current_entry:
-        week_total = (current_entry.get("factor_eur") or 0) + (
-            current_entry.get("grocery_eur") or 0
-        )
-        col3.metric("Esta semana", f"\u20ac{week_total:.0f}")
+    if totals["last_week_eur"] is not None:
+        col3.metric("Esta semana", f"\u20ac{totals['last_week_eur']:.0f}")
     else:
         col3.metric("Esta semana", "\u2014")
 
@@ -990,6 +1336,8 @@ def render_budget_tab():
         col4.metric("Costo / kg perdido", "\u2014")
 
     # Stacked bar chart
+    import plotly.graph_objects as go  # imported lazily, only charts need it
+
     weeks_labels = [f"W{e['week']:02d}" for e in spending]
     factor_vals = [e.get("factor_eur") or 0 for e in spending]
     grocery_vals = [e.get("grocery_eur") or 0 for e in spending]
@@ -1042,13 +1390,12 @@ def render_budget_tab():
 
     # Factor breakdown
     st.markdown("#### \U0001f4e6 Factor")
-    factor_meals_week = 6
     cost_per_meal = factor_weekly / factor_meals_week
     st.caption(
         f"**{factor_meals_week} comidas/semana**  \u00b7  "
         f"\u20ac{cost_per_meal:.2f}/comida  \u00b7  "
         f"\u20ac{factor_weekly:.2f}/semana  \u00b7  "
-        f"Total: \u20ac{total_factor:.0f}"
+        f"Total: \u20ac{totals['factor_eur']:.0f}"
     )
 
 
@@ -1077,10 +1424,67 @@ def _check_password() -> bool:
     return False
 
 
+# ---------------------------------------------------------------------------
+# Diagnostics (hidden: open the app with ?diag in the URL)
+# ---------------------------------------------------------------------------
+def _diagnostics_unlocked() -> bool:
+    """Password gate for the diagnostics panel; open when no password is configured."""
+    password = _secret("DIAGNOSTICS_PASSWORD")
+    if not password or st.session_state.get("diagnostics_unlocked"):
+        return True
+    entered = st.text_input("Contrase\u00f1a", type="password", key="diagnostics_password")
+    if entered == password:
+        st.session_state["diagnostics_unlocked"] = True
+        return True
+    if entered:
+        st.error("Contrase\u00f1a incorrecta.")
+    return False
+
+
+def render_diagnostics():
+    """Timings and cache counters of this session's last run, plus a JSONL export."""
+    if "diag" not in st.query_params:
+        return
+    with st.expander("\U0001f527 Diagn\u00f3stico", expanded=False):
+        if not _diagnostics_unlocked():
+            return
+        recorder = _recorder()
+        run = recorder.last()
+        if run:
+            st.caption(f"{run['at']}  \u00b7  {run['label']}  \u00b7  {run['total_ms']:.0f} ms")
+            rows = [
+                f"| {span['name']} | {span['start_ms']:.1f} | {span['ms']:.1f} |"
+                for span in sorted(run["spans"], key=lambda s: s["start_ms"])
+            ]
+            header = "| Secci\u00f3n | Inicio (ms) | Duraci\u00f3n (ms) |\n|---|---:|---:|\n"
+            st.markdown(header + "\n".join(rows))
+            if run["process_counters"]:
+                counters = sorted(run["process_counters"].items())
+                deltas = "  \u00b7  ".join(f"{name} {delta:+d}" for name, delta in counters)
+                st.caption(f"Cach\u00e9s del proceso (todas las sesiones): {deltas}")
+        st.caption(f"{len(recorder.runs)} ejecuciones registradas")
+        st.download_button(
+            "Exportar JSONL",
+            recorder.to_jsonl(),
+            file_name="meal-planner-metrics.jsonl",
+            mime="application/x-ndjson",
+        )
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
-def main():
+TABS = {
+    "menu": ("\U0001f4cb Men\u00fa Semanal", render_menu_tab),
+    "grocery": ("\U0001f6d2 Lista de Compras", render_grocery_tab),
+    "weight": ("\u2696\ufe0f Peso", render_weight_tab),
+    "budget": ("\U0001f4b0 Presupuesto", render_budget_tab),
+}
+
+
+def render_page():
+    prefetch_sheets()
+
     st.markdown("## \U0001f37d\ufe0f Planificador de Comidas")
     st.caption("1,800 kcal  \u00b7  5 comidas/d\u00eda")
 
@@ -1089,26 +1493,28 @@ def main():
     if not plan:
         return
 
-    tab_menu, tab_grocery, tab_weight, tab_budget = st.tabs(
-        [
-            "\U0001f4cb Men\u00fa Semanal",
-            "\U0001f6d2 Lista de Compras",
-            "\u2696\ufe0f Peso",
-            "\U0001f4b0 Presupuesto",
-        ]
+    # Only the selected section is rendered, and each section is a fragment:
+    # widgets inside it (e.g. grocery checkboxes) rerun just that section.
+    tab = st.radio(
+        "Secci\u00f3n",
+        options=list(TABS),
+        format_func=lambda key: TABS[key][0],
+        key="active_tab",
+        horizontal=True,
+        label_visibility="collapsed",
     )
+    TABS[tab][1]()
 
-    with tab_menu:
-        render_menu_tab()
 
-    with tab_grocery:
-        render_grocery_tab()
-
-    with tab_weight:
-        render_weight_tab()
-
-    with tab_budget:
-        render_budget_tab()
+def main():
+    recorder = _recorder()
+    recorder.begin("rerun")
+    try:
+        render_page()
+    finally:
+        # Also when there is no plan to show, or st.stop() ends the script early
+        recorder.end()
+    render_diagnostics()
 
 
 if __name__ == "__main__":
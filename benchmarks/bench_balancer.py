@@ -0,0 +1,74 @@
+"""Timing for meal_planner.balancer on real weeks and a synthetic year.
+
+The option library is mined from every stored plan. The "year" is 52 weeks
+built by cycling the stored plans with their dinners shuffled, so every day
+needs a fresh solve.
+
+Run with ``uv run python benchmarks/bench_balancer.py``.
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from meal_planner import balancer  # noqa: E402
+from meal_planner.plan_store import PlanStore  # noqa: E402
+
+
+def stored_plans() -> list[dict]:
+    store = PlanStore(ROOT / "data" / "plans")
+    store.refresh()
+    return [store.get(e["year"], e["week"]) for e in store.entries()]
+
+
+def synthetic_year(plans: list[dict], weeks: int = 52, seed: int = 7) -> list[dict]:
+    """`weeks` copies of the stored plans with dinners shuffled across days."""
+    rng = random.Random(seed)
+    dinners = [day["meals"]["dinner"] for plan in plans for day in plan["days"]]
+    year = []
+    for i in range(weeks):
+        plan = json.loads(json.dumps(plans[i % len(plans)]))
+        for day in plan["days"]:
+            day["meals"]["dinner"] = rng.choice(dinners)
+        year.append(plan)
+    return year
+
+
+def main():
+    plans = stored_plans()
+    profile = json.loads((ROOT / "data" / "profile.json").read_text())
+
+    t0 = time.perf_counter()
+    library = balancer.mine_library(plans)
+    mine_s = time.perf_counter() - t0
+    sizes = ", ".join(f"{slot} {len(opts)}" for slot, opts in library.items())
+
+    def run(weeks):
+        t0 = time.perf_counter()
+        unsolved = sum(len(balancer.balance_week(p, library, profile)[1]) for p in weeks)
+        return time.perf_counter() - t0, unsolved
+
+    year = synthetic_year(plans)
+    run(plans)  # warm-up
+    week_s, week_unsolved = min(run(plans) for _ in range(5))
+    year_s, year_unsolved = min(run(year) for _ in range(5))
+    days = sum(len(p["days"]) for p in year)
+
+    print(f"library: {sizes} options (mined in {mine_s * 1e3:.1f} ms)")
+    print(
+        f"{len(plans)} stored weeks: {week_s * 1e3:7.1f} ms "
+        f"({week_s / len(plans) * 1e3:.2f} ms/week, {week_unsolved} days unsolved)"
+    )
+    print(
+        f"52-week year:   {year_s * 1e3:7.1f} ms "
+        f"({year_s / days * 1e6:.0f} µs/day, {year_unsolved} of {days} days unsolved)"
+    )
+
+
+if __name__ == "__main__":
+    main()
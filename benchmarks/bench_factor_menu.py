@@ -0,0 +1,67 @@
+"""Timing for meal_planner.factor_menu on the real and a synthetic catalog.
+
+The synthetic catalog resamples the real meals' kcal/protein/tags with
+noise up to the requested size.
+
+Run with ``uv run python benchmarks/bench_factor_menu.py [n_dishes]``.
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from meal_planner.factor_menu import Catalog, optimize  # noqa: E402
+
+
+def synthetic_meals(real: list[dict], n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    base = [m for m in real if m.get("kcal") and m.get("protein_g")]
+    meals = []
+    for i in range(n):
+        m = rng.choice(base)
+        meals.append(
+            {
+                "id": f"dish-{i}",
+                "name": f"{m['name']} #{i}",
+                "kcal": int(m["kcal"] * rng.uniform(0.8, 1.2)),
+                "protein_g": round(m["protein_g"] * rng.uniform(0.8, 1.2), 1),
+                "carbs_g": m.get("carbs_g"),
+                "tags": m.get("tags", []),
+            }
+        )
+    return meals
+
+
+def timed(catalog: Catalog, n: int, repeat: int = 3, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        picked = optimize(catalog, n, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, picked
+
+
+def main():
+    n_dishes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    real = json.loads((ROOT / "data" / "factor-catalog.json").read_text())
+
+    for label, meals in (("real", real), ("synthetic", synthetic_meals(real, n_dishes))):
+        t0 = time.perf_counter()
+        catalog = Catalog(meals)
+        build_s = time.perf_counter() - t0
+        print(f"{label} catalog: {len(catalog)} dishes (arrays built in {build_s * 1e3:.1f} ms)")
+        for n in (4, 6):
+            for min_tags in ({}, {"Eiwitrijk": n // 2, "Caloriebewust": 1}):
+                secs, picked = timed(catalog, n, kcal_cap=520 * n, min_tags=min_tags)
+                tags = ", ".join(f"{t}≥{m}" for t, m in min_tags.items()) or "no tag minimums"
+                status = "ok" if picked else "infeasible"
+                print(f"  {n} meals ≤ {520 * n} kcal, {tags}: {secs * 1e3:7.1f} ms ({status})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Memory held per loaded week: nested dicts vs the compact plan model.
+
+For every week in the compiled plan store, measures with ``tracemalloc`` the
+memory still allocated after loading the week as ``json.loads`` dicts, as a
+``Plan`` built from those dicts (the dicts then dropped), and as a lazy
+``Plan.from_json`` not read yet (its bytes belong to the store). A last row
+loads every week at once, where interned names are shared across weeks.
+Also times a full walk
+over all items (what the grocery aggregation does) in both representations.
+
+Run with ``uv run python benchmarks/bench_model.py [plans_dir]``.
+"""
+
+import gc
+import json
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from meal_planner.model import Plan  # noqa: E402
+from meal_planner.plan_store import PlanStore  # noqa: E402
+
+
+def retained(build) -> tuple[int, object]:
+    """Bytes still allocated after `build()` returns, and its result."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = build()
+        gc.collect()
+        size, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, value
+
+
+def walk_dicts(plans: list[dict]) -> int:
+    return sum(
+        len(item.get("quantity", ""))
+        for plan in plans
+        for day in plan["days"]
+        for meal in day["meals"].values()
+        for item in meal.get("items", [])
+    )
+
+
+def walk_models(plans: list[Plan]) -> int:
+    return sum(
+        len(item.quantity or "")
+        for plan in plans
+        for day in plan.days
+        for meal in day.meals
+        for item in meal.items
+    )
+
+
+def main():
+    plans_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "data" / "plans"
+    store = PlanStore(plans_dir)
+    store.refresh()
+    entries = store.entries()
+    blobs = {}
+    for e in entries:
+        plan = store.get(e["year"], e["week"])
+        blobs[(e["year"], e["week"])] = json.dumps(plan, ensure_ascii=False).encode()
+
+    print(f"{'week':<10} {'dicts':>10} {'model':>10} {'lazy':>10} {'model/dicts':>12}")
+
+    def row(label: str, dict_kb: float, model_kb: float, lazy_kb: float):
+        ratio = model_kb / dict_kb if dict_kb else 0
+        print(f"{label:<10} {dict_kb:>8.1f}KB {model_kb:>8.1f}KB {lazy_kb:>8.1f}KB {ratio:>11.2f}x")
+
+    for (year, week), blob in blobs.items():
+        dict_size, _ = retained(lambda blob=blob: json.loads(blob))
+        model_size, _ = retained(lambda blob=blob: Plan.from_dict(json.loads(blob)))
+        lazy_size, _ = retained(lambda blob=blob, y=year, w=week: Plan.from_json(blob, y, w))
+        row(f"{year}-W{week:02d}", dict_size / 1024, model_size / 1024, lazy_size / 1024)
+
+    dict_size, dicts = retained(lambda: [json.loads(blob) for blob in blobs.values()])
+    model_size, models = retained(
+        lambda: [Plan.from_dict(json.loads(blob)) for blob in blobs.values()]
+    )
+    lazy_size, _ = retained(lambda: [Plan.from_json(blob, *key) for key, blob in blobs.items()])
+    row(f"all ({len(blobs)})", dict_size / 1024, model_size / 1024, lazy_size / 1024)
+
+    dict_ms = min(timeit.repeat(lambda: walk_dicts(dicts), number=100, repeat=5)) * 10
+    model_ms = min(timeit.repeat(lambda: walk_models(models), number=100, repeat=5)) * 10
+    print(f"\nWalk all items: dicts {dict_ms:.3f} ms, model {model_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Micro-benchmark for meal_planner.quantities over every quantity in the plans.
+
+Run with ``uv run python benchmarks/bench_quantities.py``.
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from meal_planner import quantities  # noqa: E402
+from meal_planner.plan_store import PlanStore  # noqa: E402
+
+
+def plan_quantities() -> list[str]:
+    """Every item quantity string in every stored plan, duplicates included."""
+    store = PlanStore(ROOT / "data" / "plans")
+    store.refresh()
+    out = []
+    for entry in store.entries():
+        for day in store.get(entry["year"], entry["week"])["days"]:
+            for meal in day["meals"].values():
+                out.extend(item["quantity"] for item in meal["items"])
+    return out
+
+
+def main():
+    qtys = plan_quantities()
+    n = len(qtys)
+    repeat = 200
+
+    def cold():
+        for q in qtys:
+            quantities._lex(q)
+
+    def warm():
+        for q in qtys:
+            quantities.parse(q)
+
+    warm()  # fill the memo cache
+    cold_s = min(timeit.repeat(cold, number=repeat, repeat=5)) / (repeat * n)
+    warm_s = min(timeit.repeat(warm, number=repeat, repeat=5)) / (repeat * n)
+
+    print(f"{n} quantity strings, {quantities.cache_size()} distinct")
+    print(f"lexer (uncached): {cold_s * 1e6:7.3f} µs/op")
+    print(f"memoized parse:   {warm_s * 1e6:7.3f} µs/op  ({cold_s / warm_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Lookup benchmark for meal_planner.resolver against a large synthetic catalog.
+
+The real catalog (products.json + registry aliases) is padded with made-up names
+built from its own vocabulary, then every ingredient name in the plans is
+resolved cold (memo cleared) and warm.
+
+Run with ``uv run python benchmarks/bench_resolver.py [n_products]``.
+"""
+
+import json
+import random
+import sys
+import time
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from meal_planner.ingredients import IngredientRegistry  # noqa: E402
+from meal_planner.plan_store import PlanStore  # noqa: E402
+from meal_planner.resolver import IngredientResolver, normalize  # noqa: E402
+
+
+def plan_names() -> list[str]:
+    """Every item name in every stored plan, duplicates included."""
+    store = PlanStore(ROOT / "data" / "plans")
+    store.refresh()
+    out = []
+    for entry in store.entries():
+        for day in store.get(entry["year"], entry["week"])["days"]:
+            for meal in day["meals"].values():
+                out.extend(item["name"] for item in meal["items"])
+    return out
+
+
+def synthetic_catalog(real: list[str], n: int, seed: int = 7) -> list[str]:
+    """`real` plus made-up names from the same words until there are `n` keys."""
+    rng = random.Random(seed)
+    words = sorted({w for name in real for w in normalize(name).split() if len(w) > 2})
+    keys = dict.fromkeys(real)
+    while len(keys) < n:
+        keys[" ".join(rng.sample(words, rng.randint(2, 4))).capitalize()] = None
+    return list(keys)
+
+
+def main():
+    n_products = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    products = json.loads((ROOT / "data" / "products.json").read_text())
+    aliases = IngredientRegistry.load(ROOT / "data" / "ingredients.json").aliases()
+    keys = synthetic_catalog(list(products), n_products)
+    names = plan_names()
+    distinct = list(dict.fromkeys(names))
+
+    t0 = time.perf_counter()
+    resolver = IngredientResolver(keys, aliases)
+    build_s = time.perf_counter() - t0
+
+    def cold():
+        resolver.clear_cache()
+        for name in distinct:
+            resolver.resolve(name)
+
+    def warm():
+        for name in names:
+            resolver.resolve(name)
+
+    cold_s = min(timeit.repeat(cold, number=5, repeat=5)) / (5 * len(distinct))
+    warm()
+    warm_s = min(timeit.repeat(warm, number=50, repeat=5)) / (50 * len(names))
+    resolved = sum(resolver.resolve(name) is not None for name in distinct)
+
+    print(f"{len(keys)} catalog keys + {len(aliases)} aliases")
+    print(f"index build:     {build_s * 1e3:8.1f} ms")
+    print(f"{len(distinct)} distinct plan names, {resolved} resolved")
+    print(f"cold lookup:     {cold_s * 1e6:8.1f} µs/op")
+    print(f"memoized lookup: {warm_s * 1e6:8.3f} µs/op")
+
+
+if __name__ == "__main__":
+    main()
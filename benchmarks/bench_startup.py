@@ -0,0 +1,105 @@
+"""Startup benchmark for app.py: an import-time report and time to first paint.
+
+The import-time report runs ``python -X importtime -c "import app"`` and sums
+self time per top-level package, so a new heavy module-level import shows up
+by name. Time to first paint is the wall time of a fresh interpreter that
+runs the app's first script pass (the default tab) through AppTest; the
+median of a few runs must stay under ``FIRST_PAINT_BUDGET_MS``.
+
+gspread is imported lazily, only once Google service-account credentials are
+configured (the interactive Stock sheet). Its import cost on top of the
+app's is reported separately, as is a first paint of the grocery tab with
+(dummy) credentials set, which goes through that import; the credentials
+are rejected locally, so no request leaves the machine. Neither is budgeted.
+
+Run with ``uv run python benchmarks/bench_startup.py``; exits 1 over budget.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_PAINT_BUDGET_MS = 4000
+RUNS = 3
+TOP = 12
+
+_FIRST_PAINT = (
+    "from streamlit.testing.v1 import AppTest\n"
+    "at = AppTest.from_file('app.py', default_timeout=60)\n"
+    "{setup}"
+    "at.run()\n"
+    "assert not at.exception, at.exception\n"
+)
+_WITH_SHEETS = (
+    "at.secrets['gcp_service_account'] = {'type': 'service_account', 'private_key': 'x'}\n"
+    "at.secrets['STOCK_SHEET_URL'] = 'https://docs.google.com/spreadsheets/d/x'\n"
+    "at.session_state['active_tab'] = 'grocery'\n"
+)
+
+
+def import_times(module: str = "app") -> list[tuple[int, int, str]]:
+    """(self µs, cumulative µs, name) for every module `module` pulls in."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:") :].split("|")
+        rows.append((int(self_us), int(cumulative), name.strip()))
+    return rows
+
+
+def first_paint_ms(setup: str = "") -> float:
+    """Wall time of a cold interpreter rendering the app's first pass."""
+    script = _FIRST_PAINT.format(setup=setup)
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, check=True)
+    return (time.perf_counter() - t0) * 1e3
+
+
+def gspread_extra() -> tuple[int, int]:
+    """(µs, modules) that importing gspread adds once app is loaded."""
+    app_only = {name for _self, _cumulative, name in import_times()}
+    extra = [row for row in import_times("app, gspread") if row[2] not in app_only]
+    return sum(self_us for self_us, _cumulative, _name in extra), len(extra)
+
+
+def main():
+    rows = import_times()
+    by_package: dict[str, int] = defaultdict(int)
+    for self_us, _cumulative, name in rows:
+        by_package[name.split(".")[0]] += self_us
+    total = next(cumulative for _self, cumulative, name in rows if name == "app")
+
+    print(f"import app: {total / 1e3:.0f} ms, {len(rows)} modules")
+    for package, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[:TOP]:
+        print(f"  {package:<24} {self_us / 1e3:7.1f} ms")
+
+    extra_us, extra_modules = gspread_extra()
+    print(f"import gspread on top: {extra_us / 1e3:.0f} ms, {extra_modules} modules")
+
+    paints = [first_paint_ms() for _ in range(RUNS)]
+    median = statistics.median(paints)
+    runs = ", ".join(f"{p:.0f}" for p in paints)
+    sheets = statistics.median(first_paint_ms(_WITH_SHEETS) for _ in range(RUNS))
+    print(f"first paint: {median:.0f} ms median of {RUNS} ({runs})")
+    print(f"with Sheets credentials (grocery tab): {sheets:.0f} ms median")
+    print(f"budget:      {FIRST_PAINT_BUDGET_MS} ms")
+    if median > FIRST_PAINT_BUDGET_MS:
+        print("First paint over budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Benchmark suite over a synthetic multi-year dataset.
+
+Generates a dataset with ``benchmarks/synthetic.py`` in a temporary
+directory, then times quantity parsing, grocery aggregation, the cost
+calculator, the Google Sheet CSV parsers and full renders of every tab
+through Streamlit's AppTest. Results are written to
+``benchmarks/results/<timestamp>.json`` (machine-specific, not committed)
+and compared with the latest earlier run there with the same parameters.
+
+Run with ``uv run python benchmarks/bench_suite.py [years] [products]``.
+"""
+
+import importlib.util
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = ROOT / "benchmarks" / "results"
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import synthetic  # noqa: E402
+
+import app  # noqa: E402
+from meal_planner.model import Plan  # noqa: E402
+
+REPEAT = 5
+RENDER_RUNS = 3
+
+
+def _time(fn, number: int = 1, repeat: int = REPEAT) -> list[float]:
+    """Milliseconds per call of `fn`, one sample per repeat."""
+    return [t / number * 1e3 for t in timeit.repeat(fn, number=number, repeat=repeat)]
+
+
+def _load_cost_calculator(tree: Path):
+    """The synthetic tree's copy of cost_calculator, reading the synthetic data."""
+    path = tree / "data" / "receipts" / "cost_calculator.py"
+    spec = importlib.util.spec_from_file_location("synthetic_cost_calculator", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _render(tree: Path, tab: str) -> float:
+    """Milliseconds for a fresh session's first full render of `tab`."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(tree / "app.py"), default_timeout=120)
+    at.session_state["active_tab"] = tab
+    t0 = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - t0) * 1e3
+    if at.exception:
+        raise RuntimeError(f"{tab} tab raised: {at.exception[0].message}")
+    return elapsed
+
+
+def run_suite(tree: Path, data: dict) -> dict[str, list[float]]:
+    plans = [Plan.from_dict(plan) for plan in data["plans"]]
+    qtys = [
+        item.quantity or ""
+        for plan in plans
+        for day in plan.days
+        for meal in day.meals
+        for item in meal.items
+    ]
+    cost_calculator = _load_cost_calculator(tree)
+
+    def parse_all():
+        for q in qtys:
+            app._parse_quantity(q)
+
+    def aggregate_all():
+        for plan in plans:
+            app._aggregate_ingredients(plan)
+
+    samples = {
+        "parse_quantity (all plan items)": _time(parse_all),
+        "aggregate_ingredients (all plans)": _time(aggregate_all),
+        "compute_weekly_cost (latest plan)": _time(
+            lambda: cost_calculator.compute_weekly_cost(plans[-1]), number=5
+        ),
+        "compute_costs (all plans)": _time(lambda: cost_calculator.compute_costs(plans)),
+        "parse_weight_csv": _time(lambda: app._parse_weight_csv(data["weight_csv"]), number=20),
+        "parse_spending_csv": _time(
+            lambda: app._parse_spending_csv(data["spending_csv"]), number=20
+        ),
+        "parse_stock_csv": _time(lambda: app._parse_stock_csv(data["stock_csv"]), number=20),
+    }
+    for tab in app.TABS:
+        samples[f"render {tab} tab"] = [_render(tree, tab) for _ in range(RENDER_RUNS)]
+    return samples
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def summarize(samples: dict[str, list[float]]) -> dict[str, dict]:
+    return {
+        name: {
+            "median_ms": round(statistics.median(values), 3),
+            "min_ms": round(min(values), 3),
+            "max_ms": round(max(values), 3),
+            "runs": len(values),
+        }
+        for name, values in samples.items()
+    }
+
+
+def previous_result(params: dict) -> dict | None:
+    """The latest saved run over the same dataset size, if any."""
+    for path in sorted(RESULTS.glob("*.json"), reverse=True):
+        try:
+            run = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        if run.get("params") == params:
+            return run
+    return None
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    n_products = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    with tempfile.TemporaryDirectory(prefix="meal-planner-bench-") as tmp:
+        tree = Path(tmp)
+        data = synthetic.generate(tree, years, n_products)
+        results = summarize(run_suite(tree, data))
+
+    params = {"years": years, "plans": len(data["plans"]), "products": len(data["products"])}
+    previous = previous_result(params)
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params,
+        "results": results,
+    }
+    RESULTS.mkdir(exist_ok=True)
+    out = RESULTS / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.write_text(json.dumps(run, indent=2) + "\n")
+
+    before = (previous or {}).get("results", {})
+    label = f" vs {previous['revision']}" if previous else " (no earlier run with these parameters)"
+    print(f"{len(data['plans'])} plans, {len(data['products'])} products{label}")
+    for name, stats in results.items():
+        line = f"  {name:<36} {stats['median_ms']:10.3f} ms"
+        if name in before and before[name]["median_ms"]:
+            ratio = stats["median_ms"] / before[name]["median_ms"]
+            line += f"  ({ratio:.2f}x)"
+        print(line)
+    print(f"Saved {out.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Synthetic dataset generator for the benchmark suite.
+
+Builds a copy of the app's tree (``app.py``, ``data/``, the cost
+calculator) whose data is scaled up from the real files: years of weekly
+plans whose days are resampled from the real plans by weekday, a
+products.json padded with priced variants of the real products (registered
+as foods in ingredients.json; some plan items are renamed to them, so
+lookups hit the large catalog), and weekly weight and spending histories
+for the same span. Output is deterministic for a given seed and end date.
+
+Run with ``uv run python benchmarks/synthetic.py OUT_DIR [years] [products]``.
+"""
+
+import copy
+import csv
+import json
+import random
+import shutil
+import sys
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from meal_planner.plan_store import PlanStore  # noqa: E402
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+# Copied as-is: the app and the calculator read them but they don't grow with time
+STATIC_FILES = (
+    "profile.json",
+    "journey.json",
+    "factor-catalog.json",
+)
+RENAME_SHARE = 0.15  # share of plan items renamed to a synthetic product
+
+
+def real_days() -> dict[str, list[dict]]:
+    """weekday → every day of the real (non-draft) plans falling on it."""
+    store = PlanStore(ROOT / "data" / "plans")
+    store.refresh()
+    days: dict[str, list[dict]] = {w: [] for w in WEEKDAYS}
+    for entry in store.entries():
+        for day in store.get(entry["year"], entry["week"])["days"]:
+            days[day["weekday"]].append(day)
+    return days
+
+
+def synthetic_products(real: dict, n: int, rng: random.Random) -> dict:
+    """The real products plus priced variants up to `n` entries."""
+    products = dict(real)
+    names = list(real)
+    i = 0
+    while len(products) < n:
+        base = rng.choice(names)
+        variant = dict(real[base])
+        variant["ah_product"] = f"{variant.get('ah_product', base)} ({i})"
+        variant["price_eur"] = round(variant.get("price_eur", 1.0) * rng.uniform(0.7, 1.4), 2)
+        products[f"{base} {i}"] = variant
+        i += 1
+    return products
+
+
+def synthetic_ingredients(real: list[dict], products: dict) -> list[dict]:
+    """The real ingredient registry plus one food per product variant."""
+    by_product = {food["product"]: food for food in real if food.get("product")}
+    foods = list(real)
+    next_id = max(food["id"] for food in real) + 1
+    for key in products:
+        base = by_product.get(key.rsplit(" ", 1)[0])
+        if key in by_product or base is None:
+            continue
+        foods.append({"id": next_id, "name": key, "category": base["category"], "product": key})
+        next_id += 1
+    return foods
+
+
+def synthetic_plans(
+    days: dict[str, list[dict]],
+    products: list[str],
+    weeks: int,
+    end: date,
+    rng: random.Random,
+) -> list[dict]:
+    """`weeks` consecutive weekly plans ending with the ISO week of `end`."""
+    monday = end - timedelta(days=end.weekday()) - timedelta(weeks=weeks - 1)
+    variants = [name for name in products if name.rsplit(" ", 1)[-1].isdigit()]
+    plans = []
+    for _ in range(weeks):
+        year, week, _weekday = monday.isocalendar()
+        plan_days = []
+        for offset, weekday in enumerate(WEEKDAYS):
+            day = copy.deepcopy(rng.choice(days[weekday]))
+            day["date"] = (monday + timedelta(days=offset)).isoformat()
+            for meal in day["meals"].values():
+                for item in meal.get("items", []):
+                    if variants and rng.random() < RENAME_SHARE:
+                        item["name"] = rng.choice(variants)
+            plan_days.append(day)
+        plans.append(
+            {
+                "year": year,
+                "week": week,
+                "start_date": monday.isoformat(),
+                "end_date": (monday + timedelta(days=6)).isoformat(),
+                "daily_target_kcal": 1800,
+                "days": plan_days,
+            }
+        )
+        monday += timedelta(weeks=1)
+    return plans
+
+
+def weight_history(plans: list[dict], rng: random.Random, start_kg: float = 112.0) -> list[dict]:
+    """One weigh-in per plan week, trending down about 0.5 kg a week."""
+    entries, kg = [], start_kg
+    for plan in plans:
+        kg = max(kg - rng.gauss(0.5, 0.6), 70.0)
+        entries.append({"date": plan["start_date"], "weight_kg": round(kg, 1)})
+    return entries
+
+
+def spending_history(plans: list[dict], rng: random.Random) -> list[dict]:
+    return [
+        {
+            "year": plan["year"],
+            "week": plan["week"],
+            "factor_eur": 62.93,
+            "grocery_eur": round(rng.uniform(30, 60), 2),
+            "source": "estimate",
+        }
+        for plan in plans
+    ]
+
+
+def _csv(header: list[str], rows) -> str:
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+def weight_csv(entries: list[dict]) -> str:
+    """The weight sheet's CSV export for `entries`."""
+    return _csv(["date", "weight_kg"], ((e["date"], e["weight_kg"]) for e in entries))
+
+
+def spending_csv(entries: list[dict]) -> str:
+    """The spending sheet's CSV export for `entries`."""
+    return _csv(
+        ["year", "week", "factor_eur", "grocery_eur"],
+        ((e["year"], e["week"], e["factor_eur"], e["grocery_eur"]) for e in entries),
+    )
+
+
+def stock_csv(names: list[str], rng: random.Random) -> str:
+    """The stock sheet's CSV export with about a third of `names` checked."""
+    return _csv(["ingredient", "stocked"], ((n, rng.choice(["TRUE", "", ""])) for n in names))
+
+
+def _write_json(path: Path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def generate(
+    out: Path,
+    years: int = 3,
+    n_products: int = 2000,
+    seed: int = 7,
+    end: date | None = None,
+) -> dict:
+    """Write a synthetic app tree under `out`; returns the generated data."""
+    rng = random.Random(seed)
+    out = Path(out)
+    data = out / "data"
+    if data.exists():
+        shutil.rmtree(data)
+    data.mkdir(parents=True)
+
+    for name in STATIC_FILES:
+        shutil.copy(ROOT / "data" / name, data / name)
+    shutil.copy(ROOT / "app.py", out / "app.py")
+    (data / "receipts").mkdir()
+    shutil.copy(ROOT / "data" / "receipts" / "cost_calculator.py", data / "receipts")
+
+    real_products = json.loads((ROOT / "data" / "products.json").read_text())
+    products = synthetic_products(real_products, n_products, rng)
+    plans = synthetic_plans(real_days(), list(products), years * 52, end or date.today(), rng)
+    weight = weight_history(plans, rng)
+    spending = spending_history(plans, rng)
+
+    _write_json(data / "products.json", products)
+    real_foods = json.loads((ROOT / "data" / "ingredients.json").read_text())
+    _write_json(data / "ingredients.json", synthetic_ingredients(real_foods, products))
+    _write_json(data / "weight.json", weight)
+    _write_json(data / "spending.json", spending)
+    manifest = []
+    for plan in plans:
+        file = f"{plan['year']}/W{plan['week']:02d}.json"
+        _write_json(data / "plans" / file, plan)
+        manifest.append(
+            {
+                "year": plan["year"],
+                "week": plan["week"],
+                "file": file,
+                "start_date": plan["start_date"],
+                "end_date": plan["end_date"],
+            }
+        )
+    _write_json(data / "plans" / "manifest.json", {"plans": manifest})
+
+    return {
+        "plans": plans,
+        "products": products,
+        "weight": weight,
+        "spending": spending,
+        "weight_csv": weight_csv(weight),
+        "spending_csv": spending_csv(spending),
+        "stock_csv": stock_csv(list(products), rng),
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+        sys.exit(2)
+    out = Path(sys.argv[1])
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    n_products = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    data = generate(out, years, n_products)
+    print(
+        f"{out}: {len(data['plans'])} weekly plans, {len(data['products'])} products, "
+        f"{len(data['weight'])} weigh-ins"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,33 @@
 """
 Calculate weekly grocery cost from meal plan ingredients × products.json prices.
 Only counts what's explicitly in the plan — excludes Factor and free dinners.
+With --sqlite the plan items are read from the SQLite backend (meal_planner.database).
 """
 
 import json
 import re
+import sys
 from pathlib import Path
 
+import numpy as np
+
 DATA = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(DATA.parent))
 
-products = json.loads((DATA / "products.json").read_text())
+from meal_planner import factor_invoices, quantities, receipts  # noqa: E402
+from meal_planner.database import DB_NAME, PlanDatabase  # noqa: E402
+from meal_planner.ingredients import REGISTRY_NAME, IngredientRegistry  # noqa: E402
+from meal_planner.model import Plan  # noqa: E402
+from meal_planner.pantry import Package, PantrySimulator, Week  # noqa: E402
+from meal_planner.plan_store import PlanStore  # noqa: E402
 
-# English → Spanish mapping for W07 (which used English names)
-EN_TO_ES = {
-    "Skyr natural": "Skyr natural",
-    "Skyr": "Skyr",
-    "Oats": "Avena",
-    "Apple": "Manzana",
-    "Whole wheat bread": "Pan integral",
-    "Turkey breast": "Pechuga de pavo",
-    "Light cheese": "Queso light",
-    "Butter": "Mantequilla",
-    "Mustard": "Mostaza",
-    "Protein yogurt": "Yogur proteico",
-    "Banana": "Plátano",
-    "Almonds": "Almendras",
-    "Rice cake": "Tortitas de arroz",
-    "Rice cakes": "Tortitas de arroz",
-    "Peanut butter": "Mantequilla de maní",
-    "Scrambled eggs": "Huevos revueltos",
-    "Whole wheat wrap": "Wrap integral",
-    "Grilled chicken": "Pollo a la plancha",
-    "Feta cheese": "Queso feta",
-    "Walnuts": "Nueces",
-    "Cottage cheese": "Requesón",
-    "Honey": "Miel",
-    "Honey drizzle": "Miel",
-    "Blueberries": "Arándanos",
-    "Dark chocolate": "Chocolate negro",
-    "Mixed berries": "Frutos rojos",
-    "Granola": "Granola",
-    "Granola (measured)": "Granola",
-    "Tuna in water": "Atún en agua",
-    "Light mayo": "Mayonesa light",
-    "Greek yogurt light": "Yogur griego light",
-    "Hummus": "Hummus",
-    "Protein powder": "Proteína en polvo",
-    "Milk (semi-skimmed)": "Leche semidesnatada",
-    "Quinoa (cooked)": "Quinoa cocida",
-    "Olive oil dressing": "Aderezo de aceite de oliva",
-    "Protein bar": "Barra de proteína",
-    "Homemade popcorn": "Palomitas caseras",
-    "Soy sauce": "Salsa de soja",
-    "Sesame seeds": "Semillas de sésamo",
-    "Parmesan": "Parmesano",
-    "Coffee with milk": "Café con leche",
-    "Tea with honey": "Té con miel",
-    "Avocado": "Aguacate",
-    "Carrots": "Zanahorias",
-    "Cherry tomatoes": "Tomates cherry",
-    "Cucumber": "Pepino",
-    "Lettuce": "Lechuga",
-    "Lettuce & tomato": "Lechuga y tomate",
-    "Mixed fruit": "Frutas mixtas",
-    "Mixed greens": "Mix de hojas verdes",
-    "Mixed vegetables": "Verduras mixtas",
-    "Tangerine": "Mandarinas",
-    "Tomato": "Tomate",
-}
+products = json.loads((DATA / "products.json").read_text())
+# Plan names (any language, with or without accents) → food; each food links
+# to its products.json key and carries its category and grams per unit
+registry = IngredientRegistry.load(DATA / REGISTRY_NAME)
 
-# Fresh produce not in products.json — prices from receipt analysis
+# Fresh produce not in products.json — fallback prices from receipt analysis.
+# Package sizes are kept by hand because receipts don't print them.
 FRESH_PRICES = {
     "Manzana": {"price_eur": 2.35, "size_g": 800, "note": "AH Elstar ~4 apples"},
     "Plátano": {"price_eur": 1.45, "size_g": 1000, "note": "AH Bananen ~5 bananas"},
@@ -90,103 +48,72 @@ FRESH_PRICES = {
     "Espinacas": {"price_eur": 1.69, "size_g": 250, "note": "AH spinazie"},
 }
 
-# Items that are essentially free or immeasurable
+# Kassabon product line per fresh ingredient: its latest price in
+# receipts.json overrides the FRESH_PRICES fallback.
+FRESH_RECEIPT_NAMES = {
+    "Manzana": "AH ELSTAR",
+    "Plátano": "AH BANANEN",
+    "Mandarinas": "MANDARIJNEN",
+    "Tomates cherry": "CHERRYTOMAAT",
+    "Pepino": "KOMKOMMER",
+    "Lechuga": "AH KROPSLA",
+    "Zanahorias": "AH WORTELEN",
+    "Verduras mixtas": "SNOEPG WR BL",
+    "Espinacas": "AH SPINAZIE",
+}
+
+# Items that are essentially free or immeasurable (aliases are covered by the registry)
 SKIP_ITEMS = {
     "Café con leche",
     "Té con miel",
     "Té",
-    "Coffee with milk",
-    "Tea with honey",
     "Canela",
-    "Cinnamon",
     "Salsa de yogur",
-    "Yogurt sauce",
     "Free dinner (social/restaurant)",
     "Cena XKE en oficina",
 }
 
-FRACTION_MAP = {"½": 0.5, "¼": 0.25, "¾": 0.75, "⅓": 0.333}
-
-# Grams per single unit for count-based items
-GRAMS_PER_UNIT = {
-    "Huevos revueltos": 60,  # per egg
-    "Plátano": 120,  # 1 medium banana
-    "Manzana": 180,  # 1 medium apple
-    "Mandarinas": 70,  # 1 tangerine
-    "Aguacate": 170,  # 1 avocado
-    "Tomate": 150,  # 1 medium tomato
-    "Yogur proteico": 200,  # 1 pot
-    "Barra de proteína": 55,  # 1 bar
-    "Tortitas de arroz": 9,  # 1 cake
-    "Tortita de arroz": 9,
-    "Pan integral": 50,  # 1 slice
-    "Wrap integral": 62,  # 1 wrap
-    "Atún en agua": 160,  # 1 can
-    "Pechuga de pavo": 21,  # 1 slice deli meat (but usually specified in g)
+_SKIP_IDS = {registry.id_for(name) for name in SKIP_ITEMS}
+
+# Weeks a package stays usable once bought, by grocery category (None: keeps)
+SHELF_LIFE_WEEKS = {
+    "verduras": 1,
+    "frutas": 1,
+    "carnes_proteinas": 1,
+    "panaderia": 1,
+    "lacteos": 2,
+    "frutos_secos": None,
+    "despensa": None,
+    "suplementos": None,
 }
+SHELF_LIFE_OVERRIDES = {
+    "Atún en agua": None,  # canned
+    "Huevos revueltos": 3,
+    "Queso light": 3,
+    "Parmesano": 6,
+    "Tortitas de arroz": None,
+    "Pasta integral": None,
+    "Quinoa cocida": 4,  # pouch
+    "Arroz integral cocido": 4,  # pouch
+    "Manzana": 3,
+    "Mandarinas": 2,
+    "Zanahorias": 2,
+}
+
+PANTRY_CHECKPOINTS = DATA / "receipts" / ".pantry-checkpoints.json"
 
 
 def parse_qty(qty_str: str) -> tuple[float, str]:
     """Parse quantity string → (amount, unit).
-    unit is 'g', 'ml', or 'count'.
+    unit is 'g', 'ml', 'count' or 'unknown'; spoons and "(120g)" become grams.
     """
-    q = qty_str.strip()
-
-    # "250g", "40g", "70g seca", "30g granos"
-    m = re.match(r"([\d.]+)\s*g\b", q)
-    if m:
-        return float(m.group(1)), "g"
-
-    # "150ml"
-    m = re.match(r"([\d.]+)\s*ml", q)
-    if m:
-        return float(m.group(1)), "ml"
-
-    # "1 can (120g)", "1 lata (120g)"
-    m = re.search(r"\((\d+)g\)", q)
-    if m:
-        return float(m.group(1)), "g"
-
-    # Spoon measures → grams
-    for frac, val in FRACTION_MAP.items():
-        if frac in q:
-            if "cdta" in q or "tsp" in q:
-                return val * 5, "g"
-            if "cda" in q or "tbsp" in q:
-                return val * 15, "g"
-            # fraction of a unit (e.g., "½ mediano", "¼ mediano")
-            return val, "count"
-
-    m = re.match(r"([\d.]+)\s*cdtas?", q)
-    if m:
-        return float(m.group(1)) * 5, "g"
-    m = re.match(r"([\d.]+)\s*cdas?", q)
-    if m:
-        return float(m.group(1)) * 15, "g"
-    m = re.match(r"([\d.]+)\s*tsp", q)
-    if m:
-        return float(m.group(1)) * 5, "g"
-    m = re.match(r"([\d.]+)\s*tbsp", q)
-    if m:
-        return float(m.group(1)) * 15, "g"
-
-    # Count-based: "2 rebanadas", "1 grande", "2 grandes", "1 mediano", etc.
-    m = re.match(
-        r"([\d.]+)\s*(rebanadas?|grandes?|medianos?|medianas?|medium|large|pot|vasitos?|cups?|tazas?|latas?|unidad|slices?)",
-        q,
-    )
-    if m:
-        return float(m.group(1)), "count"
-
-    # Bare number
-    m = re.match(r"^([\d.]+)$", q)
-    if m:
-        return float(m.group(1)), "count"
-
-    # "pinch"
-    if "pinch" in q or "pizca" in q:
-        return 0.5, "g"
-
+    q = quantities.parse(qty_str)
+    if q.unit in ("g", "ml"):
+        return q.amount, q.unit
+    if q.grams is not None:
+        return q.grams, "g"
+    if q.unit == "count":
+        return q.amount, "count"
     return 0, "unknown"
 
 
@@ -212,143 +139,265 @@ def parse_pkg_size(size_str: str) -> tuple[float, str]:
     return 0, "unknown"
 
 
-def compute_weekly_cost(plan_file: Path) -> dict:
-    """Compute grocery cost from a plan file."""
-    plan = json.loads(plan_file.read_text())
-    week = plan["week"]
-    year = plan["year"]
+def build_usage(plans: list[Plan]) -> dict:
+    """Walk every plan once and build ingredient × week usage matrices.
 
-    # Collect (ingredient_es, amount_g) for each usage
-    # We normalize everything to grams for comparison with product packages.
-    # For stuks-based products (eggs), we keep count separately.
-    ingredient_totals = {}  # name → {"grams": float, "count": float}
-
-    for day in plan["days"]:
-        for _slot, meal in day["meals"].items():
-            source = meal.get("source", "")
-            if source in ("factor", "free"):
-                continue
+    Returns {"ingredients", "weeks", "grams", "count", "present"}; the three
+    matrices have shape (len(ingredients), len(weeks)).
+    """
+    weeks = [(plan.year, plan.week) for plan in plans]
+    items = (
+        (col, item.name, item.quantity or "")
+        for col, plan in enumerate(plans)
+        for day in plan.days
+        for meal in day.meals
+        if meal.source not in ("factor", "free")
+        for item in meal.items
+    )
+    return _usage_matrices(weeks, items)
 
-            for item in meal["items"]:
-                name = item["name"]
-                qty = item["quantity"]
 
-                if name in SKIP_ITEMS:
-                    continue
+def build_usage_sql(db: PlanDatabase) -> dict:
+    """build_usage() over the SQLite backend, which filters and orders the items."""
+    weeks = [(e["year"], e["week"]) for e in db.entries()]
+    col = {week: i for i, week in enumerate(weeks)}
+    items = ((col[(y, w)], name, qty) for y, w, name, qty in db.grocery_items())
+    return _usage_matrices(weeks, items)
 
-                es_name = EN_TO_ES.get(name, name)
 
-                amount, unit = parse_qty(qty)
+def _usage_matrices(weeks: list[tuple[int, int]], items) -> dict:
+    """Usage matrices from (week column, ingredient name, quantity) rows, one row per food."""
+    row: dict[int, int] = {}  # food id → matrix row
+    cells: list[tuple[int, int, float, float]] = []  # (row, col, grams, count)
 
-                if es_name not in ingredient_totals:
-                    ingredient_totals[es_name] = {"grams": 0, "count": 0}
+    for col, name, quantity in items:
+        food_id = registry.id_for(name)
+        if food_id in _SKIP_IDS:
+            continue
+        amount, unit = parse_qty(quantity)
+        i = row.setdefault(food_id, len(row))
+        if unit in ("g", "ml"):
+            cells.append((i, col, amount, 0.0))
+        elif unit == "count":
+            cells.append((i, col, 0.0, amount))
+        else:
+            cells.append((i, col, 0.0, 0.0))
+
+    shape = (len(row), len(weeks))
+    grams = np.zeros(shape)
+    count = np.zeros(shape)
+    present = np.zeros(shape, dtype=bool)
+    if cells:
+        r, c, g, n = (np.array(v) for v in zip(*cells, strict=True))
+        r, c = r.astype(np.intp), c.astype(np.intp)
+        np.add.at(grams, (r, c), g)
+        np.add.at(count, (r, c), n)
+        present[r, c] = True
 
-                if unit in ("g", "ml"):
-                    ingredient_totals[es_name]["grams"] += amount
-                elif unit == "count":
-                    ingredient_totals[es_name]["count"] += amount
+    return {
+        "ingredients": [registry[food_id].name for food_id in row],
+        "weeks": weeks,
+        "grams": grams,
+        "count": count,
+        "present": present,
+    }
 
-    # Calculate costs
-    results = []
-    total_cost = 0
-    unpriced = []
 
-    for ingredient, usage in sorted(ingredient_totals.items()):
-        total_g = usage["grams"]
-        total_count = usage["count"]
+def price_table(ingredients: list[str], receipt_prices: dict | None = None) -> dict:
+    """Package price/size per ingredient, as arrays aligned with `ingredients`.
 
-        # Find product info
-        product = products.get(ingredient)
+    Fresh produce uses the latest receipt price when there is one
+    (`receipt_prices` defaults to the compiled receipts.json index).
+    """
+    if receipt_prices is None:
+        receipt_prices = receipts.load_store(DATA / "receipts")["prices"]
+    n = len(ingredients)
+    table = {
+        "priced": np.zeros(n, dtype=bool),
+        "stuks": np.zeros(n, dtype=bool),
+        "price_eur": np.zeros(n),
+        "pkg_size": np.zeros(n),
+        "grams_per_unit": np.zeros(n),
+        "product": [""] * n,
+        "package": [""] * n,
+    }
+    for i, ingredient in enumerate(ingredients):
+        food = registry.lookup(ingredient)
+        table["grams_per_unit"][i] = food.grams_per_unit or 0
+        product = products.get(food.product)
         fresh = FRESH_PRICES.get(ingredient)
-
-        price_source = None
-        price_eur = 0
-        pkg_size = 0
-        pkg_unit = ""
-        product_name = ""
-
         if product:
-            price_eur = product["price_eur"]
             pkg_size, pkg_unit = parse_pkg_size(product["size"])
-            product_name = product["ah_product"]
-            price_source = "products.json"
+            table["price_eur"][i] = product["price_eur"]
+            table["product"][i] = product["ah_product"]
+            table["package"][i] = product["size"]
         elif fresh:
-            price_eur = fresh["price_eur"]
-            pkg_size = fresh["size_g"]
-            pkg_unit = "g"
-            product_name = f"[Fresh] {fresh['note']}"
-            price_source = "receipt estimate"
-
-        if not price_source:
-            if total_g > 0 or total_count > 0:
-                unpriced.append({"ingredient": ingredient, "grams": total_g, "count": total_count})
+            pkg_size, pkg_unit = fresh["size_g"], "g"
+            seen = receipt_prices.get(FRESH_RECEIPT_NAMES.get(ingredient, ""))
+            table["price_eur"][i] = seen["unit_price"] if seen else fresh["price_eur"]
+            table["product"][i] = f"[{'Receipt' if seen else 'Fresh'}] {fresh['note']}"
+            table["package"][i] = f"{pkg_size:.0f}g"
+        else:
             continue
-
-        # Convert everything to comparable units
+        table["priced"][i] = True
+        table["pkg_size"][i] = pkg_size
         if pkg_unit == "stuks":
-            # Package is count-based (eggs). Compare count to count.
-            # If we have grams from the plan, convert to count using GRAMS_PER_UNIT
-            effective_count = total_count
-            if total_g > 0 and ingredient in GRAMS_PER_UNIT:
-                effective_count += total_g / GRAMS_PER_UNIT[ingredient]
-            elif total_g > 0:
-                effective_count += total_g  # fallback: assume g = count (shouldn't happen)
-
-            packages = effective_count / pkg_size if pkg_size else 0
-            usage_str = f"{effective_count:.0f} units"
-            pkg_str = f"{pkg_size:.0f} stuks"
-        else:
-            # Package is gram/ml-based. Convert count to grams if needed.
-            effective_g = total_g
-            if total_count > 0:
-                grams_per = GRAMS_PER_UNIT.get(ingredient, 0)
-                if grams_per:
-                    effective_g += total_count * grams_per
-                else:
-                    # For items without GRAMS_PER_UNIT, assume 1 count = 1 package
-                    # (e.g., "1 pot" of yogurt, "1 bar" of protein)
-                    effective_g += total_count * pkg_size
-
-            packages = effective_g / pkg_size if pkg_size else 0
-            usage_str = f"{effective_g:.0f}g"
-            pkg_str = product["size"] if product else f"{pkg_size:.0f}g"
-
-        cost = packages * price_eur
-        total_cost += cost
+            table["stuks"][i] = True
+            table["package"][i] = f"{pkg_size:.0f} stuks"
+    return table
+
+
+def compute_costs(
+    plans: list[Plan] | None, receipt_prices: dict | None = None, usage: dict | None = None
+) -> dict:
+    """Cost every week of every plan in one vectorized pass.
+
+    Usage is normalized to the package unit: count for "stuks" packages
+    (eggs), grams otherwise. Counts for foods without a grams_per_unit in
+    data/ingredients.json are assumed to be one package each (e.g. "1 pot" of
+    yogurt); grams in a stuks package without a unit weight are taken as a
+    count. A precomputed `usage` (e.g. from build_usage_sql) replaces walking
+    `plans`.
+    """
+    usage = usage or build_usage(plans)
+    prices = price_table(usage["ingredients"], receipt_prices)
+    grams, count = usage["grams"], usage["count"]
+    gpu = prices["grams_per_unit"][:, None]
+    pkg = prices["pkg_size"][:, None]
+
+    as_count = count + np.divide(grams, gpu, out=grams.copy(), where=gpu > 0)
+    as_grams = grams + count * np.where(gpu > 0, gpu, pkg)
+    effective = np.where(prices["stuks"][:, None], as_count, as_grams)
+    packages = np.divide(effective, pkg, out=np.zeros_like(effective), where=pkg > 0)
+    cost = packages * prices["price_eur"][:, None]
+    cost[~prices["priced"]] = 0.0
+
+    present = usage["present"]
+    return {
+        **usage,
+        **prices,
+        "effective": effective,
+        "packages": packages,
+        "cost": cost,
+        "total_eur": cost.sum(axis=0),
+        # Share of (ingredient, week) uses that no product or fresh price covers
+        "unpriced_rate": float(present[~prices["priced"]].sum() / max(present.sum(), 1)),
+    }
+
+
+def weekly_report(costs: dict, col: int) -> dict:
+    """Per-week view of a compute_costs() result."""
+    results = []
+    unpriced = []
+    for i in np.flatnonzero(costs["present"][:, col]):
+        ingredient = costs["ingredients"][i]
+        if not costs["priced"][i]:
+            grams, count = float(costs["grams"][i, col]), float(costs["count"][i, col])
+            if grams > 0 or count > 0:
+                unpriced.append({"ingredient": ingredient, "grams": grams, "count": count})
+            continue
+        effective = costs["effective"][i, col]
         results.append(
             {
                 "ingredient": ingredient,
-                "weekly_usage": usage_str,
-                "product": product_name,
-                "package": pkg_str,
-                "price_eur": price_eur,
-                "packages": round(packages, 2),
-                "cost_eur": round(cost, 2),
+                "weekly_usage": f"{effective:.0f} units"
+                if costs["stuks"][i]
+                else f"{effective:.0f}g",
+                "product": costs["product"][i],
+                "package": costs["package"][i],
+                "price_eur": float(costs["price_eur"][i]),
+                "packages": round(float(costs["packages"][i, col]), 2),
+                "cost_eur": round(float(costs["cost"][i, col]), 2),
             }
         )
 
+    year, week = costs["weeks"][col]
     return {
         "year": year,
         "week": week,
-        "items": results,
-        "total_grocery_eur": round(total_cost, 2),
-        "unpriced": unpriced,
+        "items": sorted(results, key=lambda x: x["ingredient"]),
+        "total_grocery_eur": round(float(costs["total_eur"][col]), 2),
+        "unpriced": sorted(unpriced, key=lambda x: x["ingredient"]),
     }
 
 
+def shelf_life_weeks(ingredient: str) -> int | None:
+    if ingredient in SHELF_LIFE_OVERRIDES:
+        return SHELF_LIFE_OVERRIDES[ingredient]
+    return SHELF_LIFE_WEEKS.get(registry.lookup(ingredient).category or "", 1)
+
+
+def purchase_weeks(costs: dict) -> list[Week]:
+    """compute_costs() usage as pantry-simulator weeks, keyed by AH product.
+
+    Ingredients bought as the same product (Aceite de oliva / Aderezo de aceite
+    de oliva) share stock.
+    """
+    weeks = []
+    for col, key in enumerate(costs["weeks"]):
+        demand: dict[str, float] = {}
+        packages: dict[str, Package] = {}
+        for i in np.flatnonzero(costs["present"][:, col] & costs["priced"]):
+            amount = float(costs["effective"][i, col])
+            if amount <= 0 or costs["pkg_size"][i] <= 0:
+                continue
+            product = costs["product"][i]
+            demand[product] = demand.get(product, 0.0) + amount
+            packages.setdefault(
+                product,
+                Package(
+                    float(costs["pkg_size"][i]),
+                    float(costs["price_eur"][i]),
+                    shelf_life_weeks(costs["ingredients"][i]),
+                ),
+            )
+        weeks.append(Week(key, demand, packages))
+    return weeks
+
+
+def simulate_purchases(costs: dict, checkpoints: Path | None = PANTRY_CHECKPOINTS) -> list[dict]:
+    """Whole-package spend and waste per week, resuming from saved checkpoints."""
+    sim = PantrySimulator.load(checkpoints) if checkpoints else PantrySimulator()
+    reports = sim.run(purchase_weeks(costs))
+    if checkpoints and sim.simulated:
+        sim.save(checkpoints)
+    return reports
+
+
+def compute_weekly_cost(plan: Plan) -> dict:
+    """Compute grocery cost from a single weekly plan."""
+    return weekly_report(compute_costs([plan]), 0)
+
+
+def load_plans() -> list[Plan]:
+    """All non-draft weekly plans from the compiled plan store, oldest first."""
+    store = PlanStore(DATA / "plans")
+    store.refresh()
+    return [store.model(e["year"], e["week"]) for e in store.entries()]
+
+
 def main():
-    plans_dir = DATA / "plans" / "2026"
+    store = receipts.ingest_directory(DATA / "receipts")
+    if "--sqlite" in sys.argv[1:]:
+        db = PlanDatabase(DATA / DB_NAME, DATA)
+        db.refresh()
+        costs = compute_costs(None, store["prices"], usage=build_usage_sql(db))
+    else:
+        costs = compute_costs(load_plans(), store["prices"])
+    reports = [weekly_report(costs, col) for col in range(len(costs["weeks"]))]
+
+    # Factor per week from the invoices; weeks not invoiced yet use the latest box
+    invoices = factor_invoices.ingest_directory(DATA / "receipts" / "Factor")
+    factor_weeks = factor_invoices.weekly_factor(invoices)
+    latest = factor_invoices.latest_invoice(invoices) or {"total_eur": 0.0, "meals": 0}
+    default_factor = {"factor_eur": latest["total_eur"], "meals": latest["meals"]}
 
     print("=" * 70)
     print("WEEKLY GROCERY COST FROM MEAL PLANS")
     print("(Only ingredients explicitly in the plan, excludes Factor/free)")
     print("=" * 70)
 
-    for plan_file in sorted(plans_dir.glob("W*.json")):
-        if "draft" in plan_file.name:
-            continue
-
-        result = compute_weekly_cost(plan_file)
+    for result in reports:
         w = f"W{result['week']:02d}"
         print(f"\n### {w} (Year {result['year']})")
         print(
@@ -370,10 +419,13 @@ def main():
             f"{'TOTAL GROCERY':<28} {'':12} {'':32} {'':14} "
             f"{'':>6} {'':>5} {result['total_grocery_eur']:>7.2f}"
         )
-        print(f"{'+ Factor (4 meals)':<28} {'':12} {'':32} {'':14} {'':>6} {'':>5} {'62.93':>7}")
+        factor = factor_weeks.get((result["year"], result["week"]), default_factor)
+        result["factor_eur"] = factor["factor_eur"]
+        label = f"+ Factor ({factor['meals']} meals)"
+        print(f"{label:<28} {'':12} {'':32} {'':14} {'':>6} {'':>5} {factor['factor_eur']:>7.2f}")
         print(
             f"{'= TOTAL DIET COST':<28} {'':12} {'':32} {'':14} "
-            f"{'':>6} {'':>5} {result['total_grocery_eur'] + 62.93:>7.2f}"
+            f"{'':>6} {'':>5} {result['total_grocery_eur'] + factor['factor_eur']:>7.2f}"
         )
 
         if result["unpriced"]:
@@ -381,24 +433,46 @@ def main():
             for item in result["unpriced"]:
                 print(f"  - {item['ingredient']}: {item['grams']:.0f}g + {item['count']:.0f} count")
 
+    unpriced = [
+        name for name, ok in zip(costs["ingredients"], costs["priced"], strict=True) if not ok
+    ]
+    print(
+        f"\nUnpriced rate across all plans: {costs['unpriced_rate']:.1%} of ingredient-weeks "
+        f"({len(unpriced)} of {len(costs['ingredients'])} ingredients)"
+    )
+
+    # Whole packages with leftovers carried over, vs. the fractional estimate
+    purchases = simulate_purchases(costs)
+    print("\n\n" + "=" * 70)
+    print("WHOLE-PACKAGE PURCHASES (pantry carried across weeks)")
+    print("=" * 70)
+    print(f"{'Week':<10} {'Fractional':>10} {'Bought':>8} {'Wasted':>8}  Packages")
+    for result, week in zip(reports, purchases, strict=True):
+        n_packages = sum(week["bought"].values())
+        print(
+            f"W{week['week']:02d}/{week['year']:<6} {result['total_grocery_eur']:>10.2f} "
+            f"{week['spend_eur']:>8.2f} {week['waste_eur']:>8.2f}  {n_packages}"
+        )
+    print(
+        f"{'Total':<10} {sum(r['total_grocery_eur'] for r in reports):>10.2f} "
+        f"{sum(w['spend_eur'] for w in purchases):>8.2f} "
+        f"{sum(w['waste_eur'] for w in purchases):>8.2f}"
+    )
+
     # JSON output for spending.json
     print("\n\n" + "=" * 70)
     print("SPENDING.JSON DATA (plan-based grocery costs)")
     print("=" * 70)
 
-    spending = []
-    for plan_file in sorted(plans_dir.glob("W*.json")):
-        if "draft" in plan_file.name:
-            continue
-        result = compute_weekly_cost(plan_file)
-        spending.append(
-            {
-                "year": result["year"],
-                "week": result["week"],
-                "factor_eur": 62.93,
-                "grocery_eur": result["total_grocery_eur"],
-            }
-        )
+    spending = [
+        {
+            "year": result["year"],
+            "week": result["week"],
+            "factor_eur": result["factor_eur"],
+            "grocery_eur": result["total_grocery_eur"],
+        }
+        for result in reports
+    ]
     print(json.dumps(spending, indent=2))
 
 
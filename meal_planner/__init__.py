@@ -0,0 +1 @@
+"""Shared data-layer helpers for the Meal Planner app and its CLI scripts."""
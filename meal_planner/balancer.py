@@ -0,0 +1,189 @@
+"""Daily calorie balancer: fill breakfast, lunch and snacks around dinner.
+
+profile.json's rule is to adjust breakfast/snacks to the dinner so each day
+lands in ``target_range_kcal``. This is a multiple-choice knapsack — exactly
+one option per open slot, total within a range — solved with a reachability
+DP whose rows are Python ints used as bitsets (bit ``k`` set ⇔ ``k`` kcal is
+reachable), so adding a slot is one shift-and-or per option. A day is then
+read back from the rows, preferring options not used yet that week.
+
+The option library is mined from past plans (``mine_library``). Run with
+``uv run python -m meal_planner.balancer data/plans/2026/W10.json``.
+"""
+
+import copy
+import json
+import sys
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+from meal_planner.plan_store import PlanStore
+from meal_planner.resolver import normalize
+
+FILL_SLOTS = ("breakfast", "lunch", "snack1", "snack2")
+
+
+class MealOption(NamedTuple):
+    slot: str
+    name: str
+    kcal: int
+    portable: bool
+    meal: dict  # template copied into the plan (items, total_kcal, ...)
+
+
+def mine_library(plans: Iterable[dict], slots: Iterable[str] = FILL_SLOTS) -> dict:
+    """slot → distinct options seen in past plans (by name and kcal).
+
+    Skipped meals (0 kcal, e.g. fasting) are not options; an option is
+    portable if any occurrence was marked portable.
+    """
+    slots = tuple(slots)
+    found: dict[str, dict[tuple[str, int], MealOption]] = {slot: {} for slot in slots}
+    for plan in plans:
+        for day in plan["days"]:
+            for slot in slots:
+                meal = day["meals"].get(slot)
+                kcal = int((meal or {}).get("total_kcal") or 0)
+                if kcal <= 0 or not meal.get("items"):
+                    continue
+                key = (normalize(meal.get("name", "")), kcal)
+                seen = found[slot].get(key)
+                portable = bool(meal.get("portable")) or bool(seen and seen.portable)
+                if seen is None:
+                    template = {k: v for k, v in meal.items() if k not in ("time", "portable")}
+                    found[slot][key] = MealOption(
+                        slot, meal.get("name", ""), kcal, portable, template
+                    )
+                elif portable != seen.portable:
+                    found[slot][key] = seen._replace(portable=portable)
+    return {
+        slot: sorted(opts.values(), key=lambda o: (o.kcal, o.name)) for slot, opts in found.items()
+    }
+
+
+def _reachable(options: list[list[MealOption]], limit: int) -> list[int]:
+    """rows[k] = bitset of the kcal sums reachable using the first k slots."""
+    mask = (1 << (limit + 1)) - 1
+    rows = [1]
+    for slot_options in options:
+        row = 0
+        prev = rows[-1]
+        for option in slot_options:
+            row |= prev << option.kcal
+        rows.append(row & mask)
+    return rows
+
+
+def solve_day(
+    budget: tuple[int, int],
+    options: dict[str, list[MealOption]],
+    target: int | None = None,
+    avoid: Iterable[str] = (),
+) -> dict[str, MealOption] | None:
+    """Pick one option per slot so the kcal sum lies in `budget` (inclusive).
+
+    `budget` is what is left for these slots once the fixed meals (dinner)
+    are counted. The sum closest to `target` is chosen; among options that
+    keep it reachable, names in `avoid` are used last. Returns None when no
+    combination fits.
+    """
+    lo, hi = max(budget[0], 0), budget[1]
+    if hi < 0:
+        return None
+    slots = list(options)
+    per_slot = [options[slot] for slot in slots]
+    if any(not opts for opts in per_slot):
+        return None
+    rows = _reachable(per_slot, hi)
+
+    final = rows[-1] >> lo
+    if not final:
+        return None
+    goal = hi if target is None else min(max(target, lo), hi)
+    total = min(
+        (lo + k for k in range(hi - lo + 1) if final >> k & 1),
+        key=lambda s: (abs(s - goal), -s),
+    )
+
+    avoid = set(avoid)
+    picked: dict[str, MealOption] = {}
+    for k in range(len(slots) - 1, -1, -1):
+        prev = rows[k]
+        feasible = [o for o in per_slot[k] if o.kcal <= total and prev >> (total - o.kcal) & 1]
+        choice = min(feasible, key=lambda o: (o.name in avoid, o.kcal, o.name))
+        picked[slots[k]] = choice
+        total -= choice.kcal
+    return {slot: picked[slot] for slot in slots}
+
+
+def balance_week(
+    plan: dict,
+    library: dict[str, list[MealOption]],
+    profile: dict,
+    portable_days: Iterable[str] = ("Friday",),
+) -> tuple[dict, list[str]]:
+    """A copy of `plan` with the open slots of every day re-filled.
+
+    Dinner and any slot already at 0 kcal (fasting, skipped) stay fixed.
+    Lunch is always portable when the profile says so; snacks too on
+    `portable_days`. Returns (plan, dates that could not be balanced) —
+    those days keep their original meals.
+    """
+    lo, hi = profile.get("target_range_kcal", [1730, 1800])
+    target = profile.get("daily_target_kcal", hi)
+    rules = profile.get("rules", {})
+    times = {slot["id"]: slot["time"] for slot in profile.get("meal_slots", [])}
+    portable_days = set(portable_days)
+
+    plan = copy.deepcopy(plan)
+    used: set[str] = set()
+    unsolved = []
+    for day in plan["days"]:
+        meals = day["meals"]
+        open_slots = [s for s in library if s in meals and (meals[s].get("total_kcal") or 0) > 0]
+        fixed = sum(m.get("total_kcal") or 0 for s, m in meals.items() if s not in open_slots)
+
+        options = {}
+        for slot in open_slots:
+            must_carry = (slot == "lunch" and rules.get("lunch_portable")) or (
+                slot.startswith("snack")
+                and day.get("weekday") in portable_days
+                and rules.get("friday_snacks_portable")
+            )
+            options[slot] = [o for o in library[slot] if o.portable or not must_carry]
+
+        picked = solve_day((lo - fixed, hi - fixed), options, target - fixed, used)
+        if picked is None:
+            unsolved.append(day.get("date", ""))
+            continue
+        for slot, option in picked.items():
+            meal = copy.deepcopy(option.meal)
+            meal = {"time": times.get(slot, meals[slot].get("time")), **meal}
+            if option.portable:
+                meal["portable"] = True
+            meals[slot] = meal
+            used.add(option.name)
+        day["total_kcal"] = fixed + sum(o.kcal for o in picked.values())
+    return plan, unsolved
+
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data/plans/2026/W10.json")
+    root = Path("data")
+    store = PlanStore(root / "plans")
+    store.refresh()
+    library = mine_library(store.get(e["year"], e["week"]) for e in store.entries())
+    profile = json.loads((root / "profile.json").read_text())
+
+    plan, unsolved = balance_week(json.loads(path.read_text()), library, profile)
+    for day in plan["days"]:
+        meals = day["meals"]
+        parts = "  ".join(f"{s}={meals[s].get('total_kcal', 0)}" for s in meals)
+        print(f"{day['date']} {day['weekday']:<9} {day['total_kcal']:>5} kcal  {parts}")
+    if unsolved:
+        print(f"No combination in range for: {', '.join(unsolved)}")
+
+
+if __name__ == "__main__":
+    main()
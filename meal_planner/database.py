@@ -0,0 +1,578 @@
+"""Optional SQLite backend: the ``data/`` tree in normalized, indexed tables.
+
+Plans are split into ``weeks`` → ``days`` → ``meals`` → ``items``; weights,
+spending and products get a table each. Indexes cover ``(year, week)`` and
+each row's parent. The JSON files stay the source of truth: ``refresh()``
+re-imports only the plan files whose mtime/size changed and reloads the
+small files when their signature changes. Plan files the plan store would
+skip (drafts, unreadable or invalid JSON, a second file for a week) are
+logged and kept in ``skipped`` until they change. Spending is stored with
+Factor invoices already applied.
+
+``PlanDatabase`` answers the same ``entries``/``get``/``digest``/``skipped``/
+``refresh`` calls as ``PlanStore``, so the app can use either; budget totals,
+weight stats and the cost calculator's grocery rows are computed in SQL. Keys
+a table has no column for are kept in an ``extra`` JSON column, so plans come
+back out as they went in.
+
+Build or update the database with ``uv run python -m meal_planner.database``.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+from meal_planner import factor_invoices
+from meal_planner.model import Plan
+from meal_planner.plan_store import _DRAFT, _is_draft, _plan_problem
+
+log = logging.getLogger(__name__)
+
+DB_NAME = "meal-planner.db"
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weeks (
+    id INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    start_date TEXT,
+    end_date TEXT,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    extra TEXT NOT NULL,
+    UNIQUE (year, week)
+);
+CREATE TABLE IF NOT EXISTS days (
+    id INTEGER PRIMARY KEY,
+    week_id INTEGER NOT NULL REFERENCES weeks (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    date TEXT,
+    weekday TEXT,
+    total_kcal REAL,
+    extra TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meals (
+    id INTEGER PRIMARY KEY,
+    day_id INTEGER NOT NULL REFERENCES days (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    slot TEXT NOT NULL,
+    name TEXT,
+    source TEXT,
+    total_kcal REAL,
+    extra TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    meal_id INTEGER NOT NULL REFERENCES meals (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    quantity TEXT,
+    kcal REAL,
+    extra TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS weights (
+    date TEXT PRIMARY KEY,
+    weight_kg REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS spending (
+    year INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    factor_eur REAL,
+    grocery_eur REAL,
+    extra TEXT NOT NULL,
+    PRIMARY KEY (year, week)
+);
+CREATE TABLE IF NOT EXISTS products (
+    name TEXT PRIMARY KEY,
+    size TEXT,
+    price_eur REAL,
+    extra TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    name TEXT PRIMARY KEY,
+    signature TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS skipped (
+    file TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    reason TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS days_week ON days (week_id, position);
+CREATE INDEX IF NOT EXISTS meals_day ON meals (day_id, position);
+CREATE INDEX IF NOT EXISTS items_meal ON items (meal_id, position);
+"""
+
+_DAY_COLUMNS = ("date", "weekday", "total_kcal")
+_MEAL_COLUMNS = ("name", "source", "total_kcal")
+_ITEM_COLUMNS = ("name", "quantity", "kcal")
+# Dinners that aren't bought at the supermarket
+_NOT_GROCERY = ("factor", "free")
+
+
+def _objects(value) -> list[dict]:
+    """The dict entries of a JSON list; anything else counts as empty, as in the model."""
+    return [v for v in value if isinstance(v, dict)] if isinstance(value, list) else []
+
+
+def _extra(obj: dict, skip) -> str:
+    return json.dumps({k: v for k, v in obj.items() if k not in skip}, ensure_ascii=False)
+
+
+def _restore(row: sqlite3.Row, columns, extra: str) -> dict:
+    """Columns that were present plus the extra keys, with kcal back to int when whole."""
+    out = {}
+    for column in columns:
+        value = row[column]
+        if value is None:
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        out[column] = value
+    out.update(json.loads(extra))
+    return out
+
+
+def _signature(path: Path) -> str:
+    try:
+        st = path.stat()
+    except OSError:
+        return "missing"
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+class PlanDatabase:
+    """SQLite mirror of the data directory with plan-store-compatible reads."""
+
+    def __init__(self, db_path: Path, data_dir: Path):
+        self.db_path = Path(db_path)
+        self.data_dir = Path(data_dir)
+        self.plans_dir = self.data_dir / "plans"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._reset()
+        self._parsed: dict[tuple[int, int], tuple[str, dict]] = {}
+        self._models: dict[tuple[int, int], tuple[str, Plan]] = {}
+
+    def _reset(self):
+        with self._conn:
+            tables = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' "
+                    "AND name NOT LIKE 'sqlite_%'"
+                )
+            ]
+            for table in tables:
+                self._conn.execute(f"DROP TABLE {table}")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self._conn.close()
+
+    # -- import ---------------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """Re-import whatever changed on disk. Returns True if anything did."""
+        with self._lock, self._conn:
+            changed = self._import_plans()
+            changed |= self._import_file("weight.json", self._import_weights)
+            changed |= self._import_file("products.json", self._import_products)
+            invoices = self.data_dir / "receipts" / "Factor" / factor_invoices.STORE_NAME
+            spending_sig = f"{_signature(self.data_dir / 'spending.json')}|{_signature(invoices)}"
+            changed |= self._import_file("spending.json", self._import_spending, spending_sig)
+            return changed
+
+    def _import_file(self, name: str, load, signature: str | None = None) -> bool:
+        path = self.data_dir / name
+        signature = signature or _signature(path)
+        row = self._conn.execute("SELECT signature FROM sources WHERE name = ?", (name,)).fetchone()
+        if row and row[0] == signature:
+            return False
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            data = None
+        load(data)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sources (name, signature) VALUES (?, ?)", (name, signature)
+        )
+        return True
+
+    def _import_plans(self) -> bool:
+        sources = {}
+        for path in sorted(self.plans_dir.rglob("W*.json")):
+            if not _is_draft(path):
+                st = path.stat()
+                sources[path.relative_to(self.plans_dir).as_posix()] = (st.st_mtime_ns, st.st_size)
+        stored = {
+            row["file"]: row
+            for row in self._conn.execute("SELECT id, year, week, file, mtime_ns, size FROM weeks")
+        }
+        skipped = {
+            row["file"]: (row["mtime_ns"], row["size"])
+            for row in self._conn.execute("SELECT file, mtime_ns, size FROM skipped")
+        }
+
+        changed = False
+        for file, row in stored.items():
+            if file not in sources:
+                self._conn.execute("DELETE FROM weeks WHERE id = ?", (row["id"],))
+                changed = True
+        todo = [
+            file
+            for file, sig in sources.items()
+            if skipped.get(file) != sig
+            and (file not in stored or (stored[file]["mtime_ns"], stored[file]["size"]) != sig)
+        ]
+        if changed or todo or skipped.keys() - sources.keys():
+            # Skipped files are re-checked whenever anything changed: a duplicate
+            # week may have become the only one
+            todo = [file for file in sources if file in todo or file in skipped]
+            self._conn.execute("DELETE FROM skipped")
+            changed = True
+        owners = {
+            (row["year"], row["week"]): row["file"]
+            for row in self._conn.execute("SELECT year, week, file FROM weeks")
+        }
+
+        for file in todo:
+            mtime_ns, size = sources[file]
+            old = stored.get(file)
+            if old:  # changed on disk: the stored version goes either way
+                self._conn.execute("DELETE FROM weeks WHERE id = ?", (old["id"],))
+                owners.pop((old["year"], old["week"]), None)
+            try:
+                raw = (self.plans_dir / file).read_bytes()
+                plan = json.loads(raw)
+            except (OSError, ValueError) as exc:
+                self._skip(file, mtime_ns, size, f"unreadable: {exc}")
+                continue
+            problem = _plan_problem(plan)
+            if _is_draft(Path(file), plan if isinstance(plan, dict) else None):
+                problem = _DRAFT
+            elif problem is None:
+                owner = owners.get((plan["year"], plan["week"]))
+                if owner is not None and owner in sources:
+                    problem = f"same year and week as {owner}"
+            if problem:
+                self._skip(file, mtime_ns, size, problem)
+                continue
+            self._conn.execute(
+                "DELETE FROM weeks WHERE year = ? AND week = ?", (plan["year"], plan["week"])
+            )
+            self._insert_plan(file, mtime_ns, size, hashlib.blake2b(raw, digest_size=16), plan)
+            owners[(plan["year"], plan["week"])] = file
+        return changed
+
+    def _skip(self, file: str, mtime_ns: int, size: int, reason: str):
+        """Remember a plan file that can't be imported, until it changes."""
+        if reason != _DRAFT:
+            log.warning("Plan database: skipping %s: %s", file, reason)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO skipped (file, mtime_ns, size, reason) VALUES (?, ?, ?, ?)",
+            (file, mtime_ns, size, reason),
+        )
+
+    def _insert_plan(self, file: str, mtime_ns: int, size: int, digest, plan: dict):
+        cur = self._conn.execute(
+            "INSERT INTO weeks (year, week, file, start_date, end_date, mtime_ns, size, digest, "
+            "extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                plan["year"],
+                plan["week"],
+                file,
+                plan.get("start_date", ""),
+                plan.get("end_date", ""),
+                mtime_ns,
+                size,
+                digest.hexdigest(),
+                _extra(plan, ("year", "week", "start_date", "end_date", "days")),
+            ),
+        )
+        week_id = cur.lastrowid
+        for d, day in enumerate(_objects(plan.get("days"))):
+            cur = self._conn.execute(
+                "INSERT INTO days (week_id, position, date, weekday, total_kcal, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    week_id,
+                    d,
+                    *(day.get(c) for c in _DAY_COLUMNS),
+                    _extra(day, (*_DAY_COLUMNS, "meals")),
+                ),
+            )
+            day_id = cur.lastrowid
+            meals = day.get("meals")
+            meals = (
+                [(s, m) for s, m in meals.items() if isinstance(m, dict)]
+                if isinstance(meals, dict)
+                else []
+            )
+            for m, (slot, meal) in enumerate(meals):
+                cur = self._conn.execute(
+                    "INSERT INTO meals (day_id, position, slot, name, source, total_kcal, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        day_id,
+                        m,
+                        slot,
+                        *(meal.get(c) for c in _MEAL_COLUMNS),
+                        _extra(meal, (*_MEAL_COLUMNS, "items")),
+                    ),
+                )
+                meal_id = cur.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO items (meal_id, position, name, quantity, kcal, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            meal_id,
+                            i,
+                            item.get("name", ""),
+                            *(item.get(c) for c in _ITEM_COLUMNS[1:]),
+                            _extra(item, _ITEM_COLUMNS),
+                        )
+                        for i, item in enumerate(_objects(meal.get("items")))
+                    ],
+                )
+
+    def _import_weights(self, data):
+        self._conn.execute("DELETE FROM weights")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO weights (date, weight_kg) VALUES (?, ?)",
+            [(e["date"], e["weight_kg"]) for e in data or []],
+        )
+
+    def _import_spending(self, data):
+        store = factor_invoices.load_store(self.data_dir / "receipts" / "Factor")
+        self._conn.execute("DELETE FROM spending")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO spending (year, week, factor_eur, grocery_eur, extra) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    e["year"],
+                    e["week"],
+                    e.get("factor_eur"),
+                    e.get("grocery_eur"),
+                    _extra(e, ("year", "week", "factor_eur", "grocery_eur")),
+                )
+                for e in factor_invoices.apply_to_spending(data or [], store)
+            ],
+        )
+
+    def _import_products(self, data):
+        self._conn.execute("DELETE FROM products")
+        self._conn.executemany(
+            "INSERT INTO products (name, size, price_eur, extra) VALUES (?, ?, ?, ?)",
+            [
+                (name, p.get("size"), p.get("price_eur"), _extra(p, ("size", "price_eur")))
+                for name, p in (data or {}).items()
+            ],
+        )
+
+    # -- plan-store interface -------------------------------------------------
+
+    def _query(self, sql: str, params=()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def entries(self) -> list[dict]:
+        """Manifest-style entries for every stored week, oldest first."""
+        rows = self._query(
+            "SELECT year, week, file, start_date, end_date FROM weeks ORDER BY year, week"
+        )
+        return [dict(row) for row in rows]
+
+    def digest(self, year: int, week: int) -> str | None:
+        rows = self._query("SELECT digest FROM weeks WHERE year = ? AND week = ?", (year, week))
+        return rows[0]["digest"] if rows else None
+
+    def get(self, year: int, week: int) -> dict | None:
+        """The plan for (year, week) rebuilt from its rows, once per version."""
+        found = self._get(year, week)
+        return found[1] if found else None
+
+    def _get(self, year: int, week: int) -> tuple[str, dict] | None:
+        """(digest, plan) for (year, week), the digest being the one the plan was read at."""
+        rows = self._query(
+            "SELECT id, year, week, start_date, end_date, digest, extra FROM weeks "
+            "WHERE year = ? AND week = ?",
+            (year, week),
+        )
+        if not rows:
+            return None
+        head = rows[0]
+        cached = self._parsed.get((year, week))
+        if cached and cached[0] == head["digest"]:
+            return cached
+
+        days = self._query(
+            "SELECT id, date, weekday, total_kcal, extra FROM days WHERE week_id = ? "
+            "ORDER BY position",
+            (head["id"],),
+        )
+        meals = self._query(
+            "SELECT m.id, m.day_id, m.slot, m.name, m.source, m.total_kcal, m.extra "
+            "FROM meals m JOIN days d ON d.id = m.day_id WHERE d.week_id = ? "
+            "ORDER BY m.day_id, m.position",
+            (head["id"],),
+        )
+        items = self._query(
+            "SELECT i.meal_id, i.name, i.quantity, i.kcal, i.extra FROM items i "
+            "JOIN meals m ON m.id = i.meal_id JOIN days d ON d.id = m.day_id "
+            "WHERE d.week_id = ? ORDER BY i.meal_id, i.position",
+            (head["id"],),
+        )
+
+        items_by_meal: dict[int, list[dict]] = {}
+        for row in items:
+            items_by_meal.setdefault(row["meal_id"], []).append(
+                _restore(row, _ITEM_COLUMNS, row["extra"])
+            )
+        meals_by_day: dict[int, dict[str, dict]] = {}
+        for row in meals:
+            meal = _restore(row, _MEAL_COLUMNS, row["extra"])
+            meal["items"] = items_by_meal.get(row["id"], [])
+            meals_by_day.setdefault(row["day_id"], {})[row["slot"]] = meal
+
+        plan = {
+            "year": head["year"],
+            "week": head["week"],
+            "start_date": head["start_date"],
+            "end_date": head["end_date"],
+            **json.loads(head["extra"]),
+            "days": [],
+        }
+        for row in days:
+            day = _restore(row, _DAY_COLUMNS, row["extra"])
+            day["meals"] = meals_by_day.get(row["id"], {})
+            plan["days"].append(day)
+        self._parsed[(year, week)] = (head["digest"], plan)
+        return head["digest"], plan
+
+    def model(self, year: int, week: int) -> Plan | None:
+        """The plan for (year, week) as a compact ``Plan``, once per version."""
+        found = self._get(year, week)
+        if found is None:
+            return None
+        digest, data = found
+        cached = self._models.get((year, week))
+        if cached and cached[0] == digest:
+            return cached[1]
+        plan = Plan.from_dict(data)
+        plan.digest = digest
+        self._models[(year, week)] = (digest, plan)
+        return plan
+
+    def skipped(self) -> dict[str, str]:
+        """Plan files left out (drafts aside) → why, as ``PlanStore.skipped()``."""
+        rows = self._query(
+            "SELECT file, reason FROM skipped WHERE reason != ? ORDER BY file", (_DRAFT,)
+        )
+        return {row["file"]: row["reason"] for row in rows}
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        return self.digest(*key) is not None
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM weeks")[0][0]
+
+    # -- other sources --------------------------------------------------------
+
+    def weights(self) -> list[dict]:
+        return [
+            dict(row) for row in self._query("SELECT date, weight_kg FROM weights ORDER BY date")
+        ]
+
+    def spending(self) -> list[dict]:
+        rows = self._query(
+            "SELECT year, week, factor_eur, grocery_eur, extra FROM spending ORDER BY year, week"
+        )
+        return [
+            {k: row[k] for k in ("year", "week", "factor_eur", "grocery_eur")}
+            | json.loads(row["extra"])
+            for row in rows
+        ]
+
+    def products(self) -> dict[str, dict]:
+        rows = self._query("SELECT name, size, price_eur, extra FROM products ORDER BY rowid")
+        products = {}
+        for row in rows:
+            product = json.loads(row["extra"])
+            for column in ("size", "price_eur"):
+                if row[column] is not None:
+                    product[column] = row[column]
+            products[row["name"]] = product
+        return products
+
+    # -- aggregations ---------------------------------------------------------
+
+    def spending_summary(self) -> dict:
+        """Totals behind the budget tab's metrics."""
+        row = self._query(
+            "SELECT COUNT(*) AS weeks, "
+            "COALESCE(SUM(factor_eur), 0) AS factor_eur, "
+            "COALESCE(SUM(grocery_eur), 0) AS grocery_eur, "
+            "(SELECT COALESCE(factor_eur, 0) + COALESCE(grocery_eur, 0) FROM spending "
+            " ORDER BY year DESC, week DESC LIMIT 1) AS last_week_eur "
+            "FROM spending"
+        )[0]
+        return dict(row)
+
+    def weight_summary(self) -> dict | None:
+        """First and latest weigh-in (date and kg) plus the count, or None if empty."""
+        row = self._query(
+            "SELECT COUNT(*) AS count, "
+            "MIN(date) AS start_date, "
+            "(SELECT weight_kg FROM weights ORDER BY date LIMIT 1) AS start_kg, "
+            "MAX(date) AS current_date, "
+            "(SELECT weight_kg FROM weights ORDER BY date DESC LIMIT 1) AS current_kg "
+            "FROM weights"
+        )[0]
+        return dict(row) if row["count"] else None
+
+    def grocery_items(self) -> list[tuple[int, int, str, str]]:
+        """(year, week, ingredient, quantity) of every item bought at the supermarket.
+
+        Factor and free dinners are left out, in plan order.
+        """
+        rows = self._query(
+            "SELECT w.year, w.week, i.name, i.quantity FROM items i "
+            "JOIN meals m ON m.id = i.meal_id "
+            "JOIN days d ON d.id = m.day_id "
+            "JOIN weeks w ON w.id = d.week_id "
+            f"WHERE COALESCE(m.source, '') NOT IN ({', '.join('?' * len(_NOT_GROCERY))}) "
+            "ORDER BY w.year, w.week, d.position, m.position, i.position",
+            _NOT_GROCERY,
+        )
+        return [tuple(row) for row in rows]
+
+
+def main():
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data")
+    db = PlanDatabase(data_dir / DB_NAME, data_dir)
+    changed = db.refresh()
+    counts = {
+        table: db._query(f"SELECT COUNT(*) FROM {table}")[0][0]
+        for table in ("weeks", "days", "meals", "items", "weights", "spending", "products")
+    }
+    state = "updated" if changed else "up to date"
+    print(f"{db.db_path}: {state} ({', '.join(f'{n} {t}' for t, n in counts.items())})")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""Offline extraction of Factor invoice PDFs into weekly spending figures.
+
+The ``Factuur *.pdf`` invoices are small single-page PDFs whose text is
+drawn with Type0 / Identity-H fonts: every glyph is a 2-byte CID that only
+the font's ``ToUnicode`` CMap maps back to text. A tiny reader — object
+scan, FlateDecode, CMap decoding and a text-operator interpreter — turns a
+page into text lines (runs grouped by baseline, ordered by x), which are
+then matched for invoice date, delivery week, meal count and total.
+
+Results are cached in ``invoices.json`` next to the PDFs, keyed by file
+SHA-256, so a re-run only opens new or changed invoices. An invoice that
+cannot be read is logged and stored as unparsed (an ``error`` and no
+figures) so the rest still load. Run with
+``uv run python -m meal_planner.factor_invoices [data/receipts/Factor]``.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sys
+import zlib
+from datetime import date
+from pathlib import Path
+
+STORE_NAME = "invoices.json"
+STORE_VERSION = 1
+INVOICE_GLOB = "Factuur *.pdf"
+
+log = logging.getLogger(__name__)
+
+_OBJ_RE = re.compile(rb"(\d+)\s+\d+\s+obj\b(.*?)\bendobj", re.S)
+_STREAM_RE = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+_REF = rb"\s+(\d+)\s+\d+\s+R"
+_TOKEN_RE = re.compile(
+    rb"""
+      (?P<hex><[0-9A-Fa-f\s]*>)
+    | (?P<str>\((?:\\.|[^\\)])*\))
+    | (?P<open>\[) | (?P<close>\])
+    | (?P<name>/[^\s/\[\]()<>]+)
+    | (?P<num>[-+]?(?:\d+\.?\d*|\.\d+))
+    | (?P<op>[A-Za-z'"*]+)
+    """,
+    re.X,
+)
+_HEX_RE = re.compile(rb"<([0-9A-Fa-f]+)>")
+
+_DATE_RE = re.compile(r"(\d{2})[.\-/](\d{2})[.\-/](\d{4})")
+_AMOUNT_RE = re.compile(r"(-?\d+(?:\.\d{3})*,\d{2})\s*€")
+_MEALS_RE = re.compile(r"(\d+)\s+maaltijden", re.I)
+_NUMBER_RE = {
+    "invoice_number": re.compile(r"Factuurnummer:\s*(\S+)"),
+    "order_number": re.compile(r"Ordernummer:\s*(\S+)"),
+}
+
+
+# ---------------------------------------------------------------------------
+# PDF text
+# ---------------------------------------------------------------------------
+
+
+def _objects(data: bytes) -> dict[int, bytes]:
+    return {int(m.group(1)): m.group(2) for m in _OBJ_RE.finditer(data)}
+
+
+def _stream(body: bytes) -> bytes:
+    m = _STREAM_RE.search(body)
+    if not m:
+        return b""
+    raw = m.group(1)
+    return zlib.decompress(raw) if b"/FlateDecode" in body else raw
+
+
+def _utf16(hexstr: bytes) -> str:
+    return bytes.fromhex(hexstr.decode()).decode("utf-16-be", errors="replace")
+
+
+def _to_unicode(cmap: bytes) -> dict[int, str]:
+    """CID → text map from a ToUnicode CMap (bfchar and bfrange sections)."""
+    table: dict[int, str] = {}
+    for block in re.findall(rb"beginbfchar(.*?)endbfchar", cmap, re.S):
+        for src, dst in re.findall(rb"<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>", block):
+            table[int(src, 16)] = _utf16(dst)
+    for block in re.findall(rb"beginbfrange(.*?)endbfrange", cmap, re.S):
+        pattern = rb"<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(\[[^\]]*\]|<[0-9A-Fa-f]+>)"
+        for lo, hi, dst in re.findall(pattern, block):
+            lo, hi = int(lo, 16), int(hi, 16)
+            if dst.startswith(b"["):
+                for i, h in enumerate(_HEX_RE.findall(dst)):
+                    table[lo + i] = _utf16(h)
+            else:
+                base = int(dst[1:-1], 16)
+                for cid in range(lo, hi + 1):
+                    table[cid] = chr(base + cid - lo)
+    return table
+
+
+def _decode(operand, cmap: dict[int, str] | None) -> str:
+    """Text of a Tj string or TJ array, using the font's CMap when it has one."""
+    if isinstance(operand, list):
+        return "".join(_decode(part, cmap) for part in operand if isinstance(part, bytes))
+    if cmap is None:
+        return operand.decode("latin-1")
+    return "".join(
+        cmap.get(int.from_bytes(operand[i : i + 2], "big"), "")
+        for i in range(0, len(operand) - 1, 2)
+    )
+
+
+def _tokens(content: bytes):
+    """Operands and operators of a content stream; arrays become lists."""
+    stack: list[list] = [[]]
+    for m in _TOKEN_RE.finditer(content):
+        kind, raw = m.lastgroup, m.group()
+        if kind == "op":
+            yield stack[0], raw.decode()
+            stack = [[]]
+            continue
+        if kind == "open":
+            stack.append([])
+            continue
+        if kind == "close":
+            if len(stack) > 1:
+                arr = stack.pop()
+                stack[-1].append(arr)
+            continue
+        if kind == "hex":
+            value = bytes.fromhex(re.sub(rb"\s", b"", raw[1:-1]).decode())
+        elif kind == "str":
+            value = re.sub(rb"\\(.)", rb"\1", raw[1:-1])
+        elif kind == "num":
+            value = float(raw)
+        else:
+            value = raw[1:].decode()
+        stack[-1].append(value)
+
+
+def _page_runs(content: bytes, fonts: dict[str, dict[int, str] | None]):
+    """(y, x, text) for every text-showing operator on a page.
+
+    Only the text matrix is tracked (Tm/Td/TD/T*); that is enough for these
+    invoices, which position every run with an absolute Tm.
+    """
+    x = y = leading = 0.0
+    cmap = None
+    for operands, op in _tokens(content):
+        if op == "BT":
+            x = y = 0.0
+        elif op == "Tf" and operands:
+            cmap = fonts.get(operands[0])
+        elif op == "Tm" and len(operands) == 6:
+            x, y = operands[4], operands[5]
+        elif op in ("Td", "TD") and len(operands) == 2:
+            x, y = x + operands[0], y + operands[1]
+            if op == "TD":
+                leading = -operands[1]
+        elif op == "TL" and operands:
+            leading = operands[0]
+        elif op == "T*":
+            y -= leading
+        elif op in ("Tj", "TJ", "'", '"') and operands:
+            if op in ("'", '"'):
+                y -= leading
+            yield y, x, _decode(operands[-1], cmap)
+
+
+def pdf_lines(data: bytes) -> list[str]:
+    """Text lines of every page, top to bottom, runs joined left to right."""
+    objects = _objects(data)
+
+    def ref(body: bytes, key: bytes) -> bytes:
+        m = re.search(rb"/" + key + _REF, body)
+        return objects.get(int(m.group(1)), b"") if m else b""
+
+    lines: list[str] = []
+    for body in objects.values():
+        if not re.search(rb"/Type\s*/Page\b(?!s)", body):
+            continue
+        resources = ref(body, b"Resources") or body
+        font_dict = re.search(rb"/Font\s*<<(.*?)>>", resources, re.S)
+        font_refs = re.findall(rb"/([^\s/]+)" + _REF, font_dict.group(1) if font_dict else b"")
+        fonts: dict[str, dict[int, str] | None] = {}
+        for name, num in font_refs:
+            font = objects.get(int(num), b"")
+            cmap = ref(font, b"ToUnicode")
+            fonts[name.decode()] = _to_unicode(_stream(cmap)) if cmap else None
+
+        rows: dict[float, list[tuple[float, str]]] = {}
+        for y, x, text in _page_runs(_stream(ref(body, b"Contents")), fonts):
+            rows.setdefault(round(y, 1), []).append((x, text))
+        for y in sorted(rows, reverse=True):  # PDF y grows upwards
+            text = " ".join(text for _x, text in sorted(rows[y]))
+            lines.append(" ".join(text.split()))
+    return [line for line in lines if line]
+
+
+# ---------------------------------------------------------------------------
+# Invoice fields
+# ---------------------------------------------------------------------------
+
+
+def _amount(text: str) -> float | None:
+    m = _AMOUNT_RE.search(text)
+    return float(m.group(1).replace(".", "").replace(",", ".")) if m else None
+
+
+def _date(text: str) -> date | None:
+    m = _DATE_RE.search(text)
+    if not m:
+        return None
+    day, month, year = map(int, m.groups())
+    return date(year, month, day)
+
+
+def meal_week(delivered: date) -> tuple[int, int]:
+    """ISO (year, week) a box is eaten in: Sunday deliveries cover the next week."""
+    if delivered.isoweekday() == 7:
+        delivered = date.fromordinal(delivered.toordinal() + 1)
+    year, week, _ = delivered.isocalendar()
+    return year, week
+
+
+def parse_invoice(lines: list[str]) -> dict:
+    """Invoice date, delivery week, meal count and total from invoice text lines.
+
+    The total is the unlabelled amount under BTW in the Bedrag column; when
+    a layout change hides it, subtotal + BTW is used instead.
+    """
+    record: dict = {"invoice_date": None, "delivery_date": None, "meals": None}
+    subtotal = vat = total = None
+    for i, line in enumerate(lines):
+        for key, pattern in _NUMBER_RE.items():
+            m = pattern.search(line)
+            if m:
+                record[key] = m.group(1)
+        if "Datum:" in line and record["invoice_date"] is None:
+            record["invoice_date"] = _date(line.split("Datum:", 1)[1])
+        if "Bezorgdatum" in line and i + 1 < len(lines) and record["delivery_date"] is None:
+            record["delivery_date"] = _date(lines[i + 1])
+        m = _MEALS_RE.search(line)
+        if m and record["meals"] is None:
+            record["meals"] = int(m.group(1))
+        amount = _amount(line)
+        if amount is None:
+            continue
+        if line.startswith("Subtotaal"):
+            subtotal = amount
+        elif line.startswith("BTW"):
+            vat = amount
+        elif vat is not None and total is None and _AMOUNT_RE.fullmatch(line):
+            total = amount
+
+    if total is None and subtotal is not None and vat is not None:
+        total = round(subtotal + vat, 2)
+    delivered = record["delivery_date"] or record["invoice_date"]
+    year, week = meal_week(delivered) if delivered else (None, None)
+    return {
+        **{k: v.isoformat() if isinstance(v, date) else v for k, v in record.items()},
+        "year": year,
+        "week": week,
+        "total_eur": total,
+    }
+
+
+def extract_invoice(path: Path) -> dict:
+    """Parse one invoice PDF."""
+    return parse_invoice(pdf_lines(Path(path).read_bytes()))
+
+
+# ---------------------------------------------------------------------------
+# Cached store
+# ---------------------------------------------------------------------------
+
+
+def load_store(invoice_dir: Path) -> dict:
+    """Read the compiled invoice store, or an empty one if it doesn't exist."""
+    try:
+        store = json.loads((Path(invoice_dir) / STORE_NAME).read_text())
+        if store.get("version") == STORE_VERSION:
+            return store
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {"version": STORE_VERSION, "invoices": {}}
+
+
+_UNPARSED = dict.fromkeys(("invoice_date", "delivery_date", "meals", "year", "week", "total_eur"))
+
+
+def ingest_directory(invoice_dir: Path) -> dict:
+    """Extract new/changed invoices and rewrite the store if anything changed.
+
+    Invoices whose SHA-256 matches the store are not opened again, including
+    ones stored as unparsed.
+    """
+    invoice_dir = Path(invoice_dir)
+    store = load_store(invoice_dir)
+    known = store["invoices"]
+    invoices = {}
+    changed = False
+    for path in sorted(invoice_dir.glob(INVOICE_GLOB)):
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        cached = known.get(path.name)
+        if cached and cached["sha256"] == digest:
+            invoices[path.name] = cached
+            continue
+        try:
+            record = parse_invoice(pdf_lines(data))
+        except Exception as exc:  # corrupt stream, odd date, ... — keep the other invoices
+            log.warning("Could not parse %s: %s", path.name, exc)
+            record = {"error": f"{type(exc).__name__}: {exc}", **_UNPARSED}
+        invoices[path.name] = {"sha256": digest, **record}
+        changed = True
+
+    if not changed and invoices.keys() == known.keys():
+        return store
+    store = {"version": STORE_VERSION, "invoices": invoices}
+    (invoice_dir / STORE_NAME).write_text(json.dumps(store, indent=1) + "\n", encoding="utf-8")
+    return store
+
+
+def weekly_factor(store: dict) -> dict[tuple[int, int], dict]:
+    """(year, week) → {"factor_eur", "meals"}, summing boxes in the same week."""
+    weeks: dict[tuple[int, int], dict] = {}
+    for inv in store["invoices"].values():
+        if inv.get("week") is None or inv.get("total_eur") is None:
+            continue
+        entry = weeks.setdefault((inv["year"], inv["week"]), {"factor_eur": 0.0, "meals": 0})
+        entry["factor_eur"] = round(entry["factor_eur"] + inv["total_eur"], 2)
+        entry["meals"] += inv.get("meals") or 0
+    return dict(sorted(weeks.items()))
+
+
+def latest_invoice(store: dict) -> dict | None:
+    """The most recent invoice, for "current price per week" figures."""
+    dated = [inv for inv in store["invoices"].values() if inv.get("invoice_date")]
+    return max(dated, key=lambda inv: inv["invoice_date"], default=None)
+
+
+def apply_to_spending(spending: list[dict], store: dict) -> list[dict]:
+    """Spending entries with factor_eur replaced by invoiced amounts.
+
+    Weeks without an invoice keep their own value. Returns new dicts — the
+    input may be a shared cached object.
+    """
+    weeks = weekly_factor(store)
+    result = []
+    for entry in spending:
+        invoiced = weeks.get((entry.get("year"), entry.get("week")))
+        if invoiced:
+            entry = {**entry, "factor_eur": invoiced["factor_eur"], "factor_source": "invoice"}
+        result.append(entry)
+    return result
+
+
+def main():
+    invoice_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data/receipts/Factor")
+    store = ingest_directory(invoice_dir)
+    for name, inv in store["invoices"].items():
+        if inv.get("error"):
+            print(f"{name}: unparsed ({inv['error']})")
+            continue
+        if inv["week"] is None or inv["total_eur"] is None:
+            print(f"{name}: no delivery week or total found")
+            continue
+        print(
+            f"{name}: {inv['invoice_date']}  W{inv['week']:02d}/{inv['year']}  "
+            f"{inv['meals']} meals  €{inv['total_eur']:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
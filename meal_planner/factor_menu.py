@@ -0,0 +1,193 @@
+"""Factor weekly menu optimizer over ``factor-catalog.json``.
+
+Picks N dinners that maximize total protein with the week's kcal under a
+cap, skipping recently eaten meals and meeting minimum tag counts (e.g. at
+least 3 "Eiwitrijk"). The catalog is turned once into numpy arrays
+(kcal, protein, a meal × tag matrix); the search is an exact 0/1 knapsack
+DP over (meals chosen, tag-count state, kcal used) where each catalog meal
+is one vectorized update, so a catalog of thousands of dishes still
+solves in a fraction of a second. kcal is bucketed (10 kcal by default) and
+rounded up, so the cap always holds.
+
+The result is the plan's dinner block. Run with
+``uv run python -m meal_planner.factor_menu [meals] [kcal_cap]``.
+"""
+
+import json
+import sys
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from meal_planner.plan_store import PlanStore
+
+DINNER_TIME = "20:00"
+
+
+class Catalog:
+    """Array view of the Factor catalog: one row per meal."""
+
+    def __init__(self, meals: list[dict]):
+        self.meals = meals
+        self.ids = [m["id"] for m in meals]
+        self.index = {meal_id: i for i, meal_id in enumerate(self.ids)}
+        # Meals without kcal can't be checked against the cap, so they are never picked
+        self.known = np.array([m.get("kcal") is not None for m in meals], dtype=bool)
+        self.kcal = np.array([m.get("kcal") or 0 for m in meals], dtype=np.int64)
+        self.protein = np.array([m.get("protein_g") or 0.0 for m in meals], dtype=np.float64)
+        self.carbs = np.array([m.get("carbs_g") or 0.0 for m in meals], dtype=np.float64)
+        self.tag_names = sorted({tag for m in meals for tag in m.get("tags", [])})
+        tag_col = {tag: j for j, tag in enumerate(self.tag_names)}
+        self.tags = np.zeros((len(meals), len(self.tag_names)), dtype=np.int64)
+        for i, meal in enumerate(meals):
+            for tag in meal.get("tags", []):
+                self.tags[i, tag_col[tag]] = 1
+
+    @classmethod
+    def load(cls, path: Path) -> "Catalog":
+        return cls(json.loads(Path(path).read_text()))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def tag_column(self, tag: str) -> np.ndarray:
+        if tag not in self.tag_names:
+            return np.zeros(len(self), dtype=np.int64)
+        return self.tags[:, self.tag_names.index(tag)]
+
+
+def optimize(
+    catalog: Catalog,
+    n: int,
+    kcal_cap: int,
+    recent: Iterable[str] = (),
+    min_tags: dict[str, int] | None = None,
+    max_meal_kcal: int | None = None,
+    resolution: int = 10,
+) -> list[str] | None:
+    """Ids of `n` distinct meals with the most protein and total kcal ≤ `kcal_cap`.
+
+    Meals in `recent` are excluded, as are meals above `max_meal_kcal`.
+    `min_tags` asks for at least that many chosen meals carrying each tag.
+    Meals missing protein_g count as 0 g. Ties in protein go to fewer kcal.
+    Returns None when nothing fits.
+    """
+    min_tags = {tag: m for tag, m in (min_tags or {}).items() if m > 0}
+    allowed = catalog.known.copy()
+    for meal_id in recent:
+        if meal_id in catalog.index:
+            allowed[catalog.index[meal_id]] = False
+    if max_meal_kcal is not None:
+        allowed &= catalog.kcal <= max_meal_kcal
+    candidates = np.flatnonzero(allowed)
+    if len(candidates) < n:
+        return None
+
+    # Tag-count state in mixed radix, saturating at each tag's minimum
+    radix = [m + 1 for m in min_tags.values()]
+    strides = np.cumprod([1, *radix])[:-1]
+    n_states = int(np.prod(radix)) if radix else 1
+    counts = np.array(
+        [(s // strides[t]) % radix[t] for s in range(n_states) for t in range(len(radix))],
+        dtype=np.int64,
+    ).reshape(n_states, len(radix))
+    item_tags = (
+        np.stack([catalog.tag_column(tag) for tag in min_tags], axis=1)
+        if min_tags
+        else np.zeros((len(catalog), 0), dtype=np.int64)
+    )
+
+    cap = kcal_cap // resolution
+    kq = -(-catalog.kcal // resolution)  # ceil, so the real total never exceeds the cap
+    # Small kcal tie-breaker keeps the DP preferring leaner menus at equal protein
+    value = catalog.protein - catalog.kcal * 1e-6
+
+    best = np.full((n + 1, n_states, cap + 1), -np.inf)
+    best[0, 0, 0] = 0.0
+    # came_from[step, k, s, c] = tag state before taking candidate `step`, or -1
+    src_dtype = np.int8 if n_states < 128 else np.int16
+    came_from = np.full((len(candidates), n + 1, n_states, cap + 1), -1, dtype=src_dtype)
+
+    for step, i in enumerate(candidates):
+        q = int(kq[i])
+        if q > cap:
+            continue
+        nxt = np.minimum(counts + item_tags[i], np.array(radix) - 1) if radix else counts
+        target = (nxt * strides).sum(axis=1) if radix else np.zeros(1, dtype=np.int64)
+        take = best[:-1, :, : cap + 1 - q] + value[i]  # from the previous layer only
+        updated = best.copy()
+        for s, s2 in enumerate(target):
+            cell = updated[1:, s2, q:]
+            better = take[:, s] > cell
+            if better.any():
+                cell[better] = take[:, s][better]
+                came_from[step, 1:, s2, q:][better] = s
+        best = updated
+
+    goal = n_states - 1
+    final = best[n, goal]
+    if not np.isfinite(final).any():
+        return None
+    c = int(np.argmax(final))
+    k, s = n, goal
+    chosen = []
+    for step in range(len(candidates) - 1, -1, -1):
+        if k == 0:
+            break
+        src = came_from[step, k, s, c]
+        if src < 0:
+            continue
+        i = candidates[step]
+        chosen.append(catalog.ids[i])
+        k, s, c = k - 1, int(src), c - int(kq[i])
+    return chosen[::-1]
+
+
+def dinner_block(catalog: Catalog, meal_ids: list[str]) -> list[dict]:
+    """Plan-file dinner entries for the chosen meals."""
+    dinners = []
+    for meal_id in meal_ids:
+        meal = catalog.meals[catalog.index[meal_id]]
+        dinners.append(
+            {
+                "time": DINNER_TIME,
+                "total_kcal": meal["kcal"],
+                "source": "factor",
+                "factor_meal_id": meal_id,
+                "items": [{"name": meal["name"], "quantity": "1 meal", "kcal": meal["kcal"]}],
+            }
+        )
+    return dinners
+
+
+def recent_meal_ids(plans: Iterable[dict]) -> set[str]:
+    """factor_meal_id of every Factor dinner in `plans`."""
+    return {
+        meal["factor_meal_id"]
+        for plan in plans
+        for day in plan["days"]
+        for meal in day["meals"].values()
+        if meal.get("source") == "factor" and meal.get("factor_meal_id")
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    kcal_cap = int(sys.argv[2]) if len(sys.argv) > 2 else 520 * n
+    root = Path("data")
+    catalog = Catalog.load(root / "factor-catalog.json")
+    store = PlanStore(root / "plans")
+    store.refresh()
+    last_weeks = store.entries()[-2:]
+    recent = recent_meal_ids(store.get(e["year"], e["week"]) for e in last_weeks)
+
+    picked = optimize(catalog, n, kcal_cap, recent=recent, min_tags={"Eiwitrijk": n // 2})
+    if picked is None:
+        print(f"No {n}-meal menu under {kcal_cap} kcal", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(dinner_block(catalog, picked), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
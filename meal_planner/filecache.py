@@ -0,0 +1,69 @@
+"""JSON file cache invalidated by file changes instead of a TTL.
+
+Each entry is keyed by the file's ``(mtime_ns, size)``. A lookup costs one
+``stat``; the file is only read and parsed again when it actually changed,
+so edits show up on the very next rerun and unchanged files are never
+re-parsed. Cached values are shared — treat them as read-only.
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+
+
+class FileCache:
+    """Parse JSON files once per on-disk version and report what is held."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # path → (mtime_ns, size, value)
+        self._entries: dict[Path, tuple[int, int, object]] = {}
+        self.reloads: Counter[str] = Counter()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path: Path) -> dict | list | None:
+        """Return the parsed file, or None if it is missing or invalid JSON."""
+        path = Path(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(path, None)
+            return None
+
+        with self._lock:
+            cached = self._entries.get(path)
+            fresh = cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size)
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if fresh:
+            return cached[2]
+
+        try:
+            value = json.loads(path.read_bytes())
+        except (OSError, json.JSONDecodeError):
+            value = None  # cached too, so a broken file isn't re-parsed every rerun
+        with self._lock:
+            self._entries[path] = (st.st_mtime_ns, st.st_size, value)
+            self.reloads[str(path)] += 1
+        return value
+
+    def stats(self) -> dict:
+        """Files held, their total on-disk size in bytes, hit/miss counts and reloads per file."""
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": sum(size for _mtime, size, _value in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": dict(self.reloads),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,133 @@
+"""Canonical ingredient registry — one integer ID per food.
+
+``data/ingredients.json`` lists every food once: a stable integer ID, its
+canonical name, the other names plans use for it (spelling variants,
+English), its grocery category, grams per unit for count quantities, its
+density and grocery unit where they matter, and the products.json key it
+is bought as. Every name and alias is normalized into
+one prebuilt hash index, so resolving a plan name is a dict lookup and
+"Skyr" / "Skyr natural" / "Tortita de arroz" / "Honey drizzle" all land on
+the same ID. A name missing from the index becomes a food of its own with a
+new ID for the life of the registry, so every plan item can be aggregated by
+ID. It is never merged into a similar-looking food: "Pechuga de pollo" is
+not "Pechuga de pavo". ``suggestion()`` gives the close registered food
+(``IngredientResolver``) for the validator to report, so the name can be
+added as an alias. Results are memoized per raw name.
+"""
+
+import json
+import sys
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+from meal_planner.resolver import IngredientResolver, normalize
+
+REGISTRY_NAME = "ingredients.json"
+
+
+class Food(NamedTuple):
+    id: int
+    name: str
+    category: str | None = None
+    product: str | None = None  # products.json key
+    grams_per_unit: float | None = None
+    density: float | None = None  # g/ml
+    unit: str | None = None  # unit grocery totals are given in (see meal_planner.units)
+    aliases: tuple[str, ...] = ()
+
+
+class IngredientRegistry:
+    """Resolve ingredient names to food IDs through a prebuilt normalized-name index."""
+
+    def __init__(self, foods: Iterable[Food]):
+        self._lock = threading.Lock()
+        self._foods: dict[int, Food] = {}
+        self._index: dict[str, int] = {}
+        self._memo: dict[str, int] = {}
+        for food in foods:
+            if food.id in self._foods:
+                raise ValueError(f"duplicate ingredient id {food.id}")
+            self._foods[food.id] = food
+            for name in (food.name, *food.aliases):
+                self._index.setdefault(normalize(name), food.id)
+        self._registered = len(self._foods)
+        self._next_id = self._first_runtime_id = max(self._foods, default=0) + 1
+        self._resolver = IngredientResolver(
+            [food.name for food in self._foods.values()],
+            {alias: food.name for food in self._foods.values() for alias in food.aliases},
+        )
+        # Changes whenever the registered foods do; for keying derived views
+        self.fingerprint = hash(tuple(self._foods.values()))
+
+    @classmethod
+    def from_json(cls, data: list[dict]) -> "IngredientRegistry":
+        return cls(
+            Food(
+                entry["id"],
+                entry["name"],
+                entry.get("category"),
+                entry.get("product"),
+                entry.get("grams_per_unit"),
+                entry.get("density"),
+                entry.get("unit"),
+                tuple(entry.get("aliases", ())),
+            )
+            for entry in data
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "IngredientRegistry":
+        return cls.from_json(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def id_for(self, name: str) -> int:
+        """Food ID for `name` (exact, normalized or alias match); an unknown name gets a new ID."""
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+        norm = normalize(name)
+        food_id = self._index.get(norm)
+        if food_id is None:
+            food_id = self._add(name, norm)
+        self._memo[sys.intern(name)] = food_id
+        return food_id
+
+    def suggestion(self, name: str) -> str | None:
+        """Registered food an unknown `name` probably means; None for known or unlike names."""
+        food_id = self._index.get(normalize(name))
+        if food_id is not None and self.registered(food_id):
+            return None
+        return self._resolver.resolve(name)
+
+    def lookup(self, name: str) -> Food:
+        return self._foods[self.id_for(name)]
+
+    def __getitem__(self, food_id: int) -> Food:
+        return self._foods[food_id]
+
+    def __iter__(self) -> Iterator[Food]:
+        """Registered foods, in file order (names added at runtime are not included)."""
+        return iter(list(self._foods.values())[: self._registered])
+
+    def __len__(self) -> int:
+        return self._registered
+
+    def registered(self, food_id: int) -> bool:
+        """True for IDs from the registry file; IDs added at runtime don't outlive the process."""
+        return food_id < self._first_runtime_id
+
+    def aliases(self) -> dict[str, str]:
+        """alias → canonical name for every registered food."""
+        return {alias: food.name for food in self for alias in food.aliases}
+
+    def _add(self, name: str, norm: str) -> int:
+        with self._lock:
+            food_id = self._index.get(norm)
+            if food_id is None:
+                food_id = self._next_id
+                self._next_id += 1
+                self._foods[food_id] = Food(food_id, name)
+                self._index[norm] = food_id
+            return food_id
@@ -0,0 +1,296 @@
+"""Event-sourced pantry ledger: what is at home, in each food's canonical unit.
+
+Stock is never stored directly. The ledger is an append-only log of events:
+
+    purchase    {"food", "amount"}        bought (or found at home)
+    adjust      {"food", "amount"}        correction, may be negative
+    close_week  {"week", "usage"}         a plan week eaten: usage is food → amount
+
+and current stock is the fold of those events (amounts are clamped at zero,
+so eating what was never recorded as bought leaves nothing rather than a
+debt). The folded state is kept in memory, so reading it is a dict lookup,
+and a snapshot of it is written every ``snapshot_every`` events; opening the
+ledger loads the snapshot and replays only the events after it.
+
+Two local logs are provided: JSON lines (the snapshot records the byte
+offset it covers, so replay seeks straight past it) and SQLite. A JSON line
+torn by a crash mid-append is skipped with a warning and cut off before the
+next append, so it can't block opening the ledger or swallow a later event.
+Food IDs and amounts come from ``meal_planner.ingredients`` and
+``meal_planner.units``; only registered foods belong in the ledger, since IDs
+the registry hands out at runtime change between processes.
+
+Show the current stock with ``uv run python -m meal_planner.ledger [dir]``.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+LEDGER_DIR = "pantry"
+EVENTS_NAME = "ledger.jsonl"
+SNAPSHOT_NAME = "snapshot.json"
+DB_NAME = "ledger.db"
+
+
+class _State:
+    """Folded ledger: stock per food and the plan weeks already eaten."""
+
+    def __init__(self, seq: int = 0, stock: dict | None = None, weeks=()):
+        self.seq = seq
+        self.stock: dict[int, float] = {int(k): v for k, v in (stock or {}).items()}
+        self.weeks: set[str] = set(weeks)
+
+    def apply(self, event: dict):
+        kind = event["kind"]
+        if kind in ("purchase", "adjust"):
+            self._add(event["food"], event["amount"])
+        elif kind == "close_week":
+            self.weeks.add(event["week"])
+            for food, amount in event["usage"].items():
+                self._add(int(food), -amount)
+        self.seq = event["seq"]
+
+    def _add(self, food: int, amount: float):
+        left = max(self.stock.get(food, 0.0) + amount, 0.0)
+        if left > 1e-9:
+            self.stock[food] = left
+        else:
+            self.stock.pop(food, None)
+
+    def to_json(self) -> dict:
+        return {"seq": self.seq, "stock": self.stock, "weeks": sorted(self.weeks)}
+
+
+class JsonlLog:
+    """Events as JSON lines in ``<dir>/ledger.jsonl``, snapshot in ``snapshot.json``."""
+
+    def __init__(self, directory: Path):
+        self.dir = Path(directory)
+        self.events_path = self.dir / EVENTS_NAME
+        self.snapshot_path = self.dir / SNAPSHOT_NAME
+        self._tail_checked = False
+
+    def append(self, event: dict):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if not self._tail_checked:
+            self._end_last_line()
+            self._tail_checked = True
+        with open(self.events_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def replay(self, snapshot: dict | None) -> Iterator[dict]:
+        """Events after `snapshot` (all of them without one)."""
+        if not self.events_path.exists():
+            return
+        with open(self.events_path, "rb") as f:
+            f.seek((snapshot or {}).get("offset", 0))
+            for line in f:
+                if not line.endswith(b"\n"):  # the last line, maybe cut short by a crash
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        log.warning("%s: ignoring a torn last line", self.events_path)
+                        return
+                    yield event
+                elif line.strip():
+                    yield json.loads(line)
+
+    def _end_last_line(self):
+        """Make the log end with a newline: close a complete last event, drop a torn one."""
+        if not self.events_path.exists():
+            return
+        with open(self.events_path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(size - 65536, 0))
+            tail = f.read()
+            if not tail or tail.endswith(b"\n"):
+                return
+            start = tail.rfind(b"\n") + 1
+            try:
+                json.loads(tail[start:])
+            except ValueError:
+                f.truncate(size - len(tail) + start)
+            else:
+                f.write(b"\n")
+
+    def load_snapshot(self) -> dict | None:
+        try:
+            snapshot = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        try:
+            size = self.events_path.stat().st_size
+        except OSError:
+            size = 0
+        return snapshot if snapshot.get("offset", 0) <= size else None
+
+    def save_snapshot(self, state: dict):
+        """Write the snapshot atomically; a read-only disk just skips it."""
+        snapshot = {**state, "offset": self.events_path.stat().st_size}
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(snapshot), encoding="utf-8")
+            os.replace(tmp, self.snapshot_path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+
+
+class SqliteLog:
+    """Events and the latest snapshot in their own SQLite file."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS events (seq INTEGER PRIMARY KEY, event TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS snapshot (
+                    id INTEGER PRIMARY KEY CHECK (id = 1), state TEXT NOT NULL
+                );
+                """
+            )
+
+    def append(self, event: dict):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO events (seq, event) VALUES (?, ?)",
+                (event["seq"], json.dumps(event, ensure_ascii=False)),
+            )
+
+    def replay(self, snapshot: dict | None) -> Iterator[dict]:
+        after = (snapshot or {}).get("seq", 0)
+        rows = self._conn.execute(
+            "SELECT event FROM events WHERE seq > ? ORDER BY seq", (after,)
+        ).fetchall()
+        for (event,) in rows:
+            yield json.loads(event)
+
+    def load_snapshot(self) -> dict | None:
+        row = self._conn.execute("SELECT state FROM snapshot WHERE id = 1").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_snapshot(self, state: dict):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshot (id, state) VALUES (1, ?)", (json.dumps(state),)
+            )
+
+
+class PantryLedger:
+    """Record purchases and eaten plan weeks; read stock per food in O(1)."""
+
+    def __init__(self, log: JsonlLog | SqliteLog, snapshot_every: int = 100):
+        self.log = log
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        snapshot = log.load_snapshot()
+        self._state = _State(
+            **{k: snapshot[k] for k in ("seq", "stock", "weeks")} if snapshot else {}
+        )
+        self._since_snapshot = 0
+        for event in log.replay(snapshot):
+            self._state.apply(event)
+            self._since_snapshot += 1
+
+    @classmethod
+    def open(cls, directory: Path, sqlite: bool = False, **kwargs) -> "PantryLedger":
+        """The ledger under `directory`, as JSON lines or (with `sqlite`) a SQLite file."""
+        directory = Path(directory)
+        log = SqliteLog(directory / DB_NAME) if sqlite else JsonlLog(directory)
+        return cls(log, **kwargs)
+
+    # -- reads ----------------------------------------------------------------
+
+    def stock(self, food: int) -> float:
+        return self._state.stock.get(food, 0.0)
+
+    def stock_levels(self) -> dict[int, float]:
+        with self._lock:
+            return dict(self._state.stock)
+
+    def closed(self, week: str) -> bool:
+        return week in self._state.weeks
+
+    @property
+    def weeks(self) -> frozenset[str]:
+        return frozenset(self._state.weeks)
+
+    def missing(self, needs: dict[int, float]) -> dict[int, float]:
+        """Amount still to buy per food for `needs` (food → amount), given current stock."""
+        stock = self._state.stock
+        short = {}
+        for food, need in needs.items():
+            left = need - stock.get(food, 0.0)
+            if left > 1e-6:
+                short[food] = left
+        return short
+
+    @property
+    def seq(self) -> int:
+        return self._state.seq
+
+    # -- writes ---------------------------------------------------------------
+
+    def purchase(self, food: int, amount: float, source: str = "manual"):
+        self._record({"kind": "purchase", "food": food, "amount": amount, "source": source})
+
+    def adjust(self, food: int, amount: float, source: str = "manual"):
+        self._record({"kind": "adjust", "food": food, "amount": amount, "source": source})
+
+    def close_week(self, week: str, usage: dict[int, float]) -> bool:
+        """Subtract a plan week's usage once; returns False if it was already closed."""
+        with self._lock:
+            if week in self._state.weeks:
+                return False
+            usage = {food: round(amount, 3) for food, amount in usage.items()}
+            self._record_locked({"kind": "close_week", "week": week, "usage": usage})
+            return True
+
+    def _record(self, event: dict):
+        with self._lock:
+            self._record_locked(event)
+
+    def _record_locked(self, event: dict):
+        event = {
+            "seq": self._state.seq + 1,
+            "at": datetime.now().isoformat(timespec="seconds"),
+        } | event
+        self.log.append(event)
+        self._state.apply(json.loads(json.dumps(event)))  # same shape as a replayed event
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.log.save_snapshot(self._state.to_json())
+            self._since_snapshot = 0
+
+
+def main():
+    from meal_planner.ingredients import REGISTRY_NAME, IngredientRegistry
+    from meal_planner.units import UnitGraph
+
+    data = Path(__file__).resolve().parent.parent / "data"
+    directory = Path(sys.argv[1]) if len(sys.argv) > 1 else data / LEDGER_DIR
+    ledger = PantryLedger.open(directory, sqlite=(directory / DB_NAME).exists())
+    registry = IngredientRegistry.load(data / REGISTRY_NAME)
+    units = UnitGraph(registry)
+    print(f"{ledger.seq} events, {len(ledger.weeks)} weeks closed")
+    for food, amount in sorted(ledger.stock_levels().items()):
+        if registry.registered(food):
+            name, unit = registry[food].name, units.canonical_unit(food)
+        else:
+            name, unit = f"#{food}", ""
+        print(f"  {name:<30} {amount:>10.1f} {unit}")
+
+
+if __name__ == "__main__":
+    main()
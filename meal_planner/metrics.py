@@ -0,0 +1,91 @@
+"""Per-rerun timing spans and cache counters for the diagnostics panel.
+
+A ``RunRecorder`` keeps the last few reruns of one session. Each run holds
+the spans timed during it (loader or tab name, offset from the start of the
+run, duration) and how much every cache counter moved while it ran, so a
+slow rerun shows whether the time went to a sheet fetch, a JSON reload or a
+render. A span opened outside a run (a fragment rerun) records a run of its
+own. Runs export as JSON lines, one run per line.
+
+The caches behind the counters are shared by every session of the process,
+so a run's deltas are process totals: they include whatever other sessions
+did while it ran, and are stored as ``process_counters`` to say so.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class RunRecorder:
+    """Timing spans and process-wide counter deltas for the most recent `keep` runs."""
+
+    def __init__(self, counters: Callable[[], dict[str, int]] | None = None, keep: int = 50):
+        self._counters = counters or dict
+        self._lock = threading.Lock()
+        self.runs: deque[dict] = deque(maxlen=keep)
+        self._current: dict | None = None
+        self._start = 0.0
+        self._before: dict[str, int] = {}
+
+    def begin(self, label: str):
+        """Start a run; an unfinished previous run is closed first."""
+        if self._current is not None:
+            self.end()
+        self._before = self._counters()
+        self._start = time.perf_counter()
+        self._current = {
+            "label": label,
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "spans": [],
+        }
+
+    def end(self) -> dict | None:
+        """Close the current run and return it."""
+        run = self._current
+        if run is None:
+            return None
+        after = self._counters()
+        run["total_ms"] = round((time.perf_counter() - self._start) * 1e3, 2)
+        run["process_counters"] = {
+            name: after[name] - self._before.get(name, 0)
+            for name in after
+            if after[name] != self._before.get(name, 0)
+        }
+        self._current = None
+        with self._lock:
+            self.runs.append(run)
+        return run
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the block as `name` within the current run."""
+        own_run = self._current is None
+        if own_run:
+            self.begin(name)
+        run = self._current
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            run["spans"].append(
+                {
+                    "name": name,
+                    "start_ms": round((t0 - self._start) * 1e3, 2),
+                    "ms": round((time.perf_counter() - t0) * 1e3, 2),
+                }
+            )
+            if own_run:
+                self.end()
+
+    def last(self) -> dict | None:
+        with self._lock:
+            return self.runs[-1] if self.runs else None
+
+    def to_jsonl(self) -> str:
+        with self._lock:
+            return "".join(json.dumps(run, ensure_ascii=False) + "\n" for run in self.runs)
@@ -0,0 +1,258 @@
+"""Compact typed model of a weekly plan: Plan → Day → Meal → Item.
+
+Plan JSON parses into nested dicts, one hash table per day, meal and item.
+Here each level is a ``__slots__`` class instead (no per-instance
+``__dict__``), a day's meals are a short tuple, and ingredient names and
+quantities are interned so the same string is shared across the week and
+across weeks. A plan built with ``Plan.from_json`` keeps only its header and
+the raw bytes until ``days`` is first read. Keys the model has no attribute
+for are kept in ``extra``, so ``to_dict()`` gives back the source plan.
+Malformed parts (a ``meals`` list instead of a map, an item that is not an
+object) are skipped rather than raising, so a broken plan still renders;
+``meal_planner.validator`` reports them from the stored JSON.
+
+``benchmarks/bench_model.py`` compares the memory held per loaded week.
+"""
+
+import json
+import sys
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _objects(value) -> list[dict]:
+    """The dict entries of a JSON list; anything else counts as empty."""
+    return [v for v in value if isinstance(v, dict)] if isinstance(value, list) else []
+
+
+def _extra(data: dict, known: frozenset) -> dict | None:
+    extra = {k: v for k, v in data.items() if k not in known}
+    return extra or None
+
+
+class Item:
+    __slots__ = ("name", "quantity", "kcal", "extra")
+
+    _KEYS = frozenset(("name", "quantity", "kcal"))
+
+    def __init__(self, name: str, quantity: str | None, kcal, extra: dict | None = None):
+        self.name = name
+        self.quantity = quantity
+        self.kcal = kcal
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Item":
+        return cls(
+            _intern(data.get("name", "")),
+            _intern(data.get("quantity")),
+            data.get("kcal"),
+            _extra(data, cls._KEYS),
+        )
+
+    def to_dict(self) -> dict:
+        out = {"name": self.name}
+        if self.quantity is not None:
+            out["quantity"] = self.quantity
+        if self.kcal is not None:
+            out["kcal"] = self.kcal
+        return out | (self.extra or {})
+
+
+class Meal:
+    __slots__ = ("slot", "time", "name", "source", "total_kcal", "portable", "items", "extra")
+
+    _KEYS = frozenset(("time", "name", "source", "total_kcal", "portable", "items"))
+
+    def __init__(
+        self,
+        slot: str,
+        items: tuple[Item, ...] = (),
+        time: str | None = None,
+        name: str | None = None,
+        source: str | None = None,
+        total_kcal=None,
+        portable: bool | None = None,
+        extra: dict | None = None,
+    ):
+        self.slot = slot
+        self.items = items
+        self.time = time
+        self.name = name
+        self.source = source
+        self.total_kcal = total_kcal  # as written in the plan; None when missing
+        self.portable = portable
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, slot: str, data: dict) -> "Meal":
+        return cls(
+            _intern(slot),
+            tuple(Item.from_dict(item) for item in _objects(data.get("items"))),
+            _intern(data.get("time")),
+            data.get("name"),
+            _intern(data.get("source")),
+            data.get("total_kcal"),
+            data.get("portable"),
+            _extra(data, cls._KEYS),
+        )
+
+    @property
+    def kcal(self):
+        """The meal total, recomputed from the items when the plan lacks it."""
+        if self.total_kcal is not None:
+            return self.total_kcal
+        return sum(item.kcal or 0 for item in self.items)
+
+    @property
+    def display_name(self) -> str:
+        """The meal's name, or its first item's name."""
+        if self.name:
+            return self.name
+        return self.items[0].name if self.items else ""
+
+    def to_dict(self) -> dict:
+        out = {}
+        for key in ("time", "name", "total_kcal", "source", "portable"):
+            value = getattr(self, key)
+            if value is not None:
+                out[key] = value
+        out.update(self.extra or {})
+        out["items"] = [item.to_dict() for item in self.items]
+        return out
+
+
+class Day:
+    __slots__ = ("date", "weekday", "total_kcal", "notes", "office_day", "meals", "extra")
+
+    _KEYS = frozenset(("date", "weekday", "total_kcal", "notes", "office_day", "meals"))
+
+    def __init__(
+        self,
+        date: str | None,
+        weekday: str | None,
+        meals: tuple[Meal, ...] = (),
+        total_kcal=None,
+        notes: str | None = None,
+        office_day: bool | None = None,
+        extra: dict | None = None,
+    ):
+        self.date = date
+        self.weekday = weekday
+        self.meals = meals
+        self.total_kcal = total_kcal  # as written in the plan; None when missing
+        self.notes = notes
+        self.office_day = office_day
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Day":
+        meals = data.get("meals")
+        if not isinstance(meals, dict):
+            meals = {}
+        return cls(
+            data.get("date"),
+            _intern(data.get("weekday")),
+            tuple(
+                Meal.from_dict(slot, meal) for slot, meal in meals.items() if isinstance(meal, dict)
+            ),
+            data.get("total_kcal"),
+            data.get("notes"),
+            data.get("office_day"),
+            _extra(data, cls._KEYS),
+        )
+
+    def meal(self, slot: str) -> Meal | None:
+        for meal in self.meals:
+            if meal.slot == slot:
+                return meal
+        return None
+
+    @property
+    def kcal(self):
+        """The day total, recomputed from the meals when the plan lacks it."""
+        if self.total_kcal is not None:
+            return self.total_kcal
+        return sum(meal.kcal for meal in self.meals)
+
+    def to_dict(self) -> dict:
+        out = {}
+        for key in ("date", "weekday", "total_kcal", "notes", "office_day"):
+            value = getattr(self, key)
+            if value is not None:
+                out[key] = value
+        out.update(self.extra or {})
+        out["meals"] = {meal.slot: meal.to_dict() for meal in self.meals}
+        return out
+
+
+class Plan:
+    __slots__ = ("year", "week", "start_date", "end_date", "digest", "_days", "_extra", "_source")
+
+    def __init__(self, year: int, week: int, start_date: str = "", end_date: str = ""):
+        self.year = year
+        self.week = week
+        self.start_date = start_date
+        self.end_date = end_date
+        # Content hash of the stored version this was built from (set by the plan
+        # stores, for keying derived views); None for a plan made any other way
+        self.digest: str | None = None
+        self._days: tuple[Day, ...] = ()
+        self._extra: dict | None = None
+        self._source: bytes | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Plan":
+        plan = cls(data["year"], data["week"], data.get("start_date", ""), data.get("end_date", ""))
+        plan._fill(data)
+        return plan
+
+    @classmethod
+    def from_json(
+        cls, blob: bytes, year: int, week: int, start_date: str = "", end_date: str = ""
+    ) -> "Plan":
+        """A plan whose days are parsed from `blob` on first access."""
+        plan = cls(year, week, start_date, end_date)
+        plan._source = blob
+        return plan
+
+    def _fill(self, data: dict):
+        self._days = tuple(Day.from_dict(day) for day in _objects(data.get("days")))
+        known = ("year", "week", "start_date", "end_date", "days")
+        self._extra = {k: v for k, v in data.items() if k not in known} or None
+
+    def _load(self):
+        # Plans are shared across sessions: publish the parsed days before
+        # dropping the source, so no reader ever sees it half-loaded. Two
+        # threads may both parse a fresh plan; they store equal results.
+        source = self._source
+        if source is not None:
+            self._fill(json.loads(source))
+            self._source = None
+
+    @property
+    def days(self) -> tuple[Day, ...]:
+        self._load()
+        return self._days
+
+    @property
+    def extra(self) -> dict:
+        """Plan-level keys besides year/week/dates/days (daily_target_kcal, ...)."""
+        self._load()
+        return self._extra or {}
+
+    @property
+    def daily_target_kcal(self):
+        return self.extra.get("daily_target_kcal")
+
+    def to_dict(self) -> dict:
+        out = {"year": self.year, "week": self.week}
+        if self.start_date:
+            out["start_date"] = self.start_date
+        if self.end_date:
+            out["end_date"] = self.end_date
+        out.update(self.extra)
+        out["days"] = [day.to_dict() for day in self.days]
+        return out
@@ -0,0 +1,155 @@
+"""Whole-package purchase simulator with a pantry carried across weeks.
+
+Weekly cost estimates charge fractions of a package (0.37 of a 450 g tub).
+Here every product has a pantry of lots: a week's demand is taken from the
+oldest lot first, whole packages are bought only when stock runs short, and
+lots of perishable products are thrown away when their shelf life ends.
+Each lot remembers the price per unit it was bought at, so waste is valued
+even in weeks that don't buy or use the product. Each simulated week
+reports real spend and the value wasted.
+
+State is checkpointed after every week under a hash chain of the inputs so
+far, so re-running with one more week appended only simulates that week;
+changing an earlier week re-simulates from there on. Checkpoints can be
+saved to and loaded from a JSON file between runs.
+"""
+
+import hashlib
+import json
+import math
+from pathlib import Path
+from typing import NamedTuple
+
+CHECKPOINT_VERSION = 2
+
+
+class Package(NamedTuple):
+    size: float  # in the unit demand is expressed in (g, ml or count)
+    price_eur: float
+    shelf_weeks: int | None  # None: keeps indefinitely
+
+
+class Week(NamedTuple):
+    key: tuple[int, int]  # (year, week)
+    demand: dict[str, float]  # product → amount used this week
+    packages: dict[str, Package]  # product → package bought for it
+
+
+# product → lots as (amount left, index of the last week it is usable or None,
+# price per unit of amount)
+Pantry = dict[str, tuple[tuple[float, int | None, float], ...]]
+
+
+def _week_digest(prev: str, week: Week) -> str:
+    payload = json.dumps(
+        [week.key, sorted(week.demand.items()), sorted(week.packages.items())],
+        separators=(",", ":"),
+    )
+    return hashlib.blake2b((prev + payload).encode(), digest_size=16).hexdigest()
+
+
+def simulate_week(index: int, week: Week, pantry: Pantry) -> tuple[Pantry, dict]:
+    """Apply one week to `pantry`; returns the new pantry and the week's report."""
+    pantry = dict(pantry)
+    spend = waste = 0.0
+    bought: dict[str, int] = {}
+    wasted: dict[str, float] = {}
+
+    for product, need in week.demand.items():
+        pkg = week.packages[product]
+        lots = [list(lot) for lot in pantry.get(product, ())]
+        available = sum(lot[0] for lot in lots)
+        if need > available + 1e-9:
+            n = math.ceil((need - available) / pkg.size - 1e-9)
+            expires = None if pkg.shelf_weeks is None else index + pkg.shelf_weeks - 1
+            lots.append([n * pkg.size, expires, pkg.price_eur / pkg.size])
+            bought[product] = n
+            spend += n * pkg.price_eur
+        for lot in lots:  # oldest first
+            take = min(lot[0], need)
+            lot[0] -= take
+            need -= take
+        pantry[product] = tuple(tuple(lot) for lot in lots if lot[0] > 1e-9)
+
+    for product, lots in pantry.items():
+        kept = []
+        for amount, expires, unit_price in lots:
+            if expires is not None and expires <= index:
+                wasted[product] = wasted.get(product, 0.0) + amount
+                waste += amount * unit_price
+            else:
+                kept.append((amount, expires, unit_price))
+        pantry[product] = tuple(kept)
+
+    year, wk = week.key
+    report = {
+        "year": year,
+        "week": wk,
+        "spend_eur": round(spend, 2),
+        "waste_eur": round(waste, 2),
+        "bought": bought,
+        "wasted": {p: round(a, 1) for p, a in wasted.items()},
+    }
+    return {p: lots for p, lots in pantry.items() if lots}, report
+
+
+class PantrySimulator:
+    """Run weeks through the pantry, resuming from the last matching checkpoint."""
+
+    def __init__(self):
+        # One (digest, pantry after the week, report) per simulated week
+        self._checkpoints: list[tuple[str, Pantry, dict]] = []
+        self.simulated = 0  # weeks actually simulated by the last run()
+
+    def run(self, weeks: list[Week]) -> list[dict]:
+        """Reports for `weeks`, simulating only those past the reusable prefix."""
+        digests, prev = [], ""
+        for week in weeks:
+            prev = _week_digest(prev, week)
+            digests.append(prev)
+
+        keep = 0
+        for (digest, _pantry, _report), new in zip(self._checkpoints, digests, strict=False):
+            if digest != new:
+                break
+            keep += 1
+        del self._checkpoints[keep:]
+
+        pantry: Pantry = self._checkpoints[-1][1] if self._checkpoints else {}
+        for index in range(keep, len(weeks)):
+            pantry, report = simulate_week(index, weeks[index], pantry)
+            self._checkpoints.append((digests[index], pantry, report))
+        self.simulated = len(weeks) - keep
+        return [report for _digest, _pantry, report in self._checkpoints]
+
+    def pantry(self) -> Pantry:
+        """Stock left after the last simulated week."""
+        return self._checkpoints[-1][1] if self._checkpoints else {}
+
+    # -- persistence ----------------------------------------------------------
+
+    def save(self, path: Path):
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "checkpoints": [
+                {"digest": d, "pantry": {p: [list(lot) for lot in lots] for p, lots in pan.items()},
+                 "report": r}
+                for d, pan, r in self._checkpoints
+            ],
+        }  # fmt: skip
+        Path(path).write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "PantrySimulator":
+        """Simulator restored from `path`; an empty one if missing or outdated."""
+        sim = cls()
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return sim
+        if data.get("version") != CHECKPOINT_VERSION:
+            return sim
+        for cp in data["checkpoints"]:
+            pantry = {p: tuple(tuple(lot) for lot in lots) for p, lots in cp["pantry"].items()}
+            sim._checkpoints.append((cp["digest"], pantry, cp["report"]))
+        return sim
@@ -0,0 +1,321 @@
+"""Compiled plan store — every weekly plan in one indexed, memory-mapped file.
+
+The store is built from ``data/plans/**/W*.json`` (drafts excluded) and keyed
+by ``(year, week)``. Layout, little-endian:
+
+    header   magic, format version, record count
+    index    one fixed-width record per week, sorted by (year, week)
+    payload  compact JSON, one blob per week
+
+Each record remembers the source file's mtime and size, so ``refresh()`` only
+re-reads the week files that actually changed; unchanged blobs are copied
+straight from the previous mapping without being parsed.
+
+Week files that can't be stored (unreadable JSON, no integer year/week, a
+second file for the same week, a ``"draft": true`` inside) get a record too,
+with year 0 and the reason as payload, so they don't force a rebuild on every
+``refresh()`` until they change. They are logged and listed by ``skipped()``.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+from meal_planner.model import Plan
+
+log = logging.getLogger(__name__)
+
+STORE_NAME = ".plans.store"
+
+_MAGIC = b"MPS1"
+_VERSION = 3
+_HEADER = struct.Struct("<4sII")
+# year, week, payload offset, payload length, source mtime_ns, source size,
+# payload digest, start_date, end_date, source path relative to the plans dir
+_RECORD = struct.Struct("<HHQIqQ16s10s10s96s")
+_DRAFT = "draft"  # skip reason that isn't a problem
+
+
+def _is_draft(path: Path, plan: dict | None = None) -> bool:
+    return "draft" in path.name or bool(plan and plan.get("draft"))
+
+
+def _plan_problem(plan) -> str | None:
+    """Why a parsed week file can't be stored, or None if it can."""
+    if not isinstance(plan, dict):
+        return f"expected a JSON object, got {type(plan).__name__}"
+    for key, top in (("year", 0xFFFF), ("week", 53)):
+        value = plan.get(key)
+        if type(value) is not int or not 1 <= value <= top:
+            return f"{key} must be an integer from 1 to {top}, got {value!r}"
+    for key in ("start_date", "end_date"):
+        value = plan.get(key, "")
+        if not isinstance(value, str) or len(value.encode("utf-8")) > 10:
+            return f"{key} must be a YYYY-MM-DD date, got {value!r}"
+    return None
+
+
+def _pad(value: str, size: int) -> bytes:
+    raw = value.encode("utf-8")
+    if len(raw) > size:
+        raise ValueError(f"{value!r} does not fit in {size} bytes")
+    return raw.ljust(size, b"\0")
+
+
+def _unpad(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("utf-8")
+
+
+class PlanStore:
+    """Read weekly plans from a compiled store, rebuilding it incrementally."""
+
+    def __init__(self, plans_dir: Path, store_path: Path | None = None):
+        self.plans_dir = Path(plans_dir)
+        self.store_path = store_path or self.plans_dir / STORE_NAME
+        self._lock = threading.Lock()
+        self._buf: mmap.mmap | bytes = b""
+        self._index: dict[tuple[int, int], dict] = {}
+        self._skipped: dict[str, dict] = {}  # file → record of a week file left out
+        # (year, week) → (payload digest, value): a same-mtime rewrite still misses
+        self._parsed: dict[tuple[int, int], tuple[str, dict]] = {}
+        self._models: dict[tuple[int, int], tuple[str, Plan]] = {}
+        self._map_existing()
+
+    # -- public API ---------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """Recompile the store if any week file was added, changed or removed.
+
+        Returns True when the store was rebuilt.
+        """
+        with self._lock:
+            sources = self._scan_sources()
+            records = [*self._index.values(), *self._skipped.values()]
+            current = {rec["file"]: (rec["mtime_ns"], rec["size"]) for rec in records}
+            if self._buf and sources == current:
+                return False
+            self._rebuild(sources)
+            return True
+
+    def entries(self) -> list[dict]:
+        """Manifest-style entries for every stored week, oldest first."""
+        with self._lock:
+            index = self._index
+        return [
+            {k: rec[k] for k in ("year", "week", "file", "start_date", "end_date")}
+            for _key, rec in sorted(index.items())
+        ]
+
+    def get(self, year: int, week: int) -> dict | None:
+        """Return the plan for (year, week), parsing it at most once per version."""
+        with self._lock:
+            rec = self._index.get((year, week))
+            if rec is None:
+                return None
+            cached = self._parsed.get((year, week))
+            if cached and cached[0] == rec["digest"]:
+                return cached[1]
+            start = rec["offset"]
+            plan = json.loads(self._buf[start : start + rec["length"]])
+            self._parsed[(year, week)] = (rec["digest"], plan)
+            return plan
+
+    def model(self, year: int, week: int) -> Plan | None:
+        """The plan for (year, week) as a compact ``Plan``; its days parse on first use."""
+        with self._lock:
+            rec = self._index.get((year, week))
+            if rec is None:
+                return None
+            cached = self._models.get((year, week))
+            if cached and cached[0] == rec["digest"]:
+                return cached[1]
+            start = rec["offset"]
+            plan = Plan.from_json(
+                bytes(self._buf[start : start + rec["length"]]),
+                year,
+                week,
+                rec["start_date"],
+                rec["end_date"],
+            )
+            plan.digest = rec["digest"]
+            self._models[(year, week)] = (rec["digest"], plan)
+            return plan
+
+    def digest(self, year: int, week: int) -> str | None:
+        """Content hash of the stored plan, for keying derived views."""
+        with self._lock:
+            rec = self._index.get((year, week))
+        return rec["digest"] if rec else None
+
+    def skipped(self) -> dict[str, str]:
+        """Week files left out of the store (drafts aside) → why, for reporting."""
+        with self._lock:
+            return {
+                file: rec["reason"]
+                for file, rec in self._skipped.items()
+                if rec["reason"] != _DRAFT
+            }
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        with self._lock:
+            return key in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    # -- internals ----------------------------------------------------------
+
+    def _scan_sources(self) -> dict[str, tuple[int, int]]:
+        sources = {}
+        for path in sorted(self.plans_dir.rglob("W*.json")):
+            if _is_draft(path):
+                continue
+            st = path.stat()
+            sources[path.relative_to(self.plans_dir).as_posix()] = (st.st_mtime_ns, st.st_size)
+        return sources
+
+    def _map_existing(self):
+        """Map a previously compiled store file, ignoring it if unreadable."""
+        try:
+            with open(self.store_path, "rb") as fh:
+                buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        try:
+            self._index, self._skipped = self._read_index(buf)
+            self._buf = buf
+        except ValueError:
+            buf.close()
+
+    @staticmethod
+    def _read_index(buf) -> tuple[dict[tuple[int, int], dict], dict[str, dict]]:
+        magic, version, count = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("incompatible plan store")
+        index = {}
+        skipped = {}
+        for i in range(count):
+            year, week, offset, length, mtime_ns, size, digest, start, end, file = (
+                _RECORD.unpack_from(buf, _HEADER.size + i * _RECORD.size)
+            )
+            if year == 0:
+                skipped[_unpad(file)] = {
+                    "file": _unpad(file),
+                    "mtime_ns": mtime_ns,
+                    "size": size,
+                    "reason": bytes(buf[offset : offset + length]).decode("utf-8"),
+                }
+                continue
+            index[(year, week)] = {
+                "year": year,
+                "week": week,
+                "offset": offset,
+                "length": length,
+                "mtime_ns": mtime_ns,
+                "size": size,
+                "digest": digest.hex(),
+                "start_date": _unpad(start),
+                "end_date": _unpad(end),
+                "file": _unpad(file),
+            }
+        return index, skipped
+
+    def _rebuild(self, sources: dict[str, tuple[int, int]]):
+        previous = {rec["file"]: rec for rec in self._index.values()}
+        weeks: dict[tuple[int, int], tuple[dict, bytes]] = {}
+        # Skipped files are re-read on every rebuild: they're few, and a duplicate
+        # week may have become the only one
+        skipped: dict[str, tuple[dict, bytes]] = {}
+
+        def skip(file: str, mtime_ns: int, size: int, reason: str):
+            if reason != _DRAFT:
+                log.warning("Plan store: skipping %s: %s", file, reason)
+            meta = {"year": 0, "week": len(skipped) + 1, "start_date": "", "end_date": ""}
+            meta.update(file=file, mtime_ns=mtime_ns, size=size)
+            skipped[file] = (meta, reason.encode("utf-8"))
+
+        for file, (mtime_ns, size) in sources.items():
+            old = previous.get(file)
+            if old and (old["mtime_ns"], old["size"]) == (mtime_ns, size):
+                blob = bytes(self._buf[old["offset"] : old["offset"] + old["length"]])
+                meta = {k: old[k] for k in ("year", "week", "start_date", "end_date")}
+            else:
+                try:
+                    plan = json.loads((self.plans_dir / file).read_bytes())
+                except (OSError, ValueError) as exc:
+                    skip(file, mtime_ns, size, f"unreadable: {exc}")
+                    continue
+                problem = _plan_problem(plan)
+                if _is_draft(Path(file), plan if isinstance(plan, dict) else None):
+                    problem = _DRAFT
+                if problem:
+                    skip(file, mtime_ns, size, problem)
+                    continue
+                blob = json.dumps(plan, ensure_ascii=False, separators=(",", ":")).encode()
+                meta = {
+                    "year": plan["year"],
+                    "week": plan["week"],
+                    "start_date": plan.get("start_date", ""),
+                    "end_date": plan.get("end_date", ""),
+                }
+            key = (meta["year"], meta["week"])
+            if key in weeks:
+                skip(file, mtime_ns, size, f"same year and week as {weeks[key][0]['file']}")
+                continue
+            meta.update(file=file, mtime_ns=mtime_ns, size=size)
+            weeks[key] = (meta, blob)
+
+        ordered = [*sorted(weeks.items()), *skipped.items()]
+        offset = _HEADER.size + len(ordered) * _RECORD.size
+        header = [_HEADER.pack(_MAGIC, _VERSION, len(ordered))]
+        payload = []
+        for _key, (meta, blob) in ordered:
+            header.append(
+                _RECORD.pack(
+                    meta["year"],
+                    meta["week"],
+                    offset,
+                    len(blob),
+                    meta["mtime_ns"],
+                    meta["size"],
+                    hashlib.blake2b(blob, digest_size=16).digest(),
+                    _pad(meta["start_date"], 10),
+                    _pad(meta["end_date"], 10),
+                    _pad(meta["file"], 96),
+                )
+            )
+            payload.append(blob)
+            offset += len(blob)
+        compiled = b"".join(header + payload)
+
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._buf = self._write(compiled)
+        self._index, self._skipped = self._read_index(self._buf)
+        self._parsed = {
+            key: cached
+            for key, cached in self._parsed.items()
+            if key in self._index and self._index[key]["digest"] == cached[0]
+        }
+        self._models = {
+            key: cached
+            for key, cached in self._models.items()
+            if key in self._index and self._index[key]["digest"] == cached[0]
+        }
+
+    def _write(self, compiled: bytes) -> mmap.mmap | bytes:
+        """Persist the compiled store atomically; keep it in memory if the disk is read-only."""
+        tmp = self.store_path.with_suffix(".tmp")
+        try:
+            tmp.write_bytes(compiled)
+            os.replace(tmp, self.store_path)
+            with open(self.store_path, "rb") as fh:
+                return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return compiled
@@ -0,0 +1,138 @@
+"""Quantity normalization shared by the grocery tab and the cost calculator.
+
+Every ``quantity`` string in a plan ("250g", "2 rebanadas", "½ cdta",
+"1 lata (120g)", "pinch", ...) is turned into a ``Quantity`` record:
+
+    amount  numeric amount as written (None if unparseable)
+    unit    canonical unit: "g", "ml", "cda", "cdta", "pinch" or "count"
+            ("" when the string could not be understood)
+    grams   weight in grams when it follows from the string alone, else None
+    label   the unit text as written, for display ("rebanadas", "unidad", ...)
+
+Strings are lexed by a single precompiled regex and memoized: plans reuse a
+few dozen distinct quantity strings, so almost every call is a dict hit.
+"""
+
+import re
+import sys
+from typing import NamedTuple
+
+
+class Quantity(NamedTuple):
+    amount: float | None
+    unit: str
+    grams: float | None
+    label: str
+
+
+FRACTIONS = {
+    "½": 0.5,
+    "¼": 0.25,
+    "¾": 0.75,
+    "⅓": 0.333,
+    "⅔": 0.667,
+}
+
+# Unit word (lower-case, as written) → canonical unit
+UNIT_ALIASES = {
+    "g": "g",
+    "gr": "g",
+    "gramos": "g",
+    "ml": "ml",
+    "cda": "cda",
+    "cdas": "cda",
+    "tbsp": "cda",
+    "cdta": "cdta",
+    "cdtas": "cdta",
+    "tsp": "cdta",
+    "pinch": "pinch",
+    "pizca": "pinch",
+}
+_COUNT_WORDS = [
+    "unidad", "unidades", "rebanada", "rebanadas", "slice", "slices",
+    "grande", "grandes", "large", "mediano", "medianos", "mediana", "medianas", "medium",
+    "pot", "vasito", "vasitos", "cup", "cups", "taza", "tazas",
+    "lata", "latas", "can", "comida", "meal",
+]  # fmt: skip
+UNIT_ALIASES.update(dict.fromkeys(_COUNT_WORDS, "count"))
+
+# Grams per canonical unit, where the unit alone determines weight
+GRAMS_PER = {"g": 1.0, "ml": 1.0, "cda": 15.0, "cdta": 5.0, "pinch": 0.5}
+
+_FRAC_CHARS = "".join(FRACTIONS)
+_LEXER = re.compile(
+    rf"""
+    ^\s*
+    (?:
+        (?P<num>\d+)\s*/\s*(?P<den>\d+)                     # 1/2
+      | (?P<whole>\d+(?:[.,]\d+)?)?\s*(?P<frac>[{_FRAC_CHARS}])  # ½, 1½
+      | (?P<dec>\d+(?:[.,]\d+)?)                            # 2, 1.5, 250
+    )?
+    \s*
+    (?P<rest>
+        (?P<word>[^\W\d]*)                                  # g, rebanadas, cdta
+        [^(]*?
+        (?:\(\s*(?P<pnum>\d+(?:[.,]\d+)?)\s*(?P<punit>g|ml)\s*\))?  # (120g)
+    )
+    \s*$
+    """,
+    re.VERBOSE,
+)
+
+_UNKNOWN_UNIT = ""
+_cache: dict[str, Quantity] = {}
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", "."))
+
+
+def _lex(qty_str: str) -> Quantity:
+    """Parse one quantity string without consulting the memo cache."""
+    m = _LEXER.match(qty_str)
+    if not m or not qty_str.strip():
+        return Quantity(None, _UNKNOWN_UNIT, None, qty_str)
+
+    if m["num"]:
+        amount = int(m["num"]) / int(m["den"]) if int(m["den"]) else None
+    elif m["frac"]:
+        amount = (_number(m["whole"]) if m["whole"] else 0.0) + FRACTIONS[m["frac"]]
+    elif m["dec"]:
+        amount = _number(m["dec"])
+    else:
+        amount = None
+
+    known = UNIT_ALIASES.get(m["word"].lower())
+    if amount is None:
+        if known is None:
+            return Quantity(None, _UNKNOWN_UNIT, None, qty_str)
+        amount = 1.0  # "pinch", "slice"
+    unit = known or "count"  # "2", "3 huevos"
+    label = m["rest"].strip() or "unidad"
+
+    if m["pnum"]:
+        grams = amount * _number(m["pnum"])  # "1 lata (120g)"
+    elif unit in GRAMS_PER:
+        grams = amount * GRAMS_PER[unit]
+    else:
+        grams = None
+    return Quantity(amount, unit, grams, label)
+
+
+def parse(qty_str: str) -> Quantity:
+    """Normalize a plan ``quantity`` string, memoized per distinct string."""
+    try:
+        return _cache[qty_str]
+    except KeyError:
+        pass
+    quantity = _lex(qty_str)
+    _cache[sys.intern(qty_str)] = quantity
+    return quantity
+
+
+def cache_size() -> int:
+    return len(_cache)
+
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,362 @@
+"""Albert Heijn receipt (kassabon) parser and indexed receipt store.
+
+The ``AH_kassabon_<date> <time>_<store>.txt`` files are text dumps of the
+receipt PDFs: one token per line, blank lines in between, and the AANTAL /
+OMSCHRIJVING / PRIJS / BEDRAG columns flattened into a stream. Rows are read
+back with a small state machine: a quantity, a product name, the unit price
+and — for quantities above one — the row total, which must equal qty × price
+(anything else is an orphan from a scrambled column). When the dump lost a
+row's prices (it happens), the item is kept with ``unit_price = None``.
+
+Everything after SUBTOTAAL is the footer. Discount lines come as a label
+(BONUS, BBOX, KRAS, "35% K"), the campaign name and a negative amount. Each
+discount goes to the item with the longest word start (four characters or
+more) found in the campaign name: "FRIKANDEL" in "AHFRIKANDELB", "ACTI" of
+"DAN ACTIMEL" in "ALLEACTIVIA". Items flagged as discounted win a tie of
+length, and a remaining tie splits it by row total. A discount that matches
+no item stays on the receipt. Prices the dump moved into the footer are put
+back on an unpriced multi-quantity row when one pair fits qty × price = total.
+The footer also gives the savings stamps (KOOPZEGELS) and the amount paid.
+``parsed_total_eur`` adds it all back up, and a receipt that doesn't come
+within ``TOTAL_TOLERANCE`` of ``total_eur`` is logged.
+
+``ingest_directory`` parses new or changed receipts (by SHA-256) in a process
+pool and writes ``receipts.json``: every receipt's line items plus a
+``prices`` index with the latest observed unit price per product name,
+after discounts (``list_price`` keeps the shelf price).
+Run with ``uv run python -m meal_planner.receipts [data/receipts]``.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sys
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+STORE_NAME = "receipts.json"
+STORE_VERSION = 2
+RECEIPT_GLOB = "AH_kassabon_*.txt"
+TOTAL_TOLERANCE = 0.05  # euros between the parsed items and TOTAAL
+
+_FILENAME_RE = re.compile(r"AH_kassabon_(\d{4}-\d{2}-\d{2}) (\d{6})_(\d+)\.txt$")
+_QTY_RE = re.compile(r"^\d{1,3}$")
+_PRICE_RE = re.compile(r"^(-?\d+,\d{2})(?:\s+(\S+))?$")
+_HEADER_TOKENS = {"AANTAL", "OMSCHRIJVING", "PRIJS BEDRAG", "BONUSKAART", "AIRMILES NR. *"}
+_DEPOSIT = "+STATIEGELD"
+_STAMPS = "KOOPZEGELS"
+_NOT_ALNUM = re.compile(r"[^A-Z0-9]+")
+_MIN_MATCH = 4  # shortest word start that ties a discount to an item
+
+
+def _price(text: str) -> float:
+    return float(text.replace(",", "."))
+
+
+def parse_filename(path: Path) -> dict:
+    """Store number and ISO timestamp encoded in a kassabon filename."""
+    m = _FILENAME_RE.search(Path(path).name)
+    if not m:
+        return {"store": None, "timestamp": None}
+    day, hhmmss, store = m.groups()
+    ts = datetime.strptime(f"{day} {hhmmss}", "%Y-%m-%d %H%M%S")
+    return {"store": store, "timestamp": ts.isoformat()}
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[dict]:
+    """Yield line items from a receipt's text lines, one at a time.
+
+    Each item is {"product", "quantity", "unit_price", "total", "flags"}; a
+    bottle deposit (+STATIEGELD) is added to the preceding item as "deposit".
+    Stops at SUBTOTAAL.
+    """
+    item: dict | None = None
+    qty: int | None = None
+    after_deposit = False
+    started = False
+
+    for raw in lines:
+        token = raw.strip()
+        if not token:
+            continue
+        if token == "SUBTOTAAL":
+            break
+        if token in _HEADER_TOKENS or token.startswith("xx"):
+            started = started or token == "BONUSKAART"
+            continue
+        if not started:
+            if _QTY_RE.match(token):
+                qty = int(token)  # some dumps put the first quantity inside the header
+            continue
+
+        if token == _DEPOSIT:
+            after_deposit = True
+            continue
+        price = _PRICE_RE.match(token)
+        if price:
+            amount = _price(price.group(1))
+            if after_deposit:
+                if item is not None:
+                    item["deposit"] = round(item.get("deposit", 0) + amount, 2)
+                after_deposit = False
+            elif item is not None and item["unit_price"] is None:
+                item["unit_price"] = amount
+                item["total"] = round(amount * item["quantity"], 2)
+                item["flags"] = price.group(2) or ""
+            elif item is not None and abs(amount - (item["total"] or 0)) < 0.005:
+                item["flags"] = price.group(2) or item["flags"]  # the BEDRAG column
+            continue
+
+        after_deposit = False
+        if _QTY_RE.match(token):
+            qty = int(token)
+            continue
+        if item is not None:
+            yield item
+        item = {
+            "product": token,
+            "quantity": qty or 1,
+            "unit_price": None,
+            "total": None,
+            "flags": "",
+        }
+        qty = None
+
+    if item is not None:
+        yield item
+
+
+def parse_footer(lines: Iterable[str]) -> dict:
+    """Read the lines after SUBTOTAAL, up to the amount paid.
+
+    Returns {"discounts", "prices", "stamps", "total"}: the discount lines as
+    {"kind", "name", "amount"} (amount negative), the other prices in order
+    (rows the dump moved here, mixed with footer amounts), the KOOPZEGELS
+    amount and the first TOTAAL.
+    """
+    footer = {"discounts": [], "prices": [], "stamps": 0.0, "total": None}
+    recent: list[str] = []
+    expect = None
+    for raw in lines:
+        token = raw.strip()
+        if not token:
+            continue
+        price = _PRICE_RE.match(token)
+        if price is None:
+            expect = token if token in ("SUBTOTAAL", _STAMPS, "TOTAAL") else None
+            recent = [*recent[-1:], token]
+            continue
+        amount = _price(price.group(1))
+        if expect == "TOTAAL":
+            footer["total"] = amount
+            break
+        if expect == _STAMPS:
+            footer["stamps"] = amount
+        elif amount < 0 and len(recent) == 2:
+            kind, name = recent
+            footer["discounts"].append({"kind": kind, "name": name, "amount": amount})
+        elif amount > 0 and expect is None:
+            footer["prices"].append((amount, price.group(2) or ""))
+        expect = None
+        recent = []
+    return footer
+
+
+def _compact(name: str) -> str:
+    return _NOT_ALNUM.sub("", name.upper())
+
+
+def _overlap(campaign: str, product: str) -> int:
+    """Length of the longest start of a `product` word found in `campaign`."""
+    best = 0
+    for word in product.split():
+        word = _compact(word)
+        size = next((n for n in range(len(word), best, -1) if word[:n] in campaign), 0)
+        best = max(best, size)
+    return best
+
+
+def _apply_discount(items: list[dict], discount: dict) -> bool:
+    """Add `discount` to the item(s) it names; False when none matches."""
+    name = _compact(discount["name"])
+    best, matches = (_MIN_MATCH, False), []
+    for item in items:
+        key = (_overlap(name, item["product"]), bool(item["flags"]))
+        if key > best:
+            best, matches = key, []
+        if key == best:
+            matches.append(item)
+    if not matches:
+        return False
+    weights = [item["total"] or 0 for item in matches]
+    if not sum(weights):
+        weights = [1] * len(matches)
+    left = discount["amount"]
+    for i, item in enumerate(matches):
+        share = left if i == len(matches) - 1 else discount["amount"] * weights[i] / sum(weights)
+        share = round(share, 2)
+        item["discount"] = round(item.get("discount", 0) + share, 2)
+        left = round(left - share, 2)
+    return True
+
+
+def _restore_prices(items: list[dict], prices: list[tuple[float, str]]):
+    """Put prices moved into the footer back on unpriced multi-quantity rows."""
+    prices = list(prices)
+    for item in items:
+        if item["unit_price"] is not None or item["quantity"] < 2:
+            continue
+        pair = next(
+            (
+                (i, j)
+                for i, (unit, _flags) in enumerate(prices)
+                for j in range(i + 1, len(prices))
+                if abs(unit * item["quantity"] - prices[j][0]) < 0.005
+            ),
+            None,
+        )
+        if pair:
+            i, j = pair
+            item["unit_price"] = prices[i][0]
+            item["total"] = prices[j][0]
+            item["flags"] = prices[j][1] or prices[i][1]
+            del prices[j], prices[i]
+
+
+def parse_receipt(path: Path) -> dict:
+    """Parse one receipt file into a structured record."""
+    path = Path(path)
+    with open(path, encoding="utf-8") as fh:
+        items = list(parse_lines(fh))
+        footer = parse_footer(fh)  # continues after SUBTOTAAL
+    _restore_prices(items, footer["prices"])
+    unmatched = [d for d in footer["discounts"] if not _apply_discount(items, d)]
+    parsed = sum(
+        (item["total"] or 0) + item.get("deposit", 0) + item.get("discount", 0) for item in items
+    )
+    parsed += sum(d["amount"] for d in unmatched) + footer["stamps"]
+    return {
+        **parse_filename(path),
+        "total_eur": footer["total"],
+        "parsed_total_eur": round(parsed, 2),
+        "stamps_eur": footer["stamps"],
+        "discounts": unmatched,
+        "items": items,
+    }
+
+
+def _reconciles(record: dict) -> bool:
+    if record["total_eur"] is None:
+        return False
+    return abs(record["parsed_total_eur"] - record["total_eur"]) <= TOTAL_TOLERANCE
+
+
+def _hash_and_parse(path: Path) -> tuple[str, dict]:
+    digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    return digest, parse_receipt(path)
+
+
+def build_price_index(receipts: dict[str, dict]) -> dict[str, dict]:
+    """Latest observed unit price per product name across all receipts.
+
+    ``unit_price`` is what was paid per unit after the item's discounts;
+    ``list_price`` is the price on the receipt row.
+    """
+    prices: dict[str, dict] = {}
+    for rec in sorted(receipts.values(), key=lambda r: r.get("timestamp") or ""):
+        for item in rec["items"]:
+            if item["unit_price"] is None:
+                continue
+            paid = item["total"] + item.get("discount", 0)
+            entry = prices.setdefault(item["product"], {"seen": 0})
+            entry.update(
+                unit_price=round(paid / item["quantity"], 2),
+                list_price=item["unit_price"],
+                timestamp=rec["timestamp"],
+                store=rec["store"],
+                seen=entry["seen"] + 1,
+            )
+    return dict(sorted(prices.items()))
+
+
+def load_store(receipts_dir: Path) -> dict:
+    """Read the compiled receipt store, or an empty one if it doesn't exist."""
+    try:
+        store = json.loads((Path(receipts_dir) / STORE_NAME).read_text())
+        if store.get("version") == STORE_VERSION:
+            return store
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {"version": STORE_VERSION, "receipts": {}, "prices": {}}
+
+
+def ingest_directory(receipts_dir: Path, workers: int | None = None) -> dict:
+    """Parse new/changed receipts in parallel and rewrite the store if needed.
+
+    Unchanged files (same SHA-256 as in the store) are not re-parsed.
+    """
+    receipts_dir = Path(receipts_dir)
+    store = load_store(receipts_dir)
+    known = store["receipts"]
+    files = sorted(receipts_dir.glob(RECEIPT_GLOB))
+
+    changed = []
+    current = {}
+    for path in files:
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        current[path.name] = digest
+        if known.get(path.name, {}).get("sha256") != digest:
+            changed.append(path)
+
+    removed = set(known) - set(current)
+    if not changed and not removed:
+        return store
+
+    if len(changed) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_hash_and_parse, changed))
+    else:
+        parsed = [_hash_and_parse(path) for path in changed]
+
+    receipts = {name: rec for name, rec in known.items() if name in current}
+    for path, (digest, record) in zip(changed, parsed, strict=True):
+        receipts[path.name] = {"sha256": digest, **record}
+        if not _reconciles(record):
+            log.warning(
+                "Receipt %s: items add up to %.2f, TOTAAL is %s",
+                path.name,
+                record["parsed_total_eur"],
+                record["total_eur"],
+            )
+
+    store = {
+        "version": STORE_VERSION,
+        "receipts": dict(sorted(receipts.items())),
+        "prices": build_price_index(receipts),
+    }
+    (receipts_dir / STORE_NAME).write_text(
+        json.dumps(store, ensure_ascii=False, indent=1) + "\n", encoding="utf-8"
+    )
+    return store
+
+
+def main():
+    receipts_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data/receipts")
+    store = ingest_directory(receipts_dir)
+    receipts = store["receipts"]
+    n_items = sum(len(r["items"]) for r in receipts.values())
+    unpriced = sum(1 for r in receipts.values() for i in r["items"] if i["unit_price"] is None)
+    print(f"{len(receipts)} receipts, {n_items} line items ({unpriced} without price)")
+    print(f"{len(store['prices'])} products in the price index")
+    off = sorted(name for name, r in receipts.items() if not _reconciles(r))
+    if off:
+        print(f"{len(off)} receipts don't add up to their TOTAAL: {', '.join(off)}")
+
+
+if __name__ == "__main__":
+    main()
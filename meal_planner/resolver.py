@@ -0,0 +1,123 @@
+"""Fuzzy ingredient-name → catalog-key resolver with a trigram index.
+
+Plans name the same food in different ways ("Plátano", "Platano",
+"Banana", "Tortita de arroz" / "Tortitas de arroz"). Names are normalized
+(case, accents, punctuation) and looked up exactly first, then through an
+alias table (e.g. English names), and finally by character-trigram
+similarity against every catalog key and alias. A fuzzy match must also
+agree word by word: every content word (not "de", "con", ...) on either
+side needs a close counterpart on the other, so "Tortitas de arroz" still
+finds "Tortita de arroz" but "Pechuga de pollo" never lands on "Pechuga de
+pavo". The index is built once; a fuzzy lookup only scores candidates that
+share a trigram with the query (posting lists), and every result — misses
+included — is memoized.
+"""
+
+import re
+import sys
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+# Words that don't tell foods apart (Spanish, English, Dutch)
+_STOPWORDS = frozenset(
+    "a al con de del el en la las los y and of the with het met van".split()  # noqa: SIM905
+)
+
+
+def normalize(name: str) -> str:
+    """Lower-case, accent-free, punctuation-free form used for matching."""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    ascii_name = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", ascii_name).strip()
+
+
+def trigrams(norm: str) -> set[str]:
+    """Character trigrams of a normalized name, padded so short words count."""
+    padded = f"  {norm} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: set[str], b: set[str]) -> float:
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def _content_words(norm: str) -> list[set[str]]:
+    return [trigrams(word) for word in norm.split() if word not in _STOPWORDS]
+
+
+def _same_words(a: list[set[str]], b: list[set[str]], threshold: float) -> bool:
+    """Every content word of each name has a similar word in the other."""
+    return all(any(_dice(x, y) >= threshold for y in b) for x in a) and all(
+        any(_dice(x, y) >= threshold for x in a) for y in b
+    )
+
+
+class IngredientResolver:
+    """Map free-form ingredient names to keys of a catalog (e.g. products.json)."""
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        aliases: dict[str, str] | None = None,
+        threshold: float = 0.72,
+    ):
+        self.threshold = threshold
+        self._exact: dict[str, str] = {}
+        self._targets: list[str] = []  # indexed name → canonical key
+        self._sizes: list[int] = []
+        self._words: list[list[set[str]]] = []
+        self._postings: dict[str, list[int]] = {}
+        self._memo: dict[str, str | None] = {}
+        self.keys = list(dict.fromkeys(keys))
+
+        names = [(key, key) for key in self.keys]
+        names += [(alias, key) for alias, key in (aliases or {}).items() if key in self.keys]
+        for name, key in names:
+            norm = normalize(name)
+            if not norm or norm in self._exact:
+                continue
+            self._exact[norm] = key
+            grams = trigrams(norm)
+            idx = len(self._targets)
+            self._targets.append(key)
+            self._sizes.append(len(grams))
+            self._words.append(_content_words(norm))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(idx)
+
+    def resolve(self, name: str) -> str | None:
+        """Catalog key for `name`, or None when nothing is similar enough."""
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+        key = self._lookup(name)
+        self._memo[sys.intern(name)] = key
+        return key
+
+    def _lookup(self, name: str) -> str | None:
+        norm = normalize(name)
+        if norm in self._exact:
+            return self._exact[norm]
+        grams = trigrams(norm)
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        scored = []
+        for idx, n in shared.items():
+            score = 2 * n / (len(grams) + self._sizes[idx])  # Dice coefficient
+            if score >= self.threshold:
+                scored.append((score, idx))
+        words = _content_words(norm)
+        for _score, idx in sorted(scored, reverse=True):
+            if _same_words(words, self._words[idx], self.threshold):
+                return self._targets[idx]
+        return None
+
+    def cache_size(self) -> int:
+        return len(self._memo)
+
+    def clear_cache(self):
+        self._memo.clear()
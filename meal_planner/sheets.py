@@ -0,0 +1,203 @@
+"""Concurrent, conditional fetching of published Google Sheet CSVs.
+
+All configured sheets are requested at once on a small thread pool as soon
+as the script starts, instead of one blocking ``urlopen`` per tab. Each
+response's ``ETag`` / ``Last-Modified`` is remembered so the next refresh is
+a conditional request: an unchanged sheet answers ``304 Not Modified`` and
+the cached body is reused without being downloaded again.
+
+A body only replaces the copy (and its snapshot) once it looks like the
+CSV export: a ``text/csv`` Content-Type when one is sent, no HTML, and a
+header row. A sheet that stops being published answers 200 with a sign-in
+page, which counts as a failed refresh instead.
+
+With a ``snapshot_dir`` the last good copy of every sheet is also kept on
+disk, so it survives restarts. Reads are stale-while-revalidate: whenever
+any copy exists — in memory or in a snapshot — it is returned at once and
+the refresh runs in the background. Only a sheet never fetched before waits
+for the network.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+from typing import NamedTuple
+
+
+class _Copy(NamedTuple):
+    checked_at: float  # last refresh attempt, successful or not
+    fetched_at: float  # last time the server confirmed this body (200 or 304)
+    body: str
+    etag: str | None
+    last_modified: str | None
+
+
+def _check_csv(body: str, content_type: str | None):
+    """Raise ValueError unless `body` looks like a published sheet's CSV export."""
+    media_type = (content_type or "text/csv").partition(";")[0].strip().lower()
+    if media_type != "text/csv":
+        raise ValueError(f"expected a CSV export, got {media_type}")
+    if body.lstrip().startswith("<"):
+        raise ValueError("expected a CSV export, got HTML")
+    try:
+        header = next(csv.reader(StringIO(body)), [])
+    except csv.Error as exc:
+        raise ValueError(f"unreadable CSV: {exc}") from exc
+    if not any(cell.strip() for cell in header):
+        raise ValueError("expected a CSV export, got no header row")
+
+
+class SheetFetcher:
+    """Prefetch sheet CSVs in parallel and keep them fresh for `max_age` seconds."""
+
+    def __init__(
+        self,
+        max_age: float = 300,
+        timeout: float = 10,
+        max_workers: int = 4,
+        snapshot_dir: Path | None = None,
+    ):
+        self.max_age = max_age
+        self.timeout = timeout
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheet-fetch")
+        self._lock = threading.Lock()
+        self._pending: dict[str, Future] = {}
+        self._cache: dict[str, _Copy] = {}
+        self.stats = {"cached": 0, "stale": 0, "downloaded": 0, "not_modified": 0, "errors": 0}
+
+    def prefetch(self, urls: Iterable[str]):
+        """Start fetching every stale URL in the background; returns immediately."""
+        for url in urls:
+            self._submit(url)
+
+    def get(self, url: str) -> str:
+        """Return the sheet body, waiting for the network only if there is no copy yet.
+
+        A stale copy is returned while it refreshes in the background, and a
+        failed refresh keeps serving it; the underlying exception is raised
+        only when there is no earlier copy.
+        """
+        future = self._submit(url)
+        with self._lock:
+            cached = self._cache.get(url)
+            if cached and not future.done():
+                self.stats["stale"] += 1
+                return cached.body
+        return future.result()
+
+    def age(self, url: str) -> float | None:
+        """Seconds since the copy being served was fetched, or None if there is none."""
+        with self._lock:
+            cached = self._cache.get(url)
+        return time.time() - cached.fetched_at if cached else None
+
+    def _submit(self, url: str) -> Future:
+        with self._lock:
+            future = self._pending.get(url)
+            if future is not None:
+                return future
+            cached = self._cache.get(url)
+            if cached is None:
+                cached = self._read_snapshot(url)
+                if cached:
+                    self._cache[url] = cached
+            if cached and time.time() - cached.checked_at < self.max_age:
+                self.stats["cached"] += 1
+                done: Future = Future()
+                done.set_result(cached.body)
+                return done
+            future = self._pool.submit(self._fetch, url)
+            self._pending[url] = future
+        # Outside the lock: a future that is already done runs the callback right here
+        future.add_done_callback(lambda _f: self._forget(url))
+        return future
+
+    def _forget(self, url: str):
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def _fetch(self, url: str) -> str:
+        with self._lock:
+            cached = self._cache.get(url)
+        now = time.time()
+        try:
+            request = urllib.request.Request(url)  # noqa: S310
+            if cached:
+                if cached.etag:
+                    request.add_header("If-None-Match", cached.etag)
+                if cached.last_modified:
+                    request.add_header("If-Modified-Since", cached.last_modified)
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:  # noqa: S310
+                body = response.read().decode("utf-8")
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                _check_csv(body, response.headers.get("Content-Type"))
+            copy = _Copy(now, now, body, etag, last_modified)
+            outcome = "downloaded"
+        except Exception as exc:
+            if not cached:
+                self._count("errors")
+                raise
+            # 304 Not Modified, or a failed refresh: keep serving the copy we have
+            not_modified = isinstance(exc, urllib.error.HTTPError) and exc.code == 304
+            outcome = "not_modified" if not_modified else "errors"
+            fetched_at = now if not_modified else cached.fetched_at
+            copy = cached._replace(checked_at=now, fetched_at=fetched_at)
+        with self._lock:
+            self.stats[outcome] += 1
+            self._cache[url] = copy
+        if outcome != "errors":
+            self._write_snapshot(url, copy)
+        return copy.body
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self.stats[outcome] += 1
+
+    # -- on-disk snapshots ----------------------------------------------------
+
+    def _snapshot_path(self, url: str) -> Path:
+        name = hashlib.blake2b(url.encode(), digest_size=12).hexdigest()
+        return self.snapshot_dir / f"{name}.json"
+
+    def _read_snapshot(self, url: str) -> _Copy | None:
+        if self.snapshot_dir is None:
+            return None
+        try:
+            data = json.loads(self._snapshot_path(url).read_text(encoding="utf-8"))
+            if data.get("url") != url:
+                return None
+            # Loaded from disk: serve it, but refresh on first use
+            return _Copy(0.0, data["fetched_at"], data["body"], data["etag"], data["last_modified"])
+        except (OSError, ValueError, KeyError, AttributeError):
+            return None
+
+    def _write_snapshot(self, url: str, copy: _Copy):
+        """Persist the last good copy atomically; a read-only disk just skips it."""
+        if self.snapshot_dir is None:
+            return
+        path = self._snapshot_path(url)
+        data = {
+            "url": url,
+            "fetched_at": copy.fetched_at,
+            "etag": copy.etag,
+            "last_modified": copy.last_modified,
+            "body": copy.body,
+        }
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
@@ -0,0 +1,259 @@
+"""Local mirror and write-behind queue for the Stock worksheet.
+
+The sheet holds one week: a header row, then one row per ingredient
+(``ingrediente``, ``en_casa``, ``semana`` on the first row only, ``version``
+likewise). ``StockMirror`` keeps a copy of its values with a name → row
+index. The version cell is ``<layout>.<revision>``: a reset writes a new
+layout, every batch of toggles a new revision. Within ``ttl`` seconds of its
+last check the mirror is reused as is; after that it reads ``B2:D<n>`` (the
+en_casa column plus the header cells, one small range) and, while the week
+and layout still match, takes the en_casa values and version from it — that
+also picks up ticks made by hand in the sheet, which bump no version.
+Anything else — another week, another layout, a sheet written without a
+version — re-reads the whole sheet. Rows and names belong to the app: a row
+added or renamed by hand is only seen after the next reset or full read.
+
+Checkbox callbacks only record the new value; a background thread waits a
+short debounce window, merges everything toggled meanwhile (last value per
+ingredient wins) and writes it with a single ``batch_update`` that also
+bumps the revision. Row numbers come from the mirror, so no
+``worksheet.find`` is needed. Failed writes stay queued and are retried
+with exponential backoff, up to ``max_retries`` times in a row; then the
+batch is dropped, counted in ``stats["dropped"]`` and its error kept in
+``last_error`` for the app to show.
+"""
+
+import secrets
+import threading
+import time
+
+HEADER = ["ingrediente", "en_casa", "semana", "version"]
+STOCK_COLUMN = "B"
+VERSION_CELL = "D2"
+
+
+def _token() -> str:
+    return secrets.token_hex(4)
+
+
+class StockMirror:
+    """Local copy of the Stock worksheet, validated through its en_casa column and version."""
+
+    def __init__(self, worksheet, ttl: float = 30.0):
+        self.worksheet = worksheet
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rows: list[list[str]] | None = None
+        self._index: dict[str, int] = {}
+        self._version = ""
+        self._checked = 0.0  # time.monotonic() of the last read or check
+        self.stats = {"hits": 0, "checks": 0, "changed": 0, "full_reads": 0}
+
+    def values(self) -> list[list[str]]:
+        """Sheet values (header row included), read from the API only when stale."""
+        with self._lock:
+            if self._rows is None:
+                self._read_all()
+            elif time.monotonic() - self._checked >= self.ttl:
+                self._validate()
+            else:
+                self.stats["hits"] += 1
+            return [list(row) for row in self._rows]
+
+    def row_of(self, name: str) -> int | None:
+        """Sheet row of `name` (1-based), from the local index."""
+        with self._lock:
+            if self._rows is None:
+                self._read_all()
+            return self._index.get(name)
+
+    def refresh(self):
+        """Re-read the whole sheet."""
+        with self._lock:
+            self._read_all()
+
+    def reset(self, week: str, state: dict[str, bool]):
+        """Replace the sheet with `week`'s ingredients (sorted) and their stock state."""
+        version = f"{_token()}.{_token()}"
+        rows = [list(HEADER)]
+        for i, name in enumerate(sorted(state)):
+            first = i == 0
+            checked = "TRUE" if state[name] else "FALSE"
+            rows.append([name, checked, week if first else "", version if first else ""])
+        with self._lock:
+            self.worksheet.clear()
+            self.worksheet.update(range_name="A1", values=rows)
+            self._store(rows)
+
+    def next_version(self) -> str:
+        """A new revision of the current layout, for a write to stamp."""
+        with self._lock:
+            layout = self._version.partition(".")[0] or _token()
+        return f"{layout}.{_token()}"
+
+    def applied(self, changes: dict[str, bool], version: str):
+        """Record en_casa values just written along with `version`."""
+        with self._lock:
+            if self._rows is None:
+                return
+            for name, checked in changes.items():
+                row = self._index.get(name)
+                if row is not None:
+                    self._rows[row - 1][1] = "TRUE" if checked else "FALSE"
+            if len(self._rows) > 1:
+                self._rows[1][3] = version
+            self._version = version
+
+    # -- reads ----------------------------------------------------------------
+
+    def _store(self, rows: list[list[str]]):
+        self._rows = [row + [""] * (len(HEADER) - len(row)) for row in rows]
+        self._index = {row[0]: i for i, row in enumerate(self._rows, start=1) if i > 1 and row[0]}
+        self._version = self._rows[1][3] if len(self._rows) > 1 else ""
+        self._checked = time.monotonic()
+
+    def _read_all(self):
+        self._store(self.worksheet.get_all_values())
+        self.stats["full_reads"] += 1
+
+    def _validate(self):
+        self.stats["checks"] += 1
+        if len(self._rows) < 2:
+            self._read_all()
+            return
+        block = self.worksheet.get(f"{STOCK_COLUMN}2:D{len(self._rows)}")
+        cells = [(row + ["", "", ""])[:3] for row in block]
+        cells += [["", "", ""]] * (len(self._rows) - 1 - len(cells))
+        _, week, version = cells[0]
+        same_layout = version.partition(".")[0] == self._version.partition(".")[0]
+        if not (version and same_layout and week == self._rows[1][2]):
+            self._read_all()
+            return
+        # Same rows: only en_casa (by the app or by hand) and the revision can differ
+        changed = False
+        for row, (checked, _, _) in zip(self._rows[1:], cells, strict=True):
+            changed |= row[1] != checked
+            row[1] = checked
+        self._rows[1][3] = version
+        self._version = version
+        self._checked = time.monotonic()
+        if changed:
+            self.stats["changed"] += 1
+
+
+class StockWriteQueue:
+    """Coalesce stock toggles into background ``batch_update`` calls."""
+
+    def __init__(
+        self,
+        worksheet,
+        mirror: StockMirror | None = None,
+        delay: float = 1.0,
+        retry_delay: float = 2.0,
+        max_retry_delay: float = 60.0,
+        max_retries: int = 5,
+    ):
+        self.worksheet = worksheet
+        self.mirror = mirror or StockMirror(worksheet)
+        self.delay = delay
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_retries = max_retries
+        self.last_error: Exception | None = None  # of the last dropped batch
+        self._pending: dict[str, bool] = {}
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self.stats = {"enqueued": 0, "batches": 0, "cells": 0, "failures": 0, "dropped": 0}
+
+    # -- queue --------------------------------------------------------------
+
+    def enqueue(self, name: str, checked: bool):
+        """Record a toggle; it is written on the next background flush."""
+        with self._cond:
+            self._pending[name] = checked
+            self.stats["enqueued"] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="stock-write-behind", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self) -> dict[str, bool]:
+        with self._cond:
+            return dict(self._pending)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every queued toggle is written. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    # -- background writer ----------------------------------------------------
+
+    def _run(self):
+        backoff = self.retry_delay
+        failed = 0
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            time.sleep(self.delay)  # let rapid toggles pile up into one batch
+
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                self._in_flight = len(batch)
+            try:
+                self._write(batch)
+            except Exception as exc:
+                failed += 1
+                with self._cond:
+                    self.stats["failures"] += 1
+                    self._in_flight = 0
+                    if failed <= self.max_retries:
+                        # Newer toggles queued meanwhile take precedence
+                        self._pending = {**batch, **self._pending}
+                    else:
+                        # Give up on this batch; toggles queued meanwhile still get written
+                        self.stats["dropped"] += len(batch)
+                        self.last_error = exc
+                        self._cond.notify_all()
+                if failed <= self.max_retries:
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_retry_delay)
+                    continue
+            else:
+                self.last_error = None
+
+            # Written or dropped: the next batch starts with a fresh retry budget
+            backoff = self.retry_delay
+            failed = 0
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def _write(self, batch: dict[str, bool]):
+        rows = {name: self.mirror.row_of(name) for name in batch}
+        if None in rows.values():
+            self.mirror.refresh()
+            rows = {name: self.mirror.row_of(name) for name in batch}
+        data = [
+            {"range": f"{STOCK_COLUMN}{row}", "values": [["TRUE" if batch[name] else "FALSE"]]}
+            for name, row in rows.items()
+            if row is not None
+        ]
+        if data:
+            version = self.mirror.next_version()
+            data.append({"range": VERSION_CELL, "values": [[version]]})
+            self.worksheet.batch_update(data, raw=False)
+            self.mirror.applied({name: batch[name] for name in batch if rows[name]}, version)
+        with self._cond:
+            self.stats["batches"] += 1
+            self.stats["cells"] += len(data) - (1 if data else 0)
@@ -0,0 +1,93 @@
+"""Unit conversion graph for summing one food's quantities into a single total.
+
+Nodes are the canonical units from ``meal_planner.quantities`` ("g", "ml",
+"cda", "cdta", "pinch", "count"). Edges carry a multiplication factor and
+work in both directions:
+
+    cda → ml      15               (any food)
+    cdta → ml     5                (any food)
+    pinch → g     0.5              (any food)
+    ml → g        density          (per food; water, 1.0, when not registered)
+    count → g     grams_per_unit   (per food; no edge when not registered)
+
+Each food sums into its canonical unit — the registry's ``unit`` for it, or
+grams. The factor from a unit to a food's canonical unit is found once by a
+breadth-first walk and memoized per (food ID, unit), so aggregating a year of
+plans is one dict lookup per item.
+"""
+
+from collections import deque
+
+from meal_planner.ingredients import IngredientRegistry
+from meal_planner.quantities import Quantity
+
+DEFAULT_UNIT = "g"
+WATER_DENSITY = 1.0
+
+# Edges that hold for every food: (from, to) → factor
+_GENERIC = {("cda", "ml"): 15.0, ("cdta", "ml"): 5.0, ("pinch", "g"): 0.5}
+
+
+class UnitGraph:
+    """Convert parsed quantities of a food to that food's canonical unit."""
+
+    def __init__(self, registry: IngredientRegistry):
+        self.registry = registry
+        self._memo: dict[tuple[int, str], float | None] = {}
+
+    def canonical_unit(self, food_id: int) -> str:
+        return self.registry[food_id].unit or DEFAULT_UNIT
+
+    def factor(self, food_id: int, unit: str) -> float | None:
+        """Multiplier from `unit` to the food's canonical unit, or None if there is no path."""
+        key = (food_id, unit)
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        factor = self._search(food_id, unit, self.canonical_unit(food_id))
+        self._memo[key] = factor
+        return factor
+
+    def convert(self, food_id: int, quantity: Quantity) -> float | None:
+        """`quantity` in the food's canonical unit, or None when it can't be converted."""
+        if quantity.amount is None or not quantity.unit:
+            return None
+        target = self.canonical_unit(food_id)
+        if quantity.grams is not None and quantity.unit == "count" and target != "count":
+            amount, unit = quantity.grams, "g"  # "1 lata (120g)"
+        else:
+            amount, unit = quantity.amount, quantity.unit
+        factor = self.factor(food_id, unit)
+        return None if factor is None else amount * factor
+
+    def _edges(self, food_id: int) -> dict[str, list[tuple[str, float]]]:
+        food = self.registry[food_id]
+        edges = dict(_GENERIC)
+        edges[("ml", "g")] = food.density or WATER_DENSITY
+        if food.grams_per_unit:
+            edges[("count", "g")] = food.grams_per_unit
+        graph: dict[str, list[tuple[str, float]]] = {}
+        for (a, b), f in edges.items():
+            graph.setdefault(a, []).append((b, f))
+            graph.setdefault(b, []).append((a, 1 / f))
+        return graph
+
+    def _search(self, food_id: int, source: str, target: str) -> float | None:
+        if source == target:
+            return 1.0
+        graph = self._edges(food_id)
+        seen = {source}
+        queue = deque([(source, 1.0)])
+        while queue:
+            unit, factor = queue.popleft()
+            for nxt, f in graph.get(unit, ()):
+                if nxt == target:
+                    return factor * f
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append((nxt, factor * f))
+        return None
+
+    def cache_size(self) -> int:
+        return len(self._memo)
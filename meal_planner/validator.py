@@ -0,0 +1,231 @@
+"""Plan validator: structure checks and recomputed calorie totals.
+
+Plan files repeat their calorie totals at three levels (item ``kcal``, meal
+``total_kcal``, day ``total_kcal``). ``validate_plan`` checks the structure
+against ``PLAN_SCHEMA`` and recomputes every total, reporting each problem
+with a JSON path such as ``$.days[2].meals.lunch.total_kcal``.
+
+The schema is compiled once into nested closures, so validating a plan is
+a straight walk with no schema interpretation. The app validates each plan
+version once (results are cached by content hash); the CLI checks every
+plan file in parallel and times itself. It also notes item names missing
+from ``data/ingredients.json`` that look like a registered food — they are
+counted as a food of their own until added as an alias::
+
+    uv run python -m meal_planner.validator [data/plans]
+"""
+
+import json
+import os
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from meal_planner.ingredients import REGISTRY_NAME, IngredientRegistry
+
+NUMBER = (int, float)
+
+# field → (type, required); nested specs are dicts ("*" = any key) or [spec] for lists
+ITEM_SCHEMA = {"name": (str, True), "quantity": (str, True), "kcal": (NUMBER, True)}
+MEAL_SCHEMA = {
+    "time": (str, False),
+    "name": (str, False),
+    "total_kcal": (NUMBER, True),
+    "source": (str, False),
+    "items": ([ITEM_SCHEMA], True),
+}
+DAY_SCHEMA = {
+    "date": (str, True),
+    "weekday": (str, True),
+    "total_kcal": (NUMBER, True),
+    "meals": ({"*": MEAL_SCHEMA}, True),
+}
+PLAN_SCHEMA = {
+    "year": (int, True),
+    "week": (int, True),
+    "start_date": (str, False),
+    "end_date": (str, False),
+    "daily_target_kcal": (NUMBER, False),
+    "days": ([DAY_SCHEMA], True),
+}
+
+
+class Issue(NamedTuple):
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+Check = Callable[[object, str, list], None]
+
+
+def _type_name(t) -> str:
+    return "number" if t is NUMBER else t.__name__
+
+
+def compile_schema(spec) -> Check:
+    """Turn a schema spec into a checker `check(value, path, issues)`."""
+    if isinstance(spec, list):
+        inner = compile_schema(spec[0])
+
+        def check_list(value, path, issues):
+            if not isinstance(value, list):
+                issues.append(Issue(path, "expected a list"))
+                return
+            for i, element in enumerate(value):
+                inner(element, f"{path}[{i}]", issues)
+
+        return check_list
+
+    if isinstance(spec, dict) and set(spec) == {"*"}:
+        inner = compile_schema(spec["*"])
+
+        def check_map(value, path, issues):
+            if not isinstance(value, dict):
+                issues.append(Issue(path, "expected an object"))
+                return
+            for key, element in value.items():
+                inner(element, f"{path}.{key}", issues)
+
+        return check_map
+
+    if isinstance(spec, dict):
+        fields = []
+        for key, (kind, required) in spec.items():
+            if isinstance(kind, list | dict):
+                fields.append((key, None, required, compile_schema(kind)))
+            else:
+                fields.append((key, kind, required, None))
+
+        def check_object(value, path, issues):
+            if not isinstance(value, dict):
+                issues.append(Issue(path, "expected an object"))
+                return
+            for key, kind, required, nested in fields:
+                if key not in value:
+                    if required:
+                        issues.append(Issue(f"{path}.{key}", "missing"))
+                    continue
+                field = value[key]
+                if nested is not None:
+                    nested(field, f"{path}.{key}", issues)
+                elif not isinstance(field, kind) or isinstance(field, bool):
+                    issues.append(
+                        Issue(f"{path}.{key}", f"expected {_type_name(kind)}, got {field!r}")
+                    )
+
+        return check_object
+
+    raise TypeError(f"bad schema spec: {spec!r}")
+
+
+_check_plan = compile_schema(PLAN_SCHEMA)
+
+
+def _number(value) -> float | None:
+    return value if isinstance(value, NUMBER) and not isinstance(value, bool) else None
+
+
+def validate_plan(plan) -> list[Issue]:
+    """Structural problems plus every total that doesn't match its parts."""
+    issues: list[Issue] = []
+    _check_plan(plan, "$", issues)
+    if not isinstance(plan, dict) or not isinstance(plan.get("days"), list):
+        return issues
+
+    for d, day in enumerate(plan["days"]):
+        if not isinstance(day, dict) or not isinstance(day.get("meals"), dict):
+            continue
+        day_path = f"$.days[{d}]"
+        meal_sum = 0.0
+        for slot, meal in day["meals"].items():
+            if not isinstance(meal, dict):
+                continue
+            items = meal.get("items")
+            listed = isinstance(items, list)
+            rows = [i for i in items if isinstance(i, dict)] if listed else []
+            item_sum = sum(_number(i.get("kcal")) or 0 for i in rows)
+            total = _number(meal.get("total_kcal"))
+            if total is not None and listed and item_sum != total:
+                issues.append(
+                    Issue(
+                        f"{day_path}.meals.{slot}.total_kcal",
+                        f"{total:g} but items add up to {item_sum:g}",
+                    )
+                )
+            meal_sum += total if total is not None else item_sum
+        day_total = _number(day.get("total_kcal"))
+        if day_total is not None and day_total != meal_sum:
+            issues.append(
+                Issue(f"{day_path}.total_kcal", f"{day_total:g} but meals add up to {meal_sum:g}")
+            )
+    return issues
+
+
+def validate_file(path: Path) -> tuple[str, list[Issue]]:
+    """(path, issues) for one plan file; unreadable JSON is itself an issue."""
+    try:
+        plan = json.loads(Path(path).read_bytes())
+    except (OSError, json.JSONDecodeError) as exc:
+        return str(path), [Issue("$", f"unreadable: {exc}")]
+    return str(path), validate_plan(plan)
+
+
+def validate_files(paths: list[Path], workers: int | None = None) -> dict[str, list[Issue]]:
+    """Validate many plan files, in a process pool when there are enough of them."""
+    if workers == 1 or len(paths) < 2 * (os.cpu_count() or 1):
+        results = map(validate_file, paths)
+        return dict(results)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(validate_file, paths, chunksize=16))
+
+
+def ingredient_suggestions(paths: list[Path], registry: IngredientRegistry) -> dict[str, str]:
+    """Item names the registry doesn't know but has a close match for → that food's name."""
+    suggestions = {}
+    for path in paths:
+        try:
+            plan = json.loads(Path(path).read_bytes())
+        except (OSError, json.JSONDecodeError):
+            continue
+        days = plan.get("days") if isinstance(plan, dict) else None
+        for day in days if isinstance(days, list) else []:
+            meals = day.get("meals") if isinstance(day, dict) else None
+            for meal in meals.values() if isinstance(meals, dict) else []:
+                items = meal.get("items") if isinstance(meal, dict) else None
+                for item in items if isinstance(items, list) else []:
+                    name = item.get("name") if isinstance(item, dict) else None
+                    if isinstance(name, str) and name not in suggestions:
+                        suggestions[name] = registry.suggestion(name)
+    return {name: food for name, food in suggestions.items() if food}
+
+
+def main():
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data/plans")
+    paths = sorted(root.rglob("W*.json"))
+    t0 = time.perf_counter()
+    results = validate_files(paths)
+    elapsed = time.perf_counter() - t0
+
+    n_issues = 0
+    for path, issues in results.items():
+        for issue in issues:
+            print(f"ERROR: {path}: {issue}", file=sys.stderr)
+        n_issues += len(issues)
+    print(f"Validated {len(paths)} plan files in {elapsed * 1e3:.1f} ms: {n_issues} issue(s)")
+
+    registry_path = root.parent / REGISTRY_NAME
+    if registry_path.exists():
+        registry = IngredientRegistry.load(registry_path)
+        for name, food in sorted(ingredient_suggestions(paths, registry).items()):
+            print(f"NOTE: {name!r} is not in {REGISTRY_NAME}; did you mean {food!r}?")
+    sys.exit(1 if n_issues else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""PlanDatabase imports around plan files it can't use."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from meal_planner.database import DB_NAME, PlanDatabase
+
+
+def plan(year=2026, week=10, **extra) -> dict:
+    return {"year": year, "week": week, "days": [], **extra}
+
+
+class SkippedPlansTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.data = Path(tmp.name)
+        self.plans = self.data / "plans" / "2026"
+        self.plans.mkdir(parents=True)
+        self.write("W10.json", plan())
+        self.db = PlanDatabase(self.data / DB_NAME, self.data)
+        self.addCleanup(self.db.close)
+        self.db.refresh()
+
+    def write(self, name: str, data):
+        text = data if isinstance(data, str) else json.dumps(data)
+        (self.plans / name).write_text(text)
+
+    def test_bad_plans_are_skipped_without_aborting_the_import(self):
+        self.write("W11.json", "{bad")
+        self.write("W12.json", {"week": 12, "days": []})
+        self.write("W13.json", plan(week=13, days=[{"date": "2026-03-23", "meals": [1]}]))
+        with self.assertLogs("meal_planner.database", "WARNING") as logs:
+            self.assertTrue(self.db.refresh())
+        self.assertEqual(len(logs.output), 2)
+        self.assertFalse(self.db.refresh())
+
+        self.assertEqual(
+            [(e["year"], e["week"]) for e in self.db.entries()], [(2026, 10), (2026, 13)]
+        )
+        self.assertEqual(sorted(self.db.skipped()), ["2026/W11.json", "2026/W12.json"])
+        self.assertIn("year", self.db.skipped()["2026/W12.json"])
+        self.assertEqual(self.db.get(2026, 13)["days"][0]["meals"], {})
+
+    def test_duplicate_week_waits_for_the_first_file_to_go(self):
+        self.write("W10-copy.json", plan(note="copy"))
+        with self.assertLogs("meal_planner.database", "WARNING"):
+            self.db.refresh()
+        self.assertFalse(self.db.refresh())
+        self.assertIn("2026/W10.json", self.db.skipped()["2026/W10-copy.json"])
+
+        (self.plans / "W10.json").unlink()
+        self.assertTrue(self.db.refresh())
+        self.assertEqual(self.db.skipped(), {})
+        self.assertEqual(self.db.get(2026, 10)["note"], "copy")
+
+
+if __name__ == "__main__":
+    unittest.main()
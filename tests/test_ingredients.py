@@ -0,0 +1,73 @@
+"""IngredientRegistry never merges different foods that only look alike."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from meal_planner.ingredients import Food, IngredientRegistry
+from meal_planner.resolver import IngredientResolver
+from meal_planner.validator import ingredient_suggestions
+
+FOODS = [
+    Food(31, "Pechuga de pavo", "carnes_proteinas"),
+    Food(38, "Tortita de arroz", "panaderia", aliases=("Rice cake",)),
+    Food(40, "Plátano", "frutas", aliases=("Banana",)),
+]
+
+
+class RegistryTest(unittest.TestCase):
+    def test_chicken_is_not_turkey(self):
+        registry = IngredientRegistry(FOODS)
+        chicken = registry.id_for("Pechuga de pollo")
+        self.assertNotEqual(chicken, 31)
+        self.assertFalse(registry.registered(chicken))
+        self.assertEqual(registry.lookup("Pechuga de pollo").name, "Pechuga de pollo")
+        self.assertIsNone(registry.suggestion("Pechuga de pollo"))
+
+    def test_exact_normalized_and_alias_names_share_an_id(self):
+        registry = IngredientRegistry(FOODS)
+        for name in ("Plátano", "platano", "PLATANO!", "Banana"):
+            self.assertEqual(registry.id_for(name), 40, name)
+
+    def test_near_miss_gets_its_own_id_and_a_suggestion(self):
+        registry = IngredientRegistry(FOODS)
+        self.assertNotEqual(registry.id_for("Tortitas de arroz"), 38)
+        self.assertEqual(registry.suggestion("Tortitas de arroz"), "Tortita de arroz")
+        self.assertIsNone(registry.suggestion("Rice cake"))  # known: nothing to suggest
+
+
+class ResolverTest(unittest.TestCase):
+    def test_every_content_word_must_match(self):
+        resolver = IngredientResolver(["Pechuga de pavo", "Tortita de arroz"])
+        self.assertIsNone(resolver.resolve("Pechuga de pollo"))
+        self.assertIsNone(resolver.resolve("Tortita de maiz"))
+        self.assertEqual(resolver.resolve("Tortitas de arroz"), "Tortita de arroz")
+
+
+class SuggestionReportTest(unittest.TestCase):
+    def test_validator_lists_near_misses_only(self):
+        plan = {
+            "days": [
+                {
+                    "meals": {
+                        "lunch": {
+                            "items": [
+                                {"name": "Pechuga de pollo"},
+                                {"name": "Tortitas de arroz"},
+                                {"name": "Banana"},
+                            ]
+                        }
+                    }
+                }
+            ]
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "W10.json"
+            path.write_text(json.dumps(plan))
+            found = ingredient_suggestions([path], IngredientRegistry(FOODS))
+        self.assertEqual(found, {"Tortitas de arroz": "Tortita de arroz"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""PantryLedger's JSON lines log after a crash mid-append."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from meal_planner.ledger import EVENTS_NAME, PantryLedger
+
+
+class TornLogTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        ledger = PantryLedger.open(self.dir)
+        ledger.purchase(1, 500.0)
+        ledger.purchase(2, 6.0)
+        self.events = self.dir / EVENTS_NAME
+
+    def test_torn_last_line_is_skipped_and_cut_before_the_next_append(self):
+        with open(self.events, "ab") as f:
+            f.write(b'{"seq": 3, "kind": "purch')
+        with self.assertLogs("meal_planner.ledger", "WARNING"):
+            ledger = PantryLedger.open(self.dir)
+        self.assertEqual(ledger.stock_levels(), {1: 500.0, 2: 6.0})
+
+        ledger.purchase(3, 1.0)
+        self.assertEqual(len(self.events.read_bytes().splitlines()), 3)
+        reopened = PantryLedger.open(self.dir)
+        self.assertEqual(reopened.seq, 3)
+        self.assertEqual(reopened.stock_levels(), {1: 500.0, 2: 6.0, 3: 1.0})
+
+    def test_complete_last_event_without_newline_is_kept(self):
+        self.events.write_bytes(self.events.read_bytes().rstrip(b"\n"))
+        ledger = PantryLedger.open(self.dir)
+        self.assertEqual(ledger.seq, 2)
+        ledger.adjust(2, -1.0)
+        self.assertEqual(PantryLedger.open(self.dir).stock_levels(), {1: 500.0, 2: 5.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""Plan.from_dict on hand-edited plans with the wrong shapes in them."""
+
+import json
+import unittest
+
+from meal_planner.model import Plan
+
+MALFORMED = {
+    "year": 2026,
+    "week": 10,
+    "days": [
+        {"date": "2026-03-02", "meals": {"lunch": {"name": "Wrap"}, "snack": "yogur"}},
+        {"date": "2026-03-03", "meals": [{"name": "Avena"}]},
+        {"date": "2026-03-04", "meals": {"dinner": {"items": [{"kcal": 500}, "pan", None]}}},
+        "2026-03-05",
+    ],
+}
+
+
+class MalformedPlanTest(unittest.TestCase):
+    def test_wrong_shapes_are_skipped(self):
+        plan = Plan.from_dict(MALFORMED)
+        self.assertEqual(
+            [day.date for day in plan.days], ["2026-03-02", "2026-03-03", "2026-03-04"]
+        )
+        monday, tuesday, wednesday = plan.days
+        self.assertEqual([meal.slot for meal in monday.meals], ["lunch"])
+        self.assertEqual(monday.meal("lunch").items, ())
+        self.assertEqual(tuesday.meals, ())
+        self.assertEqual([item.kcal for item in wednesday.meal("dinner").items], [500])
+        self.assertEqual(wednesday.meal("dinner").items[0].name, "")
+
+    def test_lazy_plan_parses_the_same(self):
+        blob = json.dumps(MALFORMED).encode()
+        lazy = Plan.from_json(blob, 2026, 10)
+        self.assertEqual(lazy.to_dict()["days"], Plan.from_dict(MALFORMED).to_dict()["days"])
+
+    def test_days_that_are_not_a_list_mean_no_days(self):
+        self.assertEqual(Plan.from_dict({"year": 2026, "week": 10, "days": {}}).days, ())
+
+
+if __name__ == "__main__":
+    unittest.main()
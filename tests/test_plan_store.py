@@ -0,0 +1,84 @@
+"""PlanStore rebuilds around week files it can't store."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from meal_planner.plan_store import PlanStore
+
+
+def plan(year=2026, week=10, **extra) -> dict:
+    return {"year": year, "week": week, "start_date": "2026-03-02", "days": [], **extra}
+
+
+class SkippedFilesTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.plans = Path(tmp.name)
+        (self.plans / "2026").mkdir()
+        self.write("W10.json", plan())
+
+    def write(self, name: str, data):
+        text = data if isinstance(data, str) else json.dumps(data)
+        (self.plans / "2026" / name).write_text(text)
+
+    def test_bad_files_are_skipped_once(self):
+        self.write("W11.json", "{bad")
+        self.write("W12.json", {"week": 12, "days": []})
+        self.write("W13.json", [plan(week=13)])
+        self.write("W14.json", plan(week=10))
+        self.write("W15.json", {"week": 15, "draft": True})
+        store = PlanStore(self.plans)
+        with self.assertLogs("meal_planner.plan_store", "WARNING") as logs:
+            self.assertTrue(store.refresh())
+        self.assertEqual(len(logs.output), 4)
+        self.assertEqual([store.refresh() for _ in range(3)], [False, False, False])
+
+        self.assertEqual([(e["year"], e["week"]) for e in store.entries()], [(2026, 10)])
+        skipped = store.skipped()
+        self.assertEqual(
+            sorted(skipped), ["2026/W11.json", "2026/W12.json", "2026/W13.json", "2026/W14.json"]
+        )
+        self.assertTrue(skipped["2026/W11.json"].startswith("unreadable"))
+        self.assertIn("year", skipped["2026/W12.json"])
+        self.assertIn("object", skipped["2026/W13.json"])
+        self.assertIn("2026/W10.json", skipped["2026/W14.json"])
+
+        # A new process maps the same index and has nothing to rebuild
+        reopened = PlanStore(self.plans)
+        self.assertFalse(reopened.refresh())
+        self.assertEqual(reopened.skipped(), skipped)
+
+    def test_fixed_file_is_picked_up(self):
+        self.write("W11.json", {"week": 11, "days": []})
+        store = PlanStore(self.plans)
+        with self.assertLogs("meal_planner.plan_store", "WARNING"):
+            store.refresh()
+        self.write("W11.json", plan(week=11, note="fixed"))
+        self.assertTrue(store.refresh())
+        self.assertEqual(store.skipped(), {})
+        self.assertEqual(store.get(2026, 11)["note"], "fixed")
+
+
+class ModelDigestTest(unittest.TestCase):
+    def test_model_keeps_the_digest_it_was_built_from(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            plans = Path(tmp)
+            (plans / "W10.json").write_text(json.dumps(plan()))
+            store = PlanStore(plans)
+            store.refresh()
+            old = store.model(2026, 10)
+            self.assertEqual(old.digest, store.digest(2026, 10))
+
+            (plans / "W10.json").write_text(json.dumps(plan(note="edited")))
+            store.refresh()
+            new = store.model(2026, 10)
+            self.assertNotEqual(new.digest, old.digest)
+            self.assertEqual(new.digest, store.digest(2026, 10))
+            self.assertNotIn("note", old.extra)
+
+
+if __name__ == "__main__":
+    unittest.main()
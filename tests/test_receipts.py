@@ -0,0 +1,91 @@
+"""Receipt footers: discounts, prices moved past SUBTOTAAL and the total check."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from meal_planner.receipts import ingest_directory, parse_receipt
+
+# AH_kassabon_2026-01-27 173600_1011.txt, blank lines dropped: the Nescafe
+# row lost its prices to the footer and the BONUS lines come after SUBTOTAAL
+RECEIPT = """\
+1011
+AANTAL
+OMSCHRIJVING
+PRIJS BEDRAG
+BONUSKAART
+xx6763
+1
+ZESPRI KIWI
+3,99 B
+1
+MUFFIN VANIL
+1,19
+2
+COCA-C ZERO
+2,89
+5,78
++STATIEGELD
+0,50
+5
+NESCAFE D&G
+SUBTOTAAL
+42,91
+BONUS
+bio premium
+-0,40
+BONUS
+NESCAFE&STAR
+-12,58
+6,29
+UW VOORDEEL
+31,45 B
+12,98
+Waarvan
+BONUS BOX PREMIUM
+0,00
+SUBTOTAAL
+29,93
+KOOPZEGELS
+2,90
+TOTAAL
+32,83
+"""
+NAME = "AH_kassabon_2026-01-27 173600_1011.txt"
+
+
+class FooterTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        (self.dir / NAME).write_text(RECEIPT, encoding="utf-8")
+
+    def test_discounts_and_moved_prices_add_up_to_the_total(self):
+        receipt = parse_receipt(self.dir / NAME)
+        items = {item["product"]: item for item in receipt["items"]}
+        nescafe = items["NESCAFE D&G"]
+        self.assertEqual((nescafe["unit_price"], nescafe["total"]), (6.29, 31.45))
+        self.assertEqual(nescafe["discount"], -12.58)
+        self.assertNotIn("discount", items["MUFFIN VANIL"])
+        self.assertEqual([d["name"] for d in receipt["discounts"]], ["bio premium"])
+        self.assertEqual(receipt["stamps_eur"], 2.90)
+        self.assertEqual(receipt["parsed_total_eur"], receipt["total_eur"])
+
+    def test_price_index_is_after_discount(self):
+        with self.assertNoLogs("meal_planner.receipts"):
+            store = ingest_directory(self.dir, workers=1)
+        self.assertEqual(store["prices"]["NESCAFE D&G"]["unit_price"], 3.77)
+        self.assertEqual(store["prices"]["NESCAFE D&G"]["list_price"], 6.29)
+        self.assertEqual(store["prices"]["MUFFIN VANIL"]["unit_price"], 1.19)
+
+    def test_receipt_off_its_total_is_logged(self):
+        (self.dir / NAME).write_text(RECEIPT.replace("32,83", "42,83"), encoding="utf-8")
+        with self.assertLogs("meal_planner.receipts", "WARNING") as logs:
+            store = ingest_directory(self.dir, workers=1)
+        self.assertIn(NAME, logs.output[0])
+        self.assertEqual(store["receipts"][NAME]["parsed_total_eur"], 32.83)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""SheetFetcher against a local HTTP stand-in for the published sheets."""
+
+import json
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from meal_planner.sheets import SheetFetcher
+
+DELAY = 0.3
+
+
+class _Sheets(BaseHTTPRequestHandler):
+    """Every path is a CSV served after DELAY; paths in `failing` answer 500, in `html` a page."""
+
+    def do_GET(self):  # noqa: N802
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("If-None-Match")))
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(DELAY)
+            etag = f'"{self.path}-v1"'
+            if self.path in server.failing:
+                self.send_response(500)
+                self.end_headers()
+            elif self.path in server.html:
+                body = b"<!DOCTYPE html><html><title>Sign in</title></html>"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+            else:
+                body = f"fecha,peso\n{self.path},100\n".encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class SheetFetcherTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Sheets)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.failing = set()
+        self.server.html = set()
+        self.server.active = self.server.peak = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def wait_for(self, predicate, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                self.fail("timed out")
+            time.sleep(0.01)
+
+    def test_prefetch_overlaps_requests(self):
+        fetcher = SheetFetcher(max_workers=4)
+        urls = [self.url(f"/sheet{i}") for i in range(4)]
+        start = time.monotonic()
+        fetcher.prefetch(urls)
+        bodies = [fetcher.get(url) for url in urls]
+        elapsed = time.monotonic() - start
+        self.assertTrue(all("fecha,peso" in body for body in bodies))
+        self.assertEqual(self.server.peak, 4)
+        self.assertLess(elapsed, DELAY * 3)
+
+    def test_fresh_copy_is_not_refetched(self):
+        fetcher = SheetFetcher(max_age=300)
+        url = self.url("/weight")
+        fetcher.get(url)
+        fetcher.get(url)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(fetcher.stats["cached"], 1)
+
+    def test_refresh_sends_etag_and_reuses_body_on_304(self):
+        fetcher = SheetFetcher(max_age=0)
+        url = self.url("/weight")
+        body = fetcher.get(url)
+        self.assertEqual(fetcher.get(url), body)  # stale copy while revalidating
+        self.wait_for(lambda: fetcher.stats["not_modified"] == 1)
+        self.assertEqual(self.server.requests[1], ("/weight", '"/weight-v1"'))
+        self.assertEqual(fetcher.stats["downloaded"], 1)
+
+    def test_error_without_copy_raises(self):
+        self.server.failing.add("/fail")
+        fetcher = SheetFetcher()
+        with self.assertRaises(urllib.error.HTTPError):
+            fetcher.get(self.url("/fail"))
+        self.assertEqual(fetcher.stats["errors"], 1)
+
+    def test_failed_refresh_keeps_serving_copy(self):
+        fetcher = SheetFetcher(max_age=0)
+        url = self.url("/fail")
+        body = fetcher.get(url)
+        self.server.failing.add("/fail")
+        self.assertEqual(fetcher.get(url), body)
+        self.wait_for(lambda: fetcher.stats["errors"] == 1)
+        self.assertEqual(fetcher.get(url), body)
+
+    def test_html_page_never_replaces_the_copy_or_snapshot(self):
+        with tempfile.TemporaryDirectory() as snapshots:
+            url = self.url("/weight")
+            fetcher = SheetFetcher(max_age=0, snapshot_dir=snapshots)
+            body = fetcher.get(url)
+            self.server.html.add("/weight")
+            self.assertEqual(fetcher.get(url), body)
+            self.wait_for(lambda: fetcher.stats["errors"] == 1)
+            self.assertEqual(fetcher.get(url), body)
+            self.assertEqual(SheetFetcher(snapshot_dir=snapshots).get(url), body)
+
+    def test_html_page_without_copy_raises(self):
+        self.server.html.add("/weight")
+        with self.assertRaises(ValueError):
+            SheetFetcher().get(self.url("/weight"))
+
+    def test_broken_snapshot_is_ignored(self):
+        with tempfile.TemporaryDirectory() as snapshots:
+            url = self.url("/weight")
+            fetcher = SheetFetcher(snapshot_dir=snapshots)
+            fetcher._snapshot_path(url).write_text(json.dumps({"url": url, "body": "x"}))
+            self.assertIn("fecha,peso", fetcher.get(url))
+            self.assertEqual(fetcher.stats["downloaded"], 1)
+
+    def test_invalid_url_fails_without_hanging(self):
+        fetcher = SheetFetcher()
+        result = []
+
+        def get():
+            try:
+                fetcher.get("docs.google.com/no-scheme")
+            except ValueError as exc:
+                result.append(exc)
+
+        thread = threading.Thread(target=get, daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive(), "get() deadlocked")
+        self.assertEqual(len(result), 1)
+        self.assertEqual(fetcher.stats["errors"], 1)
+
+    def test_snapshot_serves_a_new_process_at_once(self):
+        with tempfile.TemporaryDirectory() as snapshots:
+            url = self.url("/weight")
+            body = SheetFetcher(snapshot_dir=snapshots).get(url)
+            fetcher = SheetFetcher(snapshot_dir=snapshots)
+            start = time.monotonic()
+            self.assertEqual(fetcher.get(url), body)
+            self.assertLess(time.monotonic() - start, DELAY)
+            self.wait_for(lambda: fetcher.stats["not_modified"] == 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
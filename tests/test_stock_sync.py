@@ -0,0 +1,198 @@
+"""StockWriteQueue and StockMirror against a fake worksheet that counts API calls."""
+
+import re
+import threading
+import unittest
+from collections import Counter
+
+from meal_planner.stock_sync import StockMirror, StockWriteQueue
+
+
+class FakeWorksheet:
+    """In-memory Stock sheet; `fail` makes the next batch_update calls raise."""
+
+    def __init__(self, names: list[str], week: str = "2026-W10", version: str = "a.1"):
+        self.rows = [["ingrediente", "en_casa", "semana", "version"]]
+        for i, name in enumerate(names):
+            self.rows.append([name, "FALSE", week if i == 0 else "", version if i == 0 else ""])
+        self.calls = Counter()
+        self.batches: list[list[dict]] = []
+        self.fail = 0
+        self._lock = threading.Lock()
+
+    def get_all_values(self):
+        self.calls["get_all_values"] += 1
+        return [list(row) for row in self.rows]
+
+    def get(self, range_name: str):
+        self.calls["get"] += 1
+        m = re.fullmatch(r"([A-Z])(\d+):([A-Z])(\d+)", range_name)
+        c1, r1, c2, r2 = ord(m[1]) - 65, int(m[2]), ord(m[3]) - 65, int(m[4])
+        return [row[c1 : c2 + 1] for row in self.rows[r1 - 1 : r2]]
+
+    def batch_update(self, data, raw=True):
+        with self._lock:
+            self.calls["batch_update"] += 1
+            if self.fail:
+                self.fail -= 1
+                raise ConnectionError("quota exceeded")
+            self.batches.append(data)
+            for update in data:
+                m = re.fullmatch(r"([A-Z])(\d+)", update["range"])
+                self.rows[int(m[2]) - 1][ord(m[1]) - 65] = update["values"][0][0]
+
+    def clear(self):
+        self.calls["clear"] += 1
+        self.rows = []
+
+    def update(self, range_name=None, values=None):
+        self.calls["update"] += 1
+        self.rows = [list(row) for row in values]
+
+    def checked(self, name: str) -> str:
+        return next(row[1] for row in self.rows if row[0] == name)
+
+
+NAMES = ["Avena", "Huevos", "Leche", "Skyr"]
+
+
+def queue_for(worksheet, **kwargs) -> StockWriteQueue:
+    kwargs = {"delay": 0.05, "retry_delay": 0.01, **kwargs}
+    return StockWriteQueue(worksheet, StockMirror(worksheet), **kwargs)
+
+
+class StockWriteQueueTest(unittest.TestCase):
+    def test_toggles_coalesce_into_one_batch(self):
+        sheet = FakeWorksheet(NAMES)
+        queue = queue_for(sheet)
+        for name in ("Avena", "Huevos", "Avena", "Skyr", "Avena"):
+            queue.enqueue(name, True)
+        queue.enqueue("Skyr", False)
+        self.assertTrue(queue.flush(timeout=5))
+
+        self.assertEqual(sheet.calls["batch_update"], 1)
+        self.assertEqual(sheet.calls["get_all_values"], 1)  # row index, read once
+        self.assertEqual(len(sheet.batches[0]), 4)  # three cells plus the version cell
+        self.assertEqual([sheet.checked(n) for n in NAMES], ["TRUE", "TRUE", "FALSE", "FALSE"])
+        self.assertEqual(queue.stats["cells"], 3)
+
+    def test_later_toggles_reuse_the_row_index(self):
+        sheet = FakeWorksheet(NAMES)
+        queue = queue_for(sheet)
+        for name in NAMES:
+            queue.enqueue(name, True)
+            self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(sheet.calls["batch_update"], 4)
+        self.assertEqual(sheet.calls["get_all_values"], 1)
+
+    def test_unknown_name_rereads_once_and_is_skipped(self):
+        sheet = FakeWorksheet(NAMES)
+        queue = queue_for(sheet)
+        queue.enqueue("Huevos", True)
+        queue.flush(timeout=5)
+        queue.enqueue("Tofu", True)
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(sheet.calls["get_all_values"], 2)
+        self.assertEqual(sheet.calls["batch_update"], 1)
+
+    def test_failed_write_is_retried_with_newer_toggles_winning(self):
+        sheet = FakeWorksheet(NAMES)
+        sheet.fail = 2
+        queue = queue_for(sheet)
+        queue.enqueue("Leche", True)
+        queue.enqueue("Avena", True)
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(queue.stats["failures"], 2)
+        self.assertEqual(sheet.calls["batch_update"], 3)
+        self.assertEqual(sheet.checked("Leche"), "TRUE")
+
+        sheet.fail = 1
+        queue.enqueue("Leche", True)
+        queue.enqueue("Leche", False)
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(sheet.checked("Leche"), "FALSE")
+
+    def test_flush_times_out_while_writes_fail(self):
+        sheet = FakeWorksheet(NAMES)
+        sheet.fail = 1000
+        queue = queue_for(sheet, retry_delay=0.05, max_retry_delay=0.05, max_retries=1000)
+        queue.enqueue("Skyr", True)
+        self.assertFalse(queue.flush(timeout=0.3))
+        self.assertEqual(queue.pending(), {"Skyr": True})
+
+    def test_batch_is_dropped_after_max_retries(self):
+        sheet = FakeWorksheet(NAMES)
+        sheet.fail = 3
+        queue = queue_for(sheet, max_retries=2)
+        queue.enqueue("Skyr", True)
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(sheet.calls["batch_update"], 3)
+        self.assertEqual(queue.stats["dropped"], 1)
+        self.assertIsInstance(queue.last_error, ConnectionError)
+        self.assertEqual(sheet.checked("Skyr"), "FALSE")
+
+        # The next write gets a fresh retry budget and clears the error
+        sheet.fail = 2
+        queue.enqueue("Avena", True)
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(sheet.checked("Avena"), "TRUE")
+        self.assertIsNone(queue.last_error)
+
+
+class StockMirrorTest(unittest.TestCase):
+    def test_reuses_copy_within_ttl(self):
+        sheet = FakeWorksheet(NAMES)
+        mirror = StockMirror(sheet, ttl=60)
+        mirror.values()
+        mirror.values()
+        self.assertEqual(sheet.calls, Counter(get_all_values=1))
+        self.assertEqual(mirror.row_of("Leche"), 4)
+
+    def test_unchanged_sheet_costs_one_small_read(self):
+        sheet = FakeWorksheet(NAMES)
+        mirror = StockMirror(sheet, ttl=0)
+        mirror.values()
+        mirror.values()
+        self.assertEqual(sheet.calls, Counter(get_all_values=1, get=1))
+        self.assertEqual(mirror.stats["changed"], 0)
+
+    def test_tick_made_in_the_sheet_is_seen(self):
+        sheet = FakeWorksheet(NAMES)
+        mirror = StockMirror(sheet, ttl=0)
+        mirror.values()
+        sheet.rows[3][1] = "TRUE"  # by hand: no new version
+        self.assertEqual(mirror.values()[3][1], "TRUE")
+        self.assertEqual(mirror.stats["changed"], 1)
+        self.assertEqual(sheet.calls, Counter(get_all_values=1, get=1))
+
+    def test_new_revision_is_taken_from_the_same_read(self):
+        sheet = FakeWorksheet(NAMES)
+        mirror = StockMirror(sheet, ttl=0)
+        mirror.values()
+        sheet.rows[2][1] = "TRUE"
+        sheet.rows[1][3] = "a.2"
+        self.assertEqual(mirror.values()[2][1], "TRUE")
+        self.assertEqual(mirror.next_version().partition(".")[0], "a")
+        self.assertEqual(sheet.calls, Counter(get_all_values=1, get=1))
+
+    def test_new_layout_or_week_rereads_everything(self):
+        sheet = FakeWorksheet(NAMES)
+        mirror = StockMirror(sheet, ttl=0)
+        mirror.values()
+        sheet.rows[1][3] = "b.1"
+        mirror.values()
+        sheet.rows[1][2] = "2026-W11"
+        mirror.values()
+        self.assertEqual(sheet.calls["get_all_values"], 3)
+
+    def test_reset_writes_sheet_and_keeps_it_local(self):
+        sheet = FakeWorksheet(NAMES)
+        mirror = StockMirror(sheet, ttl=60)
+        mirror.reset("2026-W11", {"Tofu": True, "Arroz": False})
+        self.assertEqual(sheet.rows[1][:3], ["Arroz", "FALSE", "2026-W11"])
+        self.assertEqual(mirror.values(), sheet.rows)
+        self.assertEqual(sheet.calls["get_all_values"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()